@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from app.models import Design, Trend
 from app.config import get_settings
 from app.utils.logger import logger
+from app.utils.metrics import span
+from app.utils.events import publish_events, design_event
 import json
 import re
 
@@ -32,18 +34,20 @@ class DesignGenerator:
         """Generate multiple designs for a trend"""
         trend = db.query(Trend).filter(Trend.id == trend_id).first()
         if not trend:
-            self.logger.error(f"Trend {trend_id} not found")
+            self.logger.error("Trend %s not found", trend_id)
             return []
         
-        self.logger.info(f"Generating designs for trend: {trend.niche}")
+        self.logger.info("Generating designs for trend: %s", trend.niche)
         designs = []
         
         # Generate 3 different design prompts
-        for i in range(3):
-            prompt = self._create_design_prompt(trend, i)
-            design = self._create_design(trend, prompt, db)
-            if design:
-                designs.append(design)
+        with span("generate") as stage:
+            for i in range(3):
+                prompt = self._create_design_prompt(trend, i)
+                design = self._create_design(trend, prompt, db)
+                if design:
+                    designs.append(design)
+            stage.add_rows(len(designs))
         
         return designs
     
@@ -82,10 +86,11 @@ class DesignGenerator:
             db.add(design)
             db.commit()
             db.refresh(design)
-            self.logger.info(f"Created design: {design.id}")
+            publish_events([design_event(design, "created", trend.category)])
+            self.logger.info("Created design: %s", design.id)
             return design
         except Exception as e:
-            self.logger.error(f"Error creating design: {str(e)}")
+            self.logger.error("Error creating design: %s", e)
             db.rollback()
             return None
     
@@ -97,10 +102,10 @@ class DesignGenerator:
         
         try:
             # This is a placeholder - actual implementation would call image generation API
-            self.logger.info(f"Generating image for prompt: {prompt}")
+            self.logger.info("Generating image for prompt: %s", prompt)
             return "https://placeholder-image-url.com/image.jpg"
         except Exception as e:
-            self.logger.error(f"Error generating image: {str(e)}")
+            self.logger.error("Error generating image: %s", e)
             return None
     
     def create_mockups(self, design_id: int, image_url: str, db: Session) -> List[str]:
@@ -0,0 +1,363 @@
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.models import Product, ProductAggregate
+from app.config import get_settings
+from app.utils.logger import logger
+from app.utils.metrics import span
+import bisect
+import hashlib
+import json
+
+settings = get_settings()
+
+# Aggregates are kept per category and per discovered niche, the two trend groupings
+GROUPING_COLUMNS = {
+    "category": Product.category,
+    "niche": Product.niche_id,
+}
+SAMPLE_SIZE = 5  # products shown as style patterns
+STATE_FIELDS = ("id", "marketplace", "category", "niche_id", "price", "rating", "reviews_count",
+                "title", "tags", "keywords")
+
+# (state before the write, state after); None on insert or delete
+Change = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def product_state(product: Any) -> Dict[str, Any]:
+    """The fields of a product that aggregates and the content hash depend on"""
+    state = {field: getattr(product, field) for field in STATE_FIELDS}
+    # Normalized so an in-memory product and the same row read back hash alike
+    state["price"] = float(state["price"]) if state["price"] is not None else None
+    state["rating"] = float(state["rating"]) if state["rating"] is not None else None
+    state["reviews_count"] = int(state["reviews_count"] or 0)
+    return state
+
+
+def product_digest(state: Dict[str, Any]) -> int:
+    """Signed 64-bit digest of a product's content; niche membership is not part of it"""
+    payload = json.dumps([state[field] for field in STATE_FIELDS if field != "niche_id"],
+                         sort_keys=True, default=str)
+    return int.from_bytes(hashlib.blake2b(payload.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+def _group_key(grouping: str, state: Optional[Dict[str, Any]]) -> Optional[str]:
+    if state is None:
+        return None
+    value = state["category"] if grouping == "category" else state["niche_id"]
+    return str(value) if value is not None and value != "" else None
+
+
+class ProductStats:
+    """Sufficient statistics of a product group: everything trend scoring reads, in O(1) space"""
+
+    COLUMNS = (
+        "product_count", "total_reviews", "price_sum", "priced_count", "price_min", "price_max",
+        "rating_sum", "rating_count", "marketplace_counts", "category_counts", "sample", "content_hash",
+    )
+
+    def __init__(self, product_count: int = 0, total_reviews: int = 0, price_sum: float = 0.0,
+                 priced_count: int = 0, price_min: Optional[float] = None, price_max: Optional[float] = None,
+                 rating_sum: float = 0.0, rating_count: int = 0, marketplace_counts: Optional[Dict[str, int]] = None,
+                 category_counts: Optional[Dict[str, int]] = None, sample: Optional[List[list]] = None,
+                 content_hash: int = 0):
+        self.product_count = product_count or 0
+        self.total_reviews = total_reviews or 0
+        self.price_sum = price_sum or 0.0
+        self.priced_count = priced_count or 0
+        self.price_min = price_min
+        self.price_max = price_max
+        self.rating_sum = rating_sum or 0.0
+        self.rating_count = rating_count or 0
+        self.marketplace_counts = dict(marketplace_counts or {})
+        self.category_counts = dict(category_counts or {})
+        self.sample = [list(entry) for entry in sample or []]
+        self.content_hash = content_hash or 0
+        self.exact = True  # False once a removal leaves min/max or the sample unknown
+
+    @classmethod
+    def from_products(cls, products: Iterable[Any]) -> "ProductStats":
+        stats = cls()
+        for product in products:
+            stats.add(product_state(product))
+        return stats
+
+    @classmethod
+    def from_row(cls, row: ProductAggregate) -> "ProductStats":
+        return cls(**{column: getattr(row, column) for column in cls.COLUMNS})
+
+    def values(self) -> Dict[str, Any]:
+        return {column: getattr(self, column) for column in self.COLUMNS}
+
+    def add(self, state: Dict[str, Any], digest: int = 0):
+        self.product_count += 1
+        self.total_reviews += state["reviews_count"] or 0
+        price = state["price"]
+        self.price_sum += price or 0
+        if price:
+            self.priced_count += 1
+            self.price_min = price if self.price_min is None else min(self.price_min, price)
+            self.price_max = price if self.price_max is None else max(self.price_max, price)
+        if state["rating"]:
+            self.rating_sum += state["rating"]
+            self.rating_count += 1
+        _increment(self.marketplace_counts, state["marketplace"], 1)
+        if state["category"]:
+            _increment(self.category_counts, state["category"], 1)
+        self._sample_add(state)
+        self.content_hash ^= digest
+
+    def remove(self, state: Dict[str, Any], digest: int = 0, replacement: Optional[Dict[str, Any]] = None):
+        """Subtract a member; `replacement` is the same product's new state when it is edited in place"""
+        self.product_count -= 1
+        self.total_reviews -= state["reviews_count"] or 0
+        price = state["price"]
+        self.price_sum -= price or 0
+        if price:
+            self.priced_count -= 1
+            new_price = replacement["price"] if replacement else None
+            if self.priced_count == 0:
+                self.price_min = self.price_max = None
+            elif (price <= self.price_min and not (new_price and new_price <= price)) or \
+                    (price >= self.price_max and not (new_price and new_price >= price)):
+                self.exact = False
+        if state["rating"]:
+            self.rating_sum -= state["rating"]
+            self.rating_count -= 1
+        _increment(self.marketplace_counts, state["marketplace"], -1)
+        if state["category"]:
+            _increment(self.category_counts, state["category"], -1)
+        ids = [entry[0] for entry in self.sample]
+        if state["id"] in ids:
+            del self.sample[ids.index(state["id"])]
+            if replacement is None and self.product_count >= SAMPLE_SIZE:
+                self.exact = False  # the next-lowest id is not known here
+        self.content_hash ^= digest
+
+    def replace(self, old: Dict[str, Any], new: Dict[str, Any], old_digest: int = 0, new_digest: int = 0):
+        self.remove(old, old_digest, replacement=new)
+        self.add(new, new_digest)
+
+    def _sample_add(self, state: Dict[str, Any]):
+        ids = [entry[0] for entry in self.sample]
+        if len(ids) >= SAMPLE_SIZE and (state["id"] is None or state["id"] > ids[-1]):
+            return
+        position = bisect.bisect_left(ids, state["id"]) if state["id"] is not None else len(ids)
+        self.sample.insert(position, [state["id"], state["category"], state["price"]])
+        del self.sample[SAMPLE_SIZE:]
+
+    @property
+    def avg_price(self) -> float:
+        """Mean price over all products (unpriced ones count as 0)"""
+        return self.price_sum / self.product_count if self.product_count else 0
+
+    @property
+    def avg_listed_price(self) -> float:
+        """Mean price over products that have one"""
+        return self.price_sum / self.priced_count if self.priced_count else 0
+
+    @property
+    def avg_rating(self) -> float:
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+
+    def top_categories(self, limit: int) -> List[Tuple[str, int]]:
+        return sorted(self.category_counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def style_patterns(self) -> List[Dict[str, Any]]:
+        return [{"category": category, "price": price} for _, category, price in self.sample]
+
+
+def _increment(counts: Dict[str, int], key: Any, delta: int):
+    count = counts.get(key, 0) + delta
+    if count > 0:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+
+
+def _insert_statement(db: Session):
+    """Dialect-specific INSERT supporting ON CONFLICT, or None if unsupported"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(ProductAggregate)
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(ProductAggregate)
+    return None
+
+
+def _lock_rows(db: Session, grouping: str, keys: List[str]) -> Dict[str, ProductAggregate]:
+    """Aggregate rows of the keys, created stale if missing, locked in key order"""
+    if not keys:
+        return {}
+    keys = sorted(set(keys))
+    stmt = _insert_statement(db)
+    if stmt is not None:
+        rows = [{"grouping": grouping, "key": key, "stale": True, "updated_at": datetime.utcnow()} for key in keys]
+        db.execute(stmt.on_conflict_do_nothing(index_elements=["grouping", "key"]), rows)
+    else:
+        existing = {key for (key,) in db.query(ProductAggregate.key).filter(
+            ProductAggregate.grouping == grouping, ProductAggregate.key.in_(keys))}
+        for key in keys:
+            if key not in existing:
+                db.add(ProductAggregate(grouping=grouping, key=key, stale=True))
+        db.flush()
+    rows = (
+        db.query(ProductAggregate)
+        .filter(ProductAggregate.grouping == grouping, ProductAggregate.key.in_(keys))
+        .order_by(ProductAggregate.key)
+        .with_for_update()
+        .all()
+    )
+    return {row.key: row for row in rows}
+
+
+def update_aggregates(db: Session, changes: List[Change], groupings: Iterable[str] = tuple(GROUPING_COLUMNS)) -> int:
+    """Apply product inserts, edits and deletes to the aggregates in the caller's transaction
+
+    A key seen for the first time is created stale, so its first read rebuilds it
+    from the products table instead of trusting a partial sum.
+    """
+    changes = [(old, new) for old, new in changes if old != new]
+    if not changes:
+        return 0
+
+    with span("aggregates") as stage:
+        digests = {}
+        for old, new in changes:
+            for state in (old, new):
+                if state is not None:
+                    digests[id(state)] = product_digest(state)
+
+        for grouping in groupings:
+            keys = {_group_key(grouping, state) for change in changes for state in change} - {None}
+            rows = _lock_rows(db, grouping, list(keys))
+            stats = {key: ProductStats.from_row(row) for key, row in rows.items() if not row.stale}
+            for old, new in changes:
+                old_key, new_key = _group_key(grouping, old), _group_key(grouping, new)
+                if old_key is not None and old_key == new_key:
+                    if old_key in stats:
+                        stats[old_key].replace(old, new, digests[id(old)], digests[id(new)])
+                    continue
+                if old_key in stats:
+                    stats[old_key].remove(old, digests[id(old)])
+                if new_key in stats:
+                    stats[new_key].add(new, digests[id(new)])
+
+            now = datetime.utcnow()
+            for key, group_stats in stats.items():
+                row = rows[key]
+                for column, value in group_stats.values().items():
+                    setattr(row, column, value)
+                row.stale = not group_stats.exact
+                row.updated_at = now
+        stage.add_rows(len(changes))
+    return len(changes)
+
+
+def rebuild_aggregates(db: Session, grouping: str, keys: Optional[List[Any]] = None) -> int:
+    """Recompute aggregates of the given keys (all keys if None) from the products table"""
+    column = GROUPING_COLUMNS[grouping]
+    with span("aggregates") as stage:
+        query = db.query(*[getattr(Product, field) for field in STATE_FIELDS])
+        if keys is None:
+            query = query.filter(column != None)
+        else:
+            query = query.filter(column.in_(list(keys)))
+            rows = _lock_rows(db, grouping, [str(key) for key in keys])
+
+        stats: Dict[str, ProductStats] = {}
+        for values in query.order_by(column, Product.id).yield_per(5000):
+            state = product_state(_Row(values))
+            key = _group_key(grouping, state)
+            if key is not None:
+                stats.setdefault(key, ProductStats()).add(state, product_digest(state))
+
+        if keys is None:
+            db.query(ProductAggregate).filter(ProductAggregate.grouping == grouping).delete(synchronize_session=False)
+            rows = {}
+        now = datetime.utcnow()
+        for key, row in rows.items():
+            if key not in stats:
+                db.delete(row)  # no products left under this key
+        for key, group_stats in stats.items():
+            row = rows.get(key)
+            if row is None:
+                row = ProductAggregate(grouping=grouping, key=key)
+                db.add(row)
+            for column_name, value in group_stats.values().items():
+                setattr(row, column_name, value)
+            row.stale = False
+            row.updated_at = now
+        db.commit()
+        stage.add_rows(sum(s.product_count for s in stats.values()))
+    logger.info("Rebuilt %s %s aggregates", len(stats), grouping)
+    return len(stats)
+
+
+class _Row:
+    """Attribute access over a product column tuple, for product_state"""
+
+    def __init__(self, values: tuple):
+        self.__dict__.update(zip(STATE_FIELDS, values))
+
+
+def load_aggregates(db: Session, grouping: str, keys: List[Any]) -> Dict[Any, ProductStats]:
+    """Statistics of each key, rebuilding missing or stale entries first"""
+    if not keys:
+        return {}
+    by_text = {str(key): key for key in keys}
+    rows = {
+        row.key: row
+        for row in db.query(ProductAggregate).filter(
+            ProductAggregate.grouping == grouping, ProductAggregate.key.in_(list(by_text)))
+    }
+    rebuild = [by_text[key] for key in by_text if key not in rows or rows[key].stale]
+    if rebuild:
+        rebuild_aggregates(db, grouping, rebuild)
+        rows.update({
+            row.key: row
+            for row in db.query(ProductAggregate).filter(
+                ProductAggregate.grouping == grouping,
+                ProductAggregate.key.in_([str(key) for key in rebuild]))
+        })
+    return {by_text[key]: ProductStats.from_row(row) for key, row in rows.items()}
+
+
+def scoring_fingerprint(content_hash: int, *inputs: Any) -> int:
+    """content_hash combined with the other scoring inputs (listings, tags, snapshot signals)
+
+    Signals decay with time, so a group with recent snapshots gets a new
+    fingerprint as its velocity and decayed demand move, even if no product changed.
+    """
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return content_hash ^ int.from_bytes(hashlib.blake2b(payload.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+def unchanged_keys(db: Session, grouping: str, keys: List[Any],
+                   fingerprints: Dict[Any, int], now: Optional[datetime] = None) -> List[Any]:
+    """Keys whose scoring_fingerprint equals the one their trend was scored from within trend_rescore_hours"""
+    if not keys or settings.trend_rescore_hours <= 0:
+        return []
+    since = (now or datetime.utcnow()) - timedelta(hours=settings.trend_rescore_hours)
+    scored = dict(
+        db.query(ProductAggregate.key, ProductAggregate.scored_hash)
+        .filter(
+            ProductAggregate.grouping == grouping,
+            ProductAggregate.key.in_([str(key) for key in keys]),
+            ProductAggregate.scored_at >= since,
+        )
+        .all()
+    )
+    return [key for key in keys if key in fingerprints and scored.get(str(key)) == fingerprints[key]]
+
+
+def mark_scored(db: Session, scored: List[List[Any]], now: Optional[datetime] = None):
+    """Record the fingerprint each saved trend was computed from: [grouping, key, fingerprint] items"""
+    now = now or datetime.utcnow()
+    for grouping, key, fingerprint in scored:
+        db.query(ProductAggregate).filter(
+            ProductAggregate.grouping == grouping, ProductAggregate.key == str(key)
+        ).update({ProductAggregate.scored_hash: fingerprint, ProductAggregate.scored_at: now},
+                 synchronize_session=False)
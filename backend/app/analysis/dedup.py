@@ -0,0 +1,236 @@
+from typing import List, Dict, Any, Optional, Iterable, Set
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import Product, ProductSignature, ProductLshBucket
+from app.config import get_settings
+from app.utils.logger import logger
+from app.utils.metrics import span
+import hashlib
+import io
+import re
+import zlib
+import numpy as np
+
+settings = get_settings()
+
+# Universal hashing h(x) = (a * x + b) mod p with a, b < 2^32 keeps a * x + b inside uint64
+_PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 2 ** 32 - 1, size=settings.dedup_num_perm, dtype=np.uint64)
+_B = _rng.randint(0, 2 ** 32 - 1, size=settings.dedup_num_perm, dtype=np.uint64)
+
+_BANDS = settings.dedup_bands
+_ROWS = settings.dedup_num_perm // settings.dedup_bands
+IMAGE_BAND = _BANDS  # exact image-hash matches share one extra pseudo band
+
+_non_word = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(title: Optional[str], tags: Optional[Iterable[str]]) -> str:
+    """Sorted set of title and tag words, so reordered titles shingle identically"""
+    words = set(_non_word.sub(" ", (title or "").lower()).split())
+    words.update(t for tag in (tags or []) for t in _non_word.sub(" ", str(tag).lower()).split())
+    return " ".join(sorted(words))
+
+
+def shingle_hashes(text: str, k: int = 4) -> np.ndarray:
+    """crc32 of character k-shingles; robust to reordered or slightly edited titles"""
+    if len(text) < k:
+        text = text.ljust(k)
+    shingles = {text[i:i + k] for i in range(len(text) - k + 1)}
+    return np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def minhash(hashes: np.ndarray) -> np.ndarray:
+    """num_perm MinHash values of a shingle set (one vectorized pass)"""
+    permuted = (np.outer(hashes, _A) + _B) % _PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def signature_for(product: Product) -> np.ndarray:
+    return minhash(shingle_hashes(normalize_text(product.title, product.tags)))
+
+
+def band_buckets(signature: np.ndarray) -> List[int]:
+    """One 63-bit bucket key per LSH band"""
+    buckets = []
+    for band in range(_BANDS):
+        chunk = signature[band * _ROWS:(band + 1) * _ROWS].tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8, person=band.to_bytes(2, "little") * 8).digest()
+        buckets.append(int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF)
+    return buckets
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(a == b))
+
+
+def image_dhash(image_bytes: bytes) -> int:
+    """64-bit difference hash of an image, as a signed integer for BigInteger storage"""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(image_bytes)).convert("L").resize((9, 8))
+    pixels = list(image.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def fetch_image_hash(url: Optional[str]) -> Optional[int]:
+    """Download and hash an image; None when disabled or unavailable"""
+    if not url or not settings.dedup_image_hashing:
+        return None
+    try:
+        import httpx
+        response = httpx.get(url, timeout=10, follow_redirects=True)
+        response.raise_for_status()
+        return image_dhash(response.content)
+    except Exception as e:
+        logger.debug("Could not hash image %s: %s", url, e)
+        return None
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count("1")
+
+
+def _merge_clusters(db: Session, target: int, others: Set[int]):
+    if others:
+        db.query(ProductSignature).filter(ProductSignature.cluster_id.in_(others)).update(
+            {ProductSignature.cluster_id: target}, synchronize_session=False
+        )
+
+
+def index_products(db: Session, products: List[Product]) -> Dict[str, int]:
+    """Sign products, look up LSH candidates and assign near-duplicate clusters incrementally
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    stats = {"indexed": 0, "matched": 0}
+    products = [p for p in products if p.id is not None]
+    if not products:
+        return stats
+
+    with span("dedup") as stage:
+        ids = [p.id for p in products]
+        db.query(ProductLshBucket).filter(ProductLshBucket.product_id.in_(ids)).delete(synchronize_session=False)
+        existing = {s.product_id: s for s in db.query(ProductSignature).filter(ProductSignature.product_id.in_(ids))}
+
+        signatures = {p.id: signature_for(p) for p in products}
+        image_hashes = {p.id: fetch_image_hash(p.image_url) for p in products}
+        buckets = {pid: band_buckets(sig) for pid, sig in signatures.items()}
+
+        # Candidates from the stored index, one query per band
+        candidates: Dict[int, Set[int]] = {pid: set() for pid in ids}
+        for band in range(_BANDS):
+            keys = {buckets[pid][band]: [] for pid in ids}
+            for pid in ids:
+                keys[buckets[pid][band]].append(pid)
+            rows = db.query(ProductLshBucket.bucket, ProductLshBucket.product_id).filter(
+                ProductLshBucket.band == band, ProductLshBucket.bucket.in_(list(keys))
+            )
+            for bucket, other_id in rows:
+                for pid in keys[bucket]:
+                    candidates[pid].add(other_id)
+        hashed = [h for h in image_hashes.values() if h is not None]
+        if hashed:
+            rows = db.query(ProductLshBucket.bucket, ProductLshBucket.product_id).filter(
+                ProductLshBucket.band == IMAGE_BAND, ProductLshBucket.bucket.in_(hashed)
+            )
+            for bucket, other_id in rows:
+                for pid, h in image_hashes.items():
+                    if h == bucket:
+                        candidates[pid].add(other_id)
+
+        candidate_ids = {c for cs in candidates.values() for c in cs} - set(ids)
+        stored = {
+            s.product_id: s
+            for s in db.query(ProductSignature).filter(ProductSignature.product_id.in_(candidate_ids))
+        } if candidate_ids else {}
+
+        batch_seen: Dict[int, ProductSignature] = {}
+        batch_buckets: Dict[tuple, List[int]] = {}
+        for product in products:
+            pid = product.id
+            sig = signatures[pid]
+            own = existing.get(pid) or ProductSignature(product_id=pid)
+            own.signature = sig.tobytes()
+            own.image_hash = image_hashes[pid]
+
+            matches = set()
+            for other_id in candidates[pid] | {o for b in enumerate(buckets[pid]) for o in batch_buckets.get(b, [])}:
+                other = stored.get(other_id) or batch_seen.get(other_id)
+                if other is None or other_id == pid:
+                    continue
+                other_sig = np.frombuffer(other.signature, dtype=np.uint32)
+                same_image = (
+                    own.image_hash is not None and other.image_hash is not None
+                    and _hamming(own.image_hash, other.image_hash) <= settings.dedup_image_max_distance
+                )
+                if same_image or similarity(sig, other_sig) >= settings.dedup_similarity_threshold:
+                    matches.add(other.cluster_id)
+
+            if matches:
+                target = min(matches)
+                _merge_clusters(db, target, matches - {target})
+                for seen in list(batch_seen.values()) + list(stored.values()):
+                    if seen.cluster_id in matches:
+                        seen.cluster_id = target
+                own.cluster_id = target
+                stats["matched"] += 1
+            elif own.cluster_id is None:
+                own.cluster_id = pid
+
+            db.add(own)
+            batch_seen[pid] = own
+            for band, bucket in enumerate(buckets[pid]):
+                batch_buckets.setdefault((band, bucket), []).append(pid)
+                db.add(ProductLshBucket(band=band, bucket=bucket, product_id=pid))
+            if own.image_hash is not None:
+                db.add(ProductLshBucket(band=IMAGE_BAND, bucket=own.image_hash, product_id=pid))
+            stats["indexed"] += 1
+
+        db.flush()
+        stage.add_rows(stats["indexed"])
+
+    return stats
+
+
+def index_unsigned_products(db: Session, batch_size: int = 1000) -> Dict[str, int]:
+    """Backfill signatures for products that were never indexed"""
+    totals = {"indexed": 0, "matched": 0}
+    while True:
+        products = (
+            db.query(Product)
+            .outerjoin(ProductSignature, ProductSignature.product_id == Product.id)
+            .filter(ProductSignature.product_id == None)
+            .order_by(Product.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not products:
+            break
+        stats = index_products(db, products)
+        db.commit()
+        for key in totals:
+            totals[key] += stats[key]
+        logger.info("Indexed %s products for deduplication", totals["indexed"])
+    return totals
+
+
+def cluster_counts(db: Session, keys: List[Any], column=Product.category) -> Dict[Any, int]:
+    """Distinct near-duplicate clusters per category (or per niche_id); unindexed products count as their own cluster"""
+    if not keys:
+        return {}
+    listing = func.coalesce(ProductSignature.cluster_id, Product.id)
+    rows = (
+        db.query(column, func.count(func.distinct(listing)))
+        .outerjoin(ProductSignature, ProductSignature.product_id == Product.id)
+        .filter(column.in_(keys))
+        .group_by(column)
+        .all()
+    )
+    return {key: count for key, count in rows}
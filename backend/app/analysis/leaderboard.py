@@ -0,0 +1,122 @@
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import Trend, TrendLeaderboardEntry
+from app.schemas.trend import TrendResponse
+from app.config import get_settings
+from app.utils.logger import logger
+from app.utils.metrics import span
+import bisect
+import threading
+import time
+
+settings = get_settings()
+
+OVERALL = "overall"
+CATEGORY = "category"
+MARKETPLACE = "marketplace"
+
+
+def refresh_leaderboard(db: Session) -> int:
+    """Rebuild the materialized top-K per scope from the trends table; returns rows written"""
+    with span("leaderboard") as stage:
+        trends = (
+            db.query(Trend.id, Trend.overall_score, Trend.category, Trend.marketplace_counts)
+            .filter(Trend.overall_score != None, Trend.active.isnot(False))
+            .order_by(Trend.overall_score.desc(), Trend.id)
+            .all()
+        )
+
+        # Trends arrive sorted, so each scope fills in rank order until it holds K entries
+        scopes: Dict[Tuple[str, str], List[Tuple[int, float]]] = {}
+        for trend_id, score, category, marketplace_counts in trends:
+            keys = [(OVERALL, "")]
+            if category:
+                keys.append((CATEGORY, category))
+            keys += [(MARKETPLACE, m) for m, count in (marketplace_counts or {}).items() if count]
+            for key in keys:
+                entries = scopes.setdefault(key, [])
+                if len(entries) < settings.leaderboard_size:
+                    entries.append((trend_id, score))
+
+        now = datetime.utcnow()
+        rows = [
+            {"scope": scope, "scope_value": value, "rank": rank, "trend_id": trend_id,
+             "overall_score": score, "refreshed_at": now}
+            for (scope, value), entries in scopes.items()
+            for rank, (trend_id, score) in enumerate(entries, start=1)
+        ]
+        db.query(TrendLeaderboardEntry).delete(synchronize_session=False)
+        if rows:
+            db.bulk_insert_mappings(TrendLeaderboardEntry, rows)
+        db.commit()
+        stage.add_rows(len(rows))
+
+    leaderboard.invalidate()
+    logger.info("Leaderboard refreshed: %s scopes, %s entries", len(scopes), len(rows))
+    return len(rows)
+
+
+class Leaderboard:
+    """In-process copy of trend_leaderboard: scope -> trends sorted by score, served in O(K)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scopes: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._neg_scores: Dict[Tuple[str, str], List[float]] = {}  # ascending, for bisect on min_score
+        self._refreshed_at: Optional[datetime] = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        self._checked_at = 0.0
+
+    def _reload(self, db: Session):
+        entries = (
+            db.query(TrendLeaderboardEntry)
+            .order_by(TrendLeaderboardEntry.scope, TrendLeaderboardEntry.scope_value, TrendLeaderboardEntry.rank)
+            .all()
+        )
+        ids = {entry.trend_id for entry in entries}
+        payloads = {
+            trend.id: TrendResponse.model_validate(trend).model_dump()
+            for trend in db.query(Trend).filter(Trend.id.in_(ids))
+        } if ids else {}
+
+        scopes: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for entry in entries:
+            payload = payloads.get(entry.trend_id)
+            if payload is not None:  # trend deleted since the refresh
+                scopes.setdefault((entry.scope, entry.scope_value), []).append(payload)
+
+        with self._lock:
+            self._scopes = scopes
+            self._neg_scores = {key: [-t["overall_score"] for t in trends] for key, trends in scopes.items()}
+            self._refreshed_at = max((entry.refreshed_at for entry in entries), default=None)
+
+    def _ensure_fresh(self, db: Session):
+        now = time.monotonic()
+        if now - self._checked_at < settings.leaderboard_reload_seconds:
+            return
+        self._checked_at = now
+        refreshed_at = db.query(func.max(TrendLeaderboardEntry.refreshed_at)).scalar()
+        if refreshed_at != self._refreshed_at or refreshed_at is None:
+            self._reload(db)
+
+    def top(self, db: Session, limit: int, category: Optional[str] = None, marketplace: Optional[str] = None,
+            min_score: float = 0) -> List[Dict[str, Any]]:
+        """Top `limit` trends overall, or within one category or marketplace"""
+        self._ensure_fresh(db)
+        if category:
+            key = (CATEGORY, category)
+        elif marketplace:
+            key = (MARKETPLACE, marketplace)
+        else:
+            key = (OVERALL, "")
+        with self._lock:
+            trends = self._scopes.get(key, [])
+            end = bisect.bisect_right(self._neg_scores.get(key, []), -min_score) if min_score else len(trends)
+            return trends[:min(limit, end)]
+
+
+leaderboard = Leaderboard()
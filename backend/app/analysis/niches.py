@@ -0,0 +1,279 @@
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models import Product, Niche, NicheModel, ProductAggregate
+from app.config import get_settings
+from app.utils.logger import logger
+from app.utils.metrics import span
+from app.analysis.aggregates import product_state, update_aggregates
+import math
+import pickle
+import re
+import time
+import numpy as np
+
+settings = get_settings()
+
+MIN_PRODUCTS_FOR_NICHES = 100
+LABEL_WORDS = 3
+ASSIGN_CHUNK_SIZE = 5000
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "my", "of",
+    "on", "or", "our", "the", "this", "to", "with", "your", "you", "new", "best", "great",
+})
+
+_non_word = re.compile(r"[^a-z0-9]+")
+
+# Active pipeline, reloaded when a newer NicheModel appears
+_active: Dict[str, Any] = {}
+
+
+def _words(text: Any) -> List[str]:
+    return [w for w in _non_word.sub(" ", str(text).lower()).split() if len(w) > 1 and w not in STOP_WORDS]
+
+
+def _phrases(value: Any) -> List[Any]:
+    if isinstance(value, dict):
+        return list(value)
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value] if value else []
+
+
+def product_terms(document: Tuple[Any, Any, Any]) -> List[str]:
+    """Keywords of a (title, tags, keywords) document: title unigrams/bigrams plus whole tag phrases"""
+    title, tags, keywords = document
+    words = _words(title or "")
+    terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for phrase in _phrases(tags) + _phrases(keywords):
+        phrase_words = _words(phrase)
+        terms.extend(phrase_words)
+        if len(phrase_words) > 1:
+            terms.append(" ".join(phrase_words))
+    return terms
+
+
+def cluster_count(product_count: int) -> int:
+    """Number of niches to discover: grows with sqrt(n), capped for predictable fit time"""
+    return int(min(settings.niche_max_clusters, max(2, round(math.sqrt(product_count / 2)))))
+
+
+class NichePipeline:
+    """TF-IDF -> truncated SVD -> mini-batch k-means; pickled into NicheModel.state"""
+
+    def __init__(self, vectorizer, svd, kmeans):
+        self.vectorizer = vectorizer
+        self.svd = svd
+        self.kmeans = kmeans
+
+    def transform(self, documents: Iterable) -> np.ndarray:
+        from sklearn.preprocessing import normalize
+        return normalize(self.svd.transform(self.vectorizer.transform(documents)))
+
+    def predict(self, documents: Iterable) -> np.ndarray:
+        return self.kmeans.predict(self.transform(documents))
+
+    def top_terms(self, count: int = 8) -> List[List[str]]:
+        """Highest-weighted vocabulary terms of every cluster centroid"""
+        terms = self.vectorizer.get_feature_names_out()
+        weights = self.kmeans.cluster_centers_ @ self.svd.components_
+        top = np.argsort(-weights, axis=1)[:, :count]
+        return [[str(terms[i]) for i in row] for row in top]
+
+
+def fit_pipeline(documents: Iterable, n_clusters: Optional[int] = None, seed: int = 0) -> Tuple[NichePipeline, np.ndarray]:
+    """Fit the niche pipeline in one pass over the documents; returns it with each document's cluster"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.preprocessing import normalize
+
+    vectorizer = TfidfVectorizer(
+        analyzer=product_terms,
+        min_df=settings.niche_min_df,
+        max_features=settings.niche_max_features,
+        sublinear_tf=True,
+        dtype=np.float32,
+    )
+    matrix = vectorizer.fit_transform(documents)
+    vectorizer.stop_words_ = None  # pruned-term set is only for introspection and bloats the pickle
+
+    svd = TruncatedSVD(min(settings.niche_components, matrix.shape[1] - 1), n_iter=4, random_state=seed)
+    reduced = normalize(svd.fit_transform(matrix))
+    svd.components_ = svd.components_.astype(np.float32)
+
+    kmeans = MiniBatchKMeans(
+        n_clusters or cluster_count(matrix.shape[0]),
+        batch_size=settings.niche_batch_size,
+        n_init=3,
+        random_state=seed,
+    ).fit(reduced)
+    return NichePipeline(vectorizer, svd, kmeans), kmeans.labels_
+
+
+def niche_labels(top_terms: List[List[str]]) -> List[str]:
+    """Readable, unique labels built from each cluster's top terms"""
+    labels = []
+    used = set()
+    for cluster, terms in enumerate(top_terms):
+        words: List[str] = []
+        for term in terms:
+            new_words = [w for w in term.split() if w not in words]
+            if new_words and len(words) + len(new_words) <= LABEL_WORDS:
+                words.extend(new_words)
+        label = " ".join(words) or f"niche {cluster}"
+        if label in used:
+            label = f"{label} {cluster}"
+        used.add(label)
+        labels.append(label)
+    return labels
+
+
+def _write_assignments(db: Session, product_ids: np.ndarray, niche_ids: np.ndarray):
+    """Set products.niche_id with one UPDATE per niche and id chunk"""
+    order = np.argsort(niche_ids, kind="stable")
+    product_ids, niche_ids = product_ids[order], niche_ids[order]
+    boundaries = np.flatnonzero(np.diff(niche_ids)) + 1
+    for ids, niche in zip(np.split(product_ids, boundaries), niche_ids[np.r_[0, boundaries]]):
+        for start in range(0, len(ids), ASSIGN_CHUNK_SIZE):
+            chunk = ids[start:start + ASSIGN_CHUNK_SIZE].tolist()
+            # updated_at is pinned so a niche refit does not look like a product change
+            db.query(Product).filter(Product.id.in_(chunk)).update(
+                {Product.niche_id: int(niche), Product.updated_at: Product.updated_at},
+                synchronize_session=False,
+            )
+
+
+def fit_niches(db: Session) -> Dict[str, Any]:
+    """Cluster every product into niches and make the result the active model"""
+    product_count = db.query(func.count(Product.id)).scalar()
+    if product_count < MIN_PRODUCTS_FOR_NICHES:
+        logger.info("Only %s products; keeping category grouping", product_count)
+        return {"products": product_count, "niches": 0}
+
+    started = time.perf_counter()
+    product_ids: List[int] = []
+
+    def documents():
+        rows = (
+            db.query(Product.id, Product.title, Product.tags, Product.keywords)
+            .order_by(Product.id)
+            .yield_per(ASSIGN_CHUNK_SIZE)
+        )
+        for product_id, title, tags, keywords in rows:
+            product_ids.append(product_id)
+            yield title, tags, keywords
+
+    with span("niche_fit") as stage:
+        pipeline, clusters = fit_pipeline(documents())
+        stage.add_rows(len(product_ids))
+
+    top_terms = pipeline.top_terms()
+    sizes = np.bincount(clusters, minlength=len(top_terms))
+    model = NicheModel(
+        state=pickle.dumps(pipeline, protocol=pickle.HIGHEST_PROTOCOL),
+        product_count=len(product_ids),
+        niche_count=len(top_terms),
+        fit_seconds=int(time.perf_counter() - started),
+    )
+    db.add(model)
+    db.flush()
+
+    niches = [
+        Niche(model_id=model.id, cluster=cluster, label=label, top_terms=top_terms[cluster],
+              product_count=int(sizes[cluster]))
+        for cluster, label in enumerate(niche_labels(top_terms))
+    ]
+    db.add_all(niches)
+    db.flush()
+
+    with span("niche_assign") as stage:
+        niche_ids = np.array([niche.id for niche in niches])
+        _write_assignments(db, np.array(product_ids), niche_ids[clusters])
+        stage.add_rows(len(product_ids))
+
+    # Only the active model is kept; its pickle is several MB
+    db.query(Niche).filter(Niche.model_id != model.id).delete(synchronize_session=False)
+    db.query(NicheModel).filter(NicheModel.id != model.id).delete(synchronize_session=False)
+    # Every product moved, so niche aggregates are rebuilt on their first read
+    db.query(ProductAggregate).filter(ProductAggregate.grouping == "niche").delete(synchronize_session=False)
+    db.commit()
+    model_id = model.id
+
+    # Products ingested during the fit were assigned with the old model, or not at all
+    orphans = assign_orphaned_products(db)
+    logger.info("Fitted %s niches over %s products in %.1fs", len(niches), len(product_ids), time.perf_counter() - started)
+    return {"products": len(product_ids), "niches": len(niches), "model_id": model_id, "reassigned": orphans}
+
+
+def active_pipeline(db: Session) -> Optional[Dict[str, Any]]:
+    """The newest fitted pipeline and its cluster -> niche id map, cached per process"""
+    model_id = db.query(func.max(NicheModel.id)).scalar()
+    if model_id is None:
+        return None
+    if _active.get("model_id") != model_id:
+        state = db.query(NicheModel.state).filter(NicheModel.id == model_id).scalar()
+        _active.update(
+            model_id=model_id,
+            pipeline=pickle.loads(state),  # written by fit_niches, never user supplied
+            niche_ids=dict(db.query(Niche.cluster, Niche.id).filter(Niche.model_id == model_id)),
+        )
+    return _active
+
+
+def assign_orphaned_products(db: Session) -> int:
+    """Assign products whose niche_id is unset or not a niche of the active model; commits per batch"""
+    active = active_pipeline(db)
+    if not active:
+        return 0
+    current = set(active["niche_ids"].values())
+    total = 0
+    last_id = 0
+    while True:
+        products = (
+            db.query(Product)
+            .filter(Product.id > last_id)
+            .filter((Product.niche_id == None) | Product.niche_id.notin_(current))
+            .order_by(Product.id)
+            .limit(ASSIGN_CHUNK_SIZE)
+            .all()
+        )
+        if not products:
+            break
+        for product in products:
+            if product.niche_id is not None:
+                set_committed_value(product, "niche_id", None)  # its niche is gone; no aggregate to move it out of
+        total += assign_niches(db, products)
+        db.commit()
+        last_id = products[-1].id
+        db.expunge_all()
+    if total:
+        logger.info("Assigned %s products missing from the active niche model", total)
+    return total
+
+
+def has_niches(db: Session) -> bool:
+    return db.query(Niche.id).first() is not None
+
+
+def assign_niches(db: Session, products: List[Product]) -> int:
+    """Assign new or changed products to the nearest existing niche, in the caller's transaction"""
+    products = [p for p in products if p.id is not None]
+    active = active_pipeline(db) if products else None
+    if not active:
+        return 0
+
+    with span("niche_assign") as stage:
+        clusters = active["pipeline"].predict([(p.title, p.tags, p.keywords) for p in products])
+        niche_ids = np.array([active["niche_ids"][int(cluster)] for cluster in clusters])
+        _write_assignments(db, np.array([p.id for p in products]), niche_ids)
+        changes = []
+        for product, niche_id in zip(products, niche_ids.tolist()):
+            before = product_state(product)
+            changes.append((before, {**before, "niche_id": niche_id}))
+            set_committed_value(product, "niche_id", niche_id)  # already written; no second UPDATE
+        update_aggregates(db, changes, groupings=["niche"])
+        stage.add_rows(len(products))
+    return len(products)
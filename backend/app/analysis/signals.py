@@ -0,0 +1,91 @@
+from typing import List, Dict, Any, Optional
+from datetime import datetime, date, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import Product, ProductSnapshot
+from app.config import get_settings
+import numpy as np
+
+settings = get_settings()
+
+YEAR_DAYS = 365
+
+
+def _as_date(value: Any) -> date:
+    # func.date() is a DATE on PostgreSQL and an ISO string on SQLite
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def niche_signals(db: Session, keys: List[Any], column=Product.category,
+                  now: Optional[datetime] = None) -> Dict[Any, Dict[str, Any]]:
+    """Review velocity, decayed demand, price trend and season for every key of a shard at once
+
+    Snapshots are summed per (key, day) in SQL; the windows and the decay then run
+    as matrix operations over a keys x days grid, so there is no per-product loop.
+    """
+    if not keys:
+        return {}
+    now = now or datetime.utcnow()
+    today = now.date()
+    window = settings.signal_window_days
+    horizon = YEAR_DAYS + window  # enough to see the same window one year ago
+
+    day = func.date(ProductSnapshot.captured_at)
+    rows = (
+        db.query(column, day, func.sum(ProductSnapshot.reviews_delta), func.sum(ProductSnapshot.price_delta))
+        .select_from(ProductSnapshot)
+        .join(Product, Product.id == ProductSnapshot.product_id)
+        .filter(column.in_(keys), ProductSnapshot.captured_at >= now - timedelta(days=horizon))
+        .group_by(column, day)
+        .all()
+    )
+    prices = dict(
+        db.query(column, func.sum(Product.price)).filter(column.in_(keys)).group_by(column).all()
+    )
+
+    index = {key: i for i, key in enumerate(keys)}
+    reviews = np.zeros((len(keys), horizon + 1))
+    price_deltas = np.zeros((len(keys), horizon + 1))
+    history = np.zeros(len(keys), dtype=int)
+    for key, captured, review_sum, price_sum in rows:
+        k, age = index[key], min(horizon, max(0, (today - _as_date(captured)).days))
+        reviews[k, age] += review_sum or 0
+        price_deltas[k, age] += price_sum or 0
+        history[k] = max(history[k], age + 1)
+
+    ages = np.arange(horizon + 1)
+    decayed = reviews @ np.power(0.5, ages / settings.signal_half_life_days)
+    recent = reviews[:, :window].sum(axis=1) / window
+    previous = reviews[:, window:2 * window].sum(axis=1) / window
+    year_ago = reviews[:, YEAR_DAYS - window // 2:YEAR_DAYS + window - window // 2].sum(axis=1) / window
+    yearly = reviews[:, :YEAR_DAYS].sum(axis=1) / YEAR_DAYS
+    growth = (recent - previous) / np.maximum(previous, 1.0 / window)
+
+    price_sums = np.array([prices.get(key) or 0 for key in keys], dtype=float)
+    price_change = np.divide(
+        price_deltas[:, :window].sum(axis=1), price_sums, out=np.zeros(len(keys)), where=price_sums > 0
+    )
+
+    season = np.select(
+        [
+            history < 2 * window,  # too little history to tell
+            (history >= YEAR_DAYS) & (year_ago > settings.signal_seasonal_ratio * np.maximum(yearly, 1e-9)),
+            growth >= settings.signal_trending_growth,
+            growth <= settings.signal_declining_growth,
+        ],
+        ["evergreen", "seasonal", "trending", "declining"],
+        default="evergreen",
+    )
+
+    return {
+        key: {
+            "review_velocity": round(float(recent[i]), 3),
+            "previous_review_velocity": round(float(previous[i]), 3),
+            "velocity_growth": round(float(growth[i]), 3),
+            "decayed_reviews": round(float(decayed[i]), 2),
+            "price_change_pct": round(float(price_change[i]) * 100, 2),
+            "history_days": int(history[i]),
+            "season_trend": str(season[i]),
+        }
+        for key, i in index.items()
+    }
@@ -0,0 +1,137 @@
+from typing import List, Dict, Any, Optional, Set, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, Query, aliased
+from app.models import Product, ProductTag
+from app.utils.logger import logger
+from app.utils.metrics import span
+import re
+
+MAX_TAG_LENGTH = 100
+
+_non_word = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_tag(value: Any) -> str:
+    """Lowercase a tag and collapse punctuation, so "T-Shirt" and "t shirt" index together"""
+    return " ".join(_non_word.sub(" ", str(value).lower()).split())[:MAX_TAG_LENGTH]
+
+
+def _values(value: Any) -> List[Any]:
+    if isinstance(value, (list, tuple, dict)):
+        return list(value)
+    return [value] if value else []
+
+
+def product_tag_set(product: Product) -> Set[str]:
+    """Normalized tags and keywords of a product"""
+    tags = {normalize_tag(value) for value in _values(product.tags) + _values(product.keywords)}
+    tags.discard("")
+    return tags
+
+
+def sync_product_tags(db: Session, products: List[Product]) -> int:
+    """Rewrite the product_tags rows of the given products in the caller's transaction; returns rows written"""
+    products = [p for p in products if p.id is not None]
+    if not products:
+        return 0
+
+    with span("tags") as stage:
+        ids = [p.id for p in products]
+        db.query(ProductTag).filter(ProductTag.product_id.in_(ids)).delete(synchronize_session=False)
+        rows = [{"tag": tag, "product_id": p.id} for p in products for tag in product_tag_set(p)]
+        if rows:
+            db.bulk_insert_mappings(ProductTag, rows)
+        stage.add_rows(len(rows))
+    return len(rows)
+
+
+def backfill_product_tags(db: Session, batch_size: int = 1000) -> Dict[str, int]:
+    """(Re)build the tag index for every product, walking ids in batches"""
+    totals = {"products": 0, "tags": 0}
+    last_id = 0
+    while True:
+        products = (
+            db.query(Product)
+            .filter(Product.id > last_id)
+            .order_by(Product.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not products:
+            break
+        totals["tags"] += sync_product_tags(db, products)
+        db.commit()
+        totals["products"] += len(products)
+        last_id = products[-1].id
+        db.expunge_all()
+        logger.info("Indexed tags of %s products", totals["products"])
+    return totals
+
+
+def filter_by_tags(query: Query, tags: List[str]) -> Query:
+    """Restrict a Product query to products carrying every one of the tags"""
+    tags = sorted({normalize_tag(tag) for tag in tags} - {""})
+    if not tags:
+        return query
+    matching = (
+        select(ProductTag.product_id)
+        .where(ProductTag.tag.in_(tags))
+        .group_by(ProductTag.product_id)
+        .having(func.count(ProductTag.tag) == len(tags))
+    )
+    return query.filter(Product.id.in_(matching))
+
+
+def _scope(query: Query, niche_id: Optional[int], category: Optional[str]) -> Query:
+    if niche_id is None and category is None:
+        return query
+    query = query.join(Product, Product.id == ProductTag.product_id)
+    if niche_id is not None:
+        query = query.filter(Product.niche_id == niche_id)
+    if category is not None:
+        query = query.filter(Product.category == category)
+    return query
+
+
+def tag_counts(db: Session, limit: int = 50, niche_id: Optional[int] = None,
+               category: Optional[str] = None) -> List[Tuple[str, int]]:
+    """Most used tags, optionally within one niche or category"""
+    count = func.count(ProductTag.product_id)
+    query = _scope(db.query(ProductTag.tag, count), niche_id, category)
+    return query.group_by(ProductTag.tag).order_by(count.desc(), ProductTag.tag).limit(limit).all()
+
+
+def cooccurring_tags(db: Session, tag: str, limit: int = 50, niche_id: Optional[int] = None,
+                     category: Optional[str] = None) -> List[Tuple[str, int]]:
+    """Tags appearing on the same products as `tag`, by number of shared products"""
+    other = aliased(ProductTag)
+    count = func.count(other.product_id)
+    query = (
+        db.query(other.tag, count)
+        .select_from(ProductTag)
+        .join(other, (other.product_id == ProductTag.product_id) & (other.tag != ProductTag.tag))
+        .filter(ProductTag.tag == normalize_tag(tag))
+    )
+    return _scope(query, niche_id, category).group_by(other.tag).order_by(count.desc(), other.tag).limit(limit).all()
+
+
+def top_tags_by(db: Session, keys: List[Any], column=Product.category, limit: int = 5) -> Dict[Any, List[str]]:
+    """Top `limit` tags of each category (or niche_id) in one windowed query"""
+    if not keys:
+        return {}
+    counts = (
+        db.query(column.label("key"), ProductTag.tag.label("tag"), func.count().label("uses"))
+        .select_from(ProductTag)
+        .join(Product, Product.id == ProductTag.product_id)
+        .filter(column.in_(keys))
+        .group_by(column, ProductTag.tag)
+        .subquery()
+    )
+    rank = func.row_number().over(partition_by=counts.c.key, order_by=(counts.c.uses.desc(), counts.c.tag))
+    ranked = db.query(counts.c.key, counts.c.tag, rank.label("rank")).subquery()
+    rows = db.query(ranked.c.key, ranked.c.tag).filter(ranked.c.rank <= limit).order_by(ranked.c.key, ranked.c.rank)
+
+    top: Dict[Any, List[str]] = {}
+    for key, tag in rows:
+        top.setdefault(key, []).append(tag)
+    return top
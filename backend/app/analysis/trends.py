@@ -1,15 +1,45 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 from sqlalchemy.orm import Session
-from app.models import Trend, Product
+from app.models import Trend, Product, Niche, ProductAggregate
+from app.config import get_settings
 from app.utils.logger import logger
+from app.utils.metrics import span
+from app.analysis.dedup import cluster_counts
+from app.analysis.niches import has_niches
+from app.analysis.tags import top_tags_by
+from app.analysis.signals import niche_signals
+from app.analysis.aggregates import ProductStats, load_aggregates, scoring_fingerprint, unchanged_keys, mark_scored
+from app.analysis.leaderboard import refresh_leaderboard
+from app.utils.events import publish_events, trend_event
 from datetime import datetime
 import math
 
+settings = get_settings()
 
-def calculate_trend_scores(products: List[Product]) -> Dict[str, float]:
-    """Calculate trend scores based on product metrics"""
+MIN_PRODUCTS_PER_TREND = 3
+
+
+def _has_history(signals: Optional[Dict[str, Any]]) -> bool:
+    return bool(signals) and signals["history_days"] >= settings.signal_window_days
+
+
+def _stats(products: Union[List[Product], ProductStats]) -> ProductStats:
+    return products if isinstance(products, ProductStats) else ProductStats.from_products(products)
+
+
+def calculate_trend_scores(products: Union[List[Product], ProductStats], distinct_listings: Optional[int] = None,
+                           signals: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """Calculate trend scores based on product metrics
+    
+    products may be the cached aggregate of a niche instead of its product list.
+    distinct_listings is the number of near-duplicate clusters; the same design
+    listed on several marketplaces only counts once towards competition.
+    signals come from niche_signals; without a full window of snapshot history
+    demand and growth fall back to the static review counts and ratings.
+    """
+    stats = _stats(products)
     
-    if not products:
+    if not stats.product_count:
         return {
             "demand_score": 0,
             "competition_score": 50,
@@ -18,18 +48,24 @@ def calculate_trend_scores(products: List[Product]) -> Dict[str, float]:
             "overall_score": 0
         }
     
-    total_reviews = sum(p.reviews_count for p in products)
-    avg_price = sum(p.price for p in products) / len(products) if products else 0
-    avg_rating = sum(p.rating for p in products if p.rating) / len([p for p in products if p.rating]) if any(p.rating for p in products) else 0
+    total_reviews = stats.total_reviews
+    avg_price = stats.avg_price
+    avg_rating = stats.avg_rating
     
-    # Demand: Based on review count and recency
-    demand_score = min(100, (total_reviews / 10) + (avg_rating * 5))
+    # Demand: Based on review count and recency (new reviews decayed by age)
+    if _has_history(signals):
+        demand_score = min(100, (signals["decayed_reviews"] / 2) + (avg_rating * 5))
+    else:
+        demand_score = min(100, (total_reviews / 10) + (avg_rating * 5))
     
     # Competition: More products = more competition
-    competition_score = min(100, len(products))
+    competition_score = min(100, distinct_listings if distinct_listings is not None else stats.product_count)
     
-    # Growth: Based on average rating and review velocity
-    growth_score = min(100, (avg_rating * 20) + 10)
+    # Growth: Based on review velocity against the previous window (50 = flat, 100 = doubled)
+    if _has_history(signals):
+        growth_score = min(100, max(0, 50 + 50 * signals["velocity_growth"]))
+    else:
+        growth_score = min(100, (avg_rating * 20) + 10)
     
     # Profitability: Based on price point and demand
     profitability_score = min(100, (avg_price / 50 * 50) + (avg_rating * 10))
@@ -51,22 +87,13 @@ def calculate_trend_scores(products: List[Product]) -> Dict[str, float]:
     }
 
 
-def infer_audience(products: List[Product]) -> Dict[str, Any]:
-    """Infer target audience from products"""
-    
-    categories = {}
-    price_points = []
-    
-    for product in products:
-        # Aggregate categories
-        if product.category:
-            categories[product.category] = categories.get(product.category, 0) + 1
-        price_points.append(product.price)
-    
-    avg_price = sum(price_points) / len(price_points) if price_points else 0
+def infer_audience(products: Union[List[Product], ProductStats]) -> Dict[str, Any]:
+    """Infer target audience from products (or their cached aggregate)"""
+    stats = _stats(products)
+    avg_price = stats.avg_price
     
     return {
-        "primary_categories": sorted(categories.items(), key=lambda x: x[1], reverse=True)[:3],
+        "primary_categories": [list(item) for item in stats.top_categories(3)],
         "price_sensitivity": "budget" if avg_price < 20 else "mid" if avg_price < 50 else "premium",
         "avg_price": round(avg_price, 2),
         "demographics": {
@@ -77,79 +104,274 @@ def infer_audience(products: List[Product]) -> Dict[str, Any]:
     }
 
 
+def get_trend_categories(db: Session) -> List[str]:
+    """Return categories with enough products to form a trend"""
+    from sqlalchemy import func
+
+    rows = (
+        db.query(Product.category)
+        .filter(Product.category != None)
+        .group_by(Product.category)
+        .having(func.count(Product.id) >= MIN_PRODUCTS_PER_TREND)
+        .order_by(Product.category)
+        .all()
+    )
+    return [category for (category,) in rows]
+
+
+def get_trend_niches(db: Session) -> List[int]:
+    """Return ids of discovered niches with enough products to form a trend"""
+    from sqlalchemy import func
+
+    rows = (
+        db.query(Product.niche_id)
+        .join(Niche, Niche.id == Product.niche_id)
+        .group_by(Product.niche_id)
+        .having(func.count(Product.id) >= MIN_PRODUCTS_PER_TREND)
+        .order_by(Product.niche_id)
+        .all()
+    )
+    return [niche_id for (niche_id,) in rows]
+
+
+def build_trend_data(category: str, products: Union[List[Product], ProductStats],
+                     distinct_listings: Optional[int] = None, niche: Optional[str] = None,
+                     top_tags: Optional[List[str]] = None, signals: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Compute the trend fields for one niche (no database writes)
+    
+    Without niche discovery the niche is the category itself.
+    """
+    niche = niche or category
+    stats = _stats(products)
+    distinct_listings = distinct_listings if distinct_listings is not None else stats.product_count
+    
+    # Calculate scores
+    scores = calculate_trend_scores(stats, distinct_listings, signals)
+    audience = infer_audience(stats)
+    if top_tags:
+        audience["demographics"]["interests"] = top_tags
+    
+    price_range = {
+        "min": stats.price_min or 0,
+        "max": stats.price_max or 0
+    }
+    avg_rating = stats.avg_rating
+    
+    insights = [
+        f"Found {stats.product_count} products ({distinct_listings} distinct designs) in this niche",
+        f"Average rating: {round(avg_rating, 2)}",
+        f"Price range: ${price_range['min']:.2f} - ${price_range['max']:.2f}"
+    ]
+    if top_tags:
+        insights.append(f"Top tags: {', '.join(top_tags)}")
+    if _has_history(signals):
+        insights.append(_velocity_insight(signals))
+    
+    return {
+        "niche": niche,
+        "category": category,
+        "demand_score": scores["demand_score"],
+        "competition_score": scores["competition_score"],
+        "growth_score": scores["growth_score"],
+        "profitability_score": scores["profitability_score"],
+        "overall_score": scores["overall_score"],
+        "marketplace_counts": dict(stats.marketplace_counts),
+        "avg_price": stats.avg_listed_price,
+        "price_range": price_range,
+        "total_reviews": stats.total_reviews,
+        "avg_rating": avg_rating,
+        "target_audience": audience,
+        "style_patterns": stats.style_patterns(),
+        "growth_indicators": signals,
+        "season_trend": signals["season_trend"] if signals else "evergreen",
+        "summary": f"{niche} products showing strong demand",
+        "insights": insights,
+    }
+
+
+def _velocity_insight(signals: Dict[str, Any]) -> str:
+    return (
+        f"Review velocity: {signals['review_velocity']:.1f}/day "
+        f"({signals['velocity_growth']:+.0%} vs previous {settings.signal_window_days} days), "
+        f"price {signals['price_change_pct']:+.1f}%"
+    )
+
+
+def _load_changed(db: Session, grouping: str, keys: List[Any], column=Product.category) -> Dict[str, Dict[Any, Any]]:
+    """Scoring inputs of the keys that need scoring: enough products and some input changed since last scored
+
+    Returns {"stats", "listings", "tags", "signals", "fingerprints"}, each keyed by group key.
+    """
+    with span("load") as stage:
+        stats = load_aggregates(db, grouping, keys)
+        stats = {key: s for key, s in stats.items() if s.product_count >= MIN_PRODUCTS_PER_TREND}
+        keys = [key for key in keys if key in stats]
+        listings = cluster_counts(db, keys, column)
+        tags = top_tags_by(db, keys, column)
+        signals = niche_signals(db, keys, column)
+        fingerprints = {
+            key: scoring_fingerprint(stats[key].content_hash, listings.get(key), tags.get(key), signals.get(key))
+            for key in keys
+        }
+        for key in unchanged_keys(db, grouping, keys, fingerprints):
+            del stats[key]
+        stage.add_rows(len(stats))
+    return {"stats": stats, "listings": listings, "tags": tags, "signals": signals, "fingerprints": fingerprints}
+
+
+def build_trends_for_categories(db: Session, categories: List[str]) -> List[Dict[str, Any]]:
+    """Build trend data for a shard of categories"""
+    trend_rows = []
+    inputs = _load_changed(db, "category", categories)
+    stats, listings, tags, signals = inputs["stats"], inputs["listings"], inputs["tags"], inputs["signals"]
+    categories = [category for category in categories if category in stats]
+    
+    for category in categories:
+        with span("score") as stage:
+            row = build_trend_data(category, stats[category], listings.get(category),
+                                   top_tags=tags.get(category), signals=signals.get(category))
+            row["_aggregate"] = ["category", category, inputs["fingerprints"][category]]
+            trend_rows.append(row)
+            stage.add_rows(1)
+    
+    return trend_rows
+
+
+def build_trends_for_niches(db: Session, niche_ids: List[int]) -> List[Dict[str, Any]]:
+    """Build trend data for a shard of discovered niches"""
+    trend_rows = []
+    niches = {niche.id: niche for niche in db.query(Niche).filter(Niche.id.in_(niche_ids))}
+    # Niches replaced by a refit since the run started are dropped
+    inputs = _load_changed(db, "niche", [niche_id for niche_id in niche_ids if niche_id in niches], Product.niche_id)
+    stats, listings, tags, signals = inputs["stats"], inputs["listings"], inputs["tags"], inputs["signals"]
+    niche_ids = [niche_id for niche_id in niche_ids if niche_id in stats]
+    
+    for niche_id in niche_ids:
+        niche, niche_stats = niches[niche_id], stats[niche_id]
+        with span("score") as stage:
+            category = niche_stats.top_categories(1)
+            row = build_trend_data(
+                category[0][0] if category else niche.label, niche_stats, listings.get(niche_id),
+                niche=niche.label, top_tags=tags.get(niche_id), signals=signals.get(niche_id),
+            )
+            row["_aggregate"] = ["niche", niche_id, inputs["fingerprints"][niche_id]]
+            trend_rows.append(row)
+            stage.add_rows(1)
+    
+    return trend_rows
+
+
+# How trends are grouped: name -> (list group keys, build trend rows for a shard of keys)
+GROUPINGS = {
+    "category": (get_trend_categories, build_trends_for_categories),
+    "niche": (get_trend_niches, build_trends_for_niches),
+}
+
+
+def trend_grouping(db: Session) -> str:
+    """Group by discovered niches once a niche model exists, otherwise by category"""
+    return "niche" if settings.niche_clustering_enabled and has_niches(db) else "category"
+
+
+def _upsert_statement(db: Session):
+    """Dialect-specific INSERT supporting ON CONFLICT, or None if unsupported"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(Trend)
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(Trend)
+    return None
+
+
+def save_trends(db: Session, trend_rows: List[Dict[str, Any]]) -> List[Trend]:
+    """Upsert built trend data keyed on the unique trend niche; a retired niche that is produced again comes back"""
+    if not trend_rows:
+        return []
+    
+    now = datetime.utcnow()
+    scored = [row["_aggregate"] for row in trend_rows if "_aggregate" in row]
+    rows = [
+        {**{key: value for key, value in row.items() if key != "_aggregate"},
+         "active": True, "next_analysis": now, "created_at": now, "updated_at": now}
+        for row in trend_rows
+    ]
+    niches = [row["niche"] for row in rows]
+    
+    with span("write") as stage:
+        _write_trends(db, rows, niches)
+        mark_scored(db, scored, now)
+        stage.add_rows(len(rows))
+    
+    db.commit()
+    trends = db.query(Trend).filter(Trend.niche.in_(niches)).all()
+    publish_events([trend_event(trend) for trend in trends])
+    return trends
+
+
+def _write_trends(db: Session, rows: List[Dict[str, Any]], niches: List[str]):
+    stmt = _upsert_statement(db)
+    if stmt is not None:
+        # One INSERT ... ON CONFLICT: concurrent writers can never create duplicate niches
+        update_columns = {key: stmt.excluded[key] for key in rows[0] if key not in ("niche", "created_at")}
+        db.execute(stmt.on_conflict_do_update(index_elements=["niche"], set_=update_columns), rows)
+    else:
+        existing = {
+            trend.niche: trend
+            for trend in db.query(Trend).filter(Trend.niche.in_(niches))
+        }
+        for row in rows:
+            trend = existing.get(row["niche"])
+            if trend:
+                row.pop("created_at")
+                for key, value in row.items():
+                    setattr(trend, key, value)
+            else:
+                db.add(Trend(**row))
+
+
+def current_trend_niches(db: Session, grouping: str) -> List[str]:
+    """Niche names of every trend the grouping currently produces"""
+    list_groups, _ = GROUPINGS[grouping]
+    keys = list_groups(db)
+    if grouping == "niche":
+        return [label for (label,) in db.query(Niche.label).filter(Niche.id.in_(keys))] if keys else []
+    return keys
+
+
+def retire_trends(db: Session, grouping: str) -> int:
+    """Deactivate analysis trends the grouping no longer produces; returns how many
+    
+    These are niches that vanished in a refit, category trends from before the
+    first niche fit, and groups that fell below MIN_PRODUCTS_PER_TREND. Rows are
+    kept because designs and products reference them.
+    """
+    niches = current_trend_niches(db, grouping)
+    query = db.query(Trend).filter(Trend.active.isnot(False), Trend.manual.isnot(True))
+    if niches:
+        query = query.filter(Trend.niche.notin_(niches))
+    retired = query.update({Trend.active: False, Trend.updated_at: datetime.utcnow()}, synchronize_session=False)
+    # Should the grouping switch back, its unchanged groups must be rescored to come back
+    db.query(ProductAggregate).filter(
+        ProductAggregate.grouping != grouping, ProductAggregate.scored_hash != None
+    ).update({ProductAggregate.scored_hash: None}, synchronize_session=False)
+    db.commit()
+    if retired:
+        logger.info("Retired %s trends no longer produced by %s grouping", retired, grouping)
+    return retired
+
+
 def analyze_trends(db: Session) -> List[Trend]:
     """Analyze products and create/update trends"""
     logger.info("Starting trend analysis")
     
-    # Group products by niche (category + common keywords)
-    from sqlalchemy import func
+    # Group products by discovered niche (title/tag keyword clusters), or by category before the first fit
+    grouping = trend_grouping(db)
+    list_groups, build_trends = GROUPINGS[grouping]
+    trends_created = save_trends(db, build_trends(db, list_groups(db)))
+    retire_trends(db, grouping)
+    refresh_leaderboard(db)
     
-    categories = db.query(Product.category).distinct().filter(Product.category != None).all()
-    trends_created = []
-    
-    for (category,) in categories:
-        products = db.query(Product).filter(Product.category == category).all()
-        
-        if len(products) < 3:  # Need minimum products to form a trend
-            continue
-        
-        # Calculate scores
-        scores = calculate_trend_scores(products)
-        audience = infer_audience(products)
-        
-        # Get marketplace distribution
-        marketplace_counts = {}
-        for product in products:
-            marketplace_counts[product.marketplace] = marketplace_counts.get(product.marketplace, 0) + 1
-        
-        # Calculate price range
-        prices = [p.price for p in products if p.price]
-        price_range = {
-            "min": min(prices) if prices else 0,
-            "max": max(prices) if prices else 0
-        }
-        
-        # Create or update trend
-        existing_trend = db.query(Trend).filter(
-            Trend.category == category
-        ).first()
-        
-        trend_data = {
-            "niche": category,
-            "category": category,
-            "demand_score": scores["demand_score"],
-            "competition_score": scores["competition_score"],
-            "growth_score": scores["growth_score"],
-            "profitability_score": scores["profitability_score"],
-            "overall_score": scores["overall_score"],
-            "marketplace_counts": marketplace_counts,
-            "avg_price": sum(prices) / len(prices) if prices else 0,
-            "price_range": price_range,
-            "total_reviews": sum(p.reviews_count for p in products),
-            "avg_rating": sum(p.rating for p in products if p.rating) / len([p for p in products if p.rating]) if any(p.rating for p in products) else 0,
-            "target_audience": audience,
-            "style_patterns": [{"category": p.category, "price": p.price} for p in products[:5]],
-            "season_trend": "evergreen",
-            "summary": f"{category} products showing strong demand",
-            "insights": [
-                f"Found {len(products)} products in this niche",
-                f"Average rating: {round(sum(p.rating for p in products if p.rating) / len([p for p in products if p.rating]) if any(p.rating for p in products) else 0, 2)}",
-                f"Price range: ${price_range['min']:.2f} - ${price_range['max']:.2f}"
-            ],
-            "next_analysis": datetime.utcnow()
-        }
-        
-        if existing_trend:
-            for key, value in trend_data.items():
-                setattr(existing_trend, key, value)
-            db.commit()
-            trends_created.append(existing_trend)
-        else:
-            trend = Trend(**trend_data)
-            db.add(trend)
-            db.commit()
-            db.refresh(trend)
-            trends_created.append(trend)
-    
-    logger.info(f"Created/updated {len(trends_created)} trends")
+    logger.info("Created/updated %s trends", len(trends_created))
     return trends_created
@@ -1,8 +1,10 @@
 from fastapi import APIRouter
-from app.api import trends, products, designs
+from app.api import trends, products, designs, tags, events
 
 api_router = APIRouter(prefix="/api/v1")
 
 api_router.include_router(trends.router, prefix="/trends", tags=["trends"])
 api_router.include_router(products.router, prefix="/products", tags=["products"])
 api_router.include_router(designs.router, prefix="/designs", tags=["designs"])
+api_router.include_router(tags.router, prefix="/tags", tags=["tags"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
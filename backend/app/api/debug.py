@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.config import get_settings
+from app.utils.perf import perf_stats
+
+settings = get_settings()
+
+router = APIRouter()
+
+
+def _require_enabled():
+    if not settings.perf_debug_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/perf")
+def perf_summary(limit: int = Query(10, ge=1, le=100)):
+    """Hottest routes and queries seen by this API process"""
+    _require_enabled()
+    return perf_stats.summary(limit)
+
+
+@router.get("/perf/profiles/{profile_id}", response_class=PlainTextResponse)
+def perf_profile(profile_id: int):
+    """Text report of a captured request profile"""
+    _require_enabled()
+    profile = perf_stats.get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile["report"]
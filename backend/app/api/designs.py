@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
 from app.database import get_db
-from app.models import Design
+from app.models import Design, PublishJob
 from app.schemas.design import DesignResponse, DesignCreate
+from app.schemas.publish_job import PublishJobResponse
+from app.integrations.publisher import enqueue_publish_jobs, requeue_failed_jobs
+from app.utils.events import publish_events, design_event
 from typing import List
 
 router = APIRouter()
@@ -46,3 +50,32 @@ def create_design(design_data: DesignCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(design)
     return design
+
+
+@router.post("/{design_id}/publish", response_model=List[PublishJobResponse])
+def publish_design(design_id: int, db: Session = Depends(get_db)):
+    """Mark a design ready and queue it for publishing to the stores; failed jobs are retried"""
+    design = db.query(Design).filter(Design.id == design_id).first()
+    if not design:
+        raise HTTPException(status_code=404, detail="Design not found")
+
+    changed = design.status == "draft"
+    if changed:
+        design.status = "ready"
+    enqueue_publish_jobs(db, design)
+    requeue_failed_jobs(design)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request queued the same jobs first; its jobs are the answer
+        db.rollback()
+        changed = False
+    if changed:
+        publish_events([design_event(design, "status")])
+    return db.query(PublishJob).filter(PublishJob.design_id == design_id).all()
+
+
+@router.get("/{design_id}/publish-jobs", response_model=List[PublishJobResponse])
+def list_publish_jobs(design_id: int, db: Session = Depends(get_db)):
+    """List publish jobs for a design"""
+    return db.query(PublishJob).filter(PublishJob.design_id == design_id).all()
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.config import get_settings
+from app.utils.events import EventFilter, broker
+import json
+
+router = APIRouter()
+
+settings = get_settings()
+
+
+def _event_filter(topics: str, trend_id: int, category: str, design_status: str) -> EventFilter:
+    return EventFilter(
+        topics=[topic.strip() for topic in topics.split(",") if topic.strip()] if topics else None,
+        trend_id=trend_id,
+        category=category,
+        design_status=design_status,
+    )
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    topics: str = Query(None, description="Comma separated: trend,design"),
+    trend_id: int = Query(None),
+    category: str = Query(None),
+    design_status: str = Query(None),
+):
+    """Server-sent events for trend and design changes, coalesced per object"""
+    subscription = broker.subscribe(_event_filter(topics, trend_id, category, design_status))
+
+    async def body():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(settings.events_heartbeat_seconds)
+                if batch is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                for event in batch:
+                    yield f"event: {event['topic']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def events_socket(
+    websocket: WebSocket,
+    topics: str = Query(None),
+    trend_id: int = Query(None),
+    category: str = Query(None),
+    design_status: str = Query(None),
+):
+    """WebSocket variant of /stream; each message is a JSON list of coalesced events"""
+    await websocket.accept()
+    subscription = broker.subscribe(_event_filter(topics, trend_id, category, design_status))
+    try:
+        while True:
+            batch = await subscription.next_batch(settings.events_heartbeat_seconds)
+            await websocket.send_json(batch if batch is not None else [{"topic": "heartbeat"}])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broker.unsubscribe(subscription)
@@ -3,7 +3,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from app.database import get_db
 from app.models import Product
-from app.schemas.product import ProductResponse, ProductCreate
+from app.schemas.product import ProductResponse, ProductDetail, ProductCreate
+from app.analysis.tags import filter_by_tags, sync_product_tags
+from app.analysis.aggregates import product_state, update_aggregates
 from typing import List
 
 router = APIRouter()
@@ -16,6 +18,7 @@ def list_products(
     marketplace: str = Query(None),
     category: str = Query(None),
     min_rating: float = Query(0, ge=0, le=5),
+    tag: List[str] = Query(None),
     db: Session = Depends(get_db),
 ):
     """List products with optional filters"""
@@ -27,12 +30,14 @@ def list_products(
         query = query.filter(Product.category.ilike(f"%{category}%"))
     if min_rating:
         query = query.filter(Product.rating >= min_rating)
+    if tag:
+        query = filter_by_tags(query, tag)
     
     products = query.order_by(desc(Product.created_at)).offset(skip).limit(limit).all()
     return products
 
 
-@router.get("/{product_id}", response_model=ProductResponse)
+@router.get("/{product_id}", response_model=ProductDetail)
 def get_product(product_id: int, db: Session = Depends(get_db)):
     """Get a specific product by ID"""
     product = db.query(Product).filter(Product.id == product_id).first()
@@ -41,11 +46,14 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
     return product
 
 
-@router.post("", response_model=ProductResponse)
+@router.post("", response_model=ProductDetail)
 def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
     """Create a new product record"""
     product = Product(**product_data.dict())
     db.add(product)
+    db.flush()
+    update_aggregates(db, [(None, product_state(product))])
+    sync_product_tags(db, [product])
     db.commit()
     db.refresh(product)
     return product
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import desc
+from app.database import get_db
+from app.models import Product
+from app.schemas.product import ProductResponse
+from app.schemas.tag import TagCount
+from app.analysis.tags import tag_counts, cooccurring_tags, filter_by_tags
+from typing import List
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[TagCount])
+def list_tags(
+    limit: int = Query(50, ge=1, le=500),
+    niche_id: int = Query(None),
+    category: str = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Most used tags, optionally within a niche or category"""
+    return [{"tag": tag, "count": count} for tag, count in tag_counts(db, limit, niche_id, category)]
+
+
+@router.get("/{tag}/products", response_model=List[ProductResponse])
+def list_tag_products(
+    tag: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    marketplace: str = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Products carrying a tag across marketplaces"""
+    query = filter_by_tags(db.query(Product), [tag])
+    if marketplace:
+        query = query.filter(Product.marketplace == marketplace)
+    return query.order_by(desc(Product.created_at)).offset(skip).limit(limit).all()
+
+
+@router.get("/{tag}/cooccurring", response_model=List[TagCount])
+def list_cooccurring_tags(
+    tag: str,
+    limit: int = Query(50, ge=1, le=500),
+    niche_id: int = Query(None),
+    category: str = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Tags most often found on the same products as the given tag"""
+    rows = cooccurring_tags(db, tag, limit, niche_id, category)
+    return [{"tag": other, "count": count} for other, count in rows]
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
 from app.database import get_db
 from app.models import Trend
 from app.schemas.trend import TrendResponse, TrendCreate
+from app.analysis.leaderboard import leaderboard
 from typing import List
 
 router = APIRouter()
@@ -18,8 +20,8 @@ def list_trends(
     min_score: float = Query(0, ge=0, le=100),
     db: Session = Depends(get_db),
 ):
-    """List all trends with optional filters"""
-    query = db.query(Trend)
+    """List active trends with optional filters"""
+    query = db.query(Trend).filter(Trend.active.isnot(False))
     
     if niche:
         query = query.filter(Trend.niche.ilike(f"%{niche}%"))
@@ -32,6 +34,18 @@ def list_trends(
     return trends
 
 
+@router.get("/top", response_model=List[TrendResponse])
+def top_trends(
+    limit: int = Query(10, ge=1, le=100),
+    category: str = Query(None),
+    marketplace: str = Query(None),
+    min_score: float = Query(0, ge=0, le=100),
+    db: Session = Depends(get_db),
+):
+    """Highest scoring trends from the leaderboard materialized by the last analysis run"""
+    return leaderboard.top(db, limit, category=category, marketplace=marketplace, min_score=min_score)
+
+
 @router.get("/{trend_id}", response_model=TrendResponse)
 def get_trend(trend_id: int, db: Session = Depends(get_db)):
     """Get a specific trend by ID"""
@@ -44,8 +58,21 @@ def get_trend(trend_id: int, db: Session = Depends(get_db)):
 @router.post("", response_model=TrendResponse)
 def create_trend(trend_data: TrendCreate, db: Session = Depends(get_db)):
     """Create a new trend"""
-    trend = Trend(**trend_data.dict())
+    trend = Trend(**trend_data.dict(), manual=True)
     db.add(trend)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A trend for this niche already exists")
     db.refresh(trend)
     return trend
+
+
+@router.post("/analyze")
+def trigger_analysis():
+    """Queue a trend analysis run; duplicate triggers coalesce into one run"""
+    from app.tasks.analysis_tasks import analyze_trends_task
+    from app.utils.locks import enqueue_unique
+    queued = enqueue_unique(analyze_trends_task)
+    return {"status": "queued" if queued else "already_queued"}
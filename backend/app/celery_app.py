@@ -1,12 +1,35 @@
+from typing import List
 from celery import Celery
+from kombu import Exchange, Queue
+import importlib
 from app.config import get_settings
+from app.utils.metrics import setup_celery_instrumentation
 
 settings = get_settings()
 
+# Task module -> queue. Each worker role (app.workers.*) imports only the modules of its
+# queues, so a scraper process starts without numpy, scikit-learn or the AI SDKs. Ingestion
+# still loads numpy (dedup) and, once niches are fitted, scikit-learn (the pickled pipeline)
+# on the first scrape that touches products.
+TASK_QUEUES = {
+    "app.tasks.scraping_tasks": "scraping",
+    "app.tasks.publishing_tasks": "scraping",
+    "app.tasks.analysis_tasks": "analysis",
+    "app.tasks.design_tasks": "ai",
+}
+DEFAULT_QUEUE = "celery"  # unrouted tasks, e.g. celery.chord_unlock; consumed by the scraper role
+QUEUES = [DEFAULT_QUEUE] + sorted(set(TASK_QUEUES.values()))
+
+
+def _queues(names: List[str]) -> List[Queue]:
+    return [Queue(name, Exchange(name), routing_key=name) for name in names]
+
+
 celery_app = Celery(
     "pod_trends",
     broker=settings.celery_broker_url,
     backend=settings.celery_result_backend,
+    include=list(TASK_QUEUES),
 )
 
 celery_app.conf.update(
@@ -17,7 +40,42 @@ celery_app.conf.update(
     enable_utc=True,
     task_track_started=True,
     task_time_limit=30 * 60,  # 30 minutes
+    worker_prefetch_multiplier=1,  # spread scrape/analysis chunks across workers
+    task_queues=_queues(QUEUES),  # a worker without -Q consumes every queue
+    task_routes={f"{module}.*": {"queue": queue} for module, queue in TASK_QUEUES.items()},
+    beat_schedule={
+        "dispatch-due-scrapes": {
+            "task": "app.tasks.scraping_tasks.dispatch_due_scrapes",
+            "schedule": 60.0,
+        },
+        "analyze-trends": {
+            "task": "app.tasks.analysis_tasks.analyze_trends_task",
+            "schedule": settings.analysis_interval_minutes * 60.0,
+        },
+        "fit-niches": {
+            "task": "app.tasks.analysis_tasks.fit_niches_task",
+            "schedule": settings.niche_refit_hours * 3600.0,
+        },
+        "publish-designs": {
+            "task": "app.tasks.publishing_tasks.publish_designs_task",
+            "schedule": 60.0,
+        },
+        "archive-stale-products": {
+            "task": "app.tasks.scraping_tasks.archive_stale_products_task",
+            "schedule": 24 * 3600.0,
+        },
+    },
 )
 
-# Auto-discover tasks
-celery_app.autodiscover_tasks(["app.tasks"])
+setup_celery_instrumentation()
+
+
+def configure_worker(queues: List[str]) -> Celery:
+    """Restrict this process to the given queues and import only their task modules"""
+    modules = [module for module, queue in TASK_QUEUES.items() if queue in queues]
+    celery_app.conf.include = modules
+    celery_app.conf.task_queues = _queues(queues)
+    # Imported here, before the pool forks, so children share the loaded modules
+    for module in modules:
+        importlib.import_module(module)
+    return celery_app
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Dict
 
 
 class Settings(BaseSettings):
@@ -28,8 +29,112 @@ class Settings(BaseSettings):
     celery_broker_url: str = "redis://localhost:6379/0"
     celery_result_backend: str = "redis://localhost:6379/0"
     
+    # Scraping
+    scrape_categories: List[str] = ["print-on-demand"]
+    scrape_max_pages: int = 5
+    scrape_pages_per_chunk: int = 1
+    scrape_marketplaces: List[str] = ["amazon", "etsy", "shopify"]
+    scrape_default_interval_minutes: int = 6 * 60
+    scrape_min_interval_minutes: int = 60
+    scrape_max_interval_minutes: int = 48 * 60
+    scrape_target_change_rate: float = 0.2  # share of products expected to change between scrapes
+    scrape_change_rate_smoothing: float = 0.3
+    scrape_jitter_fraction: float = 0.1
+    scrape_dispatch_jitter_seconds: int = 120
+    scrape_backoff_base_minutes: int = 15
+    scrape_backoff_max_minutes: int = 24 * 60
+    scrape_user_agent: str = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+    scrape_request_timeout_seconds: float = 20
+
+    # Rendered fetches (headless Chromium) for listings that render client-side
+    browser_pool_size: int = 4  # contexts per worker process = pages rendered at once
+    browser_context_max_pages: int = 50  # a context is recycled after this many pages
+    browser_navigation_timeout_seconds: float = 30
+    browser_blocked_resource_types: List[str] = ["image", "media", "font"]
+    browser_blocked_hosts: List[str] = [
+        "google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net",
+        "hotjar.com", "segment.io", "bat.bing.com", "clarity.ms",
+    ]
+
+    # HTML parsing of fetched listing pages
+    parse_backend: str = "auto"  # auto, selectolax, lxml or html.parser
+    parse_workers: int = 0  # processes in the parse pool; 0 = one per core, 1 = parse in the worker itself
+    parse_batch_pages: int = 4  # pages sent to a parse process at a time
+
+    # Raw scrape payloads (Product.raw_data), kept out of the products table
+    blob_store_backend: str = "local"  # local or s3
+    blob_store_path: str = "./data/blobs"
+    blob_store_bucket: str = ""
+    blob_store_prefix: str = "raw/"
+    blob_store_endpoint_url: str = ""  # S3-compatible stores such as MinIO; empty for AWS
+    blob_compression_level: int = 3  # zstd level
+    product_archive_after_days: int = 90  # products not scraped for this long move to products_archive
+    product_archive_batch_size: int = 1000
+
+    # Analysis
+    analysis_shard_size: int = 20
+    analysis_interval_minutes: int = 60
+    analysis_lock_ttl_seconds: int = 10 * 60
+    signal_window_days: int = 14  # review velocity is compared across consecutive windows
+    signal_half_life_days: float = 14  # decay of new reviews in the demand score
+    signal_trending_growth: float = 0.5  # velocity growth above which a niche is trending
+    signal_declining_growth: float = -0.3
+    signal_seasonal_ratio: float = 2.0  # year-ago velocity vs yearly average for seasonal niches
+    leaderboard_size: int = 100  # top-K kept per scope
+    leaderboard_reload_seconds: float = 10  # how often API processes check for a newer leaderboard
+    trend_rescore_hours: float = 24  # unchanged niches are still rescored this often; 0 rescores every run
+
+    # Live updates
+    events_enabled: bool = True
+    events_coalesce_ms: int = 500  # bursts within this window reach clients as one batch
+    events_heartbeat_seconds: float = 15
+    events_max_pending: int = 1000  # per client; beyond this the client is told to resync
+
+    # Logging
+    log_level: str = ""  # empty: DEBUG when debug is on, INFO otherwise
+    log_format: str = "json"  # json (one object per line) or text
+    log_queue_size: int = 10000  # records waiting for the writer thread; DEBUG/INFO beyond this are dropped
+    log_sample_rates: Dict[str, float] = {}  # logger -> share of DEBUG/INFO records kept, e.g. {"pod_trends.scrapers": 0.1}
+
+    # Observability
+    metrics_enabled: bool = True
+    metrics_port: int = 0  # Prometheus exporter port for Celery workers, 0 disables it
+    prometheus_multiproc_dir: str = ""  # required for prefork workers; one directory per worker, wiped at start
+    otel_exporter_endpoint: str = ""  # e.g. http://localhost:4317
+
+    # Performance
+    sql_echo: bool = False
+    sql_slow_query_ms: float = 200
+    perf_n_plus_one_threshold: int = 10  # identical statements per request before flagging N+1
+    perf_profile_sample_rate: float = 0.0  # share of requests profiled automatically
+    perf_profile_header: str = "X-Profile"
+    perf_debug_enabled: bool = False  # enables /debug/perf and header-triggered profiles
+
+    # Deduplication (MinHash/LSH near-duplicate listings)
+    dedup_enabled: bool = True
+    dedup_num_perm: int = 64
+    dedup_bands: int = 16  # 16 bands x 4 rows: candidates from ~0.5 estimated Jaccard
+    dedup_similarity_threshold: float = 0.6  # estimated Jaccard over title/tag word shingles
+    dedup_image_hashing: bool = False  # download images and compare perceptual hashes
+    dedup_image_max_distance: int = 4  # max differing dHash bits for the same image
+
+    # Niche discovery
+    niche_clustering_enabled: bool = True
+    niche_max_features: int = 20000  # TF-IDF vocabulary size
+    niche_min_df: int = 3
+    niche_components: int = 64  # SVD dimensions k-means runs on
+    niche_max_clusters: int = 500
+    niche_batch_size: int = 4096
+    niche_refit_hours: int = 24
+
     # Image Generation
     stable_diffusion_api_key: str = ""
+
+    # Publishing
+    publish_targets: List[str] = ["printful", "shopify"]
+    publish_batch_size: int = 20
+    publish_max_attempts: int = 5
+    publish_lease_seconds: int = 10 * 60
     
     class Config:
         env_file = ".env"
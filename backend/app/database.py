@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.pool import NullPool
 from app.config import get_settings
+from app.utils.metrics import instrument_engine
 
 settings = get_settings()
 
@@ -9,8 +10,9 @@ settings = get_settings()
 engine = create_engine(
     settings.database_url,
     poolclass=NullPool if settings.environment == "development" else None,
-    echo=settings.debug
+    echo=settings.sql_echo
 )
+instrument_engine(engine)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -15,7 +15,7 @@ class PrintfulClient:
     
     def create_product(self, design_id: int, title: str, description: str) -> Optional[dict]:
         """Create a product in Printful"""
-        self.logger.info(f"Creating Printful product: {title}")
+        self.logger.info("Creating Printful product: %s", title)
         
         if not self.api_key:
             self.logger.warning("Printful API key not configured")
@@ -40,10 +40,11 @@ class PrintfulClient:
                 }
             }
             
-            self.logger.info(f"Product created in Printful: {product_data}")
+            self.logger.info("Product created in Printful: %s (%s variants)",
+                             product_data["external_id"], len(product_data["sync_product"]["variants"]))
             return product_data
         except Exception as e:
-            self.logger.error(f"Error creating Printful product: {str(e)}")
+            self.logger.error("Error creating Printful product: %s", e)
             return None
 
 
@@ -59,7 +60,7 @@ class ShopifyClient:
     def create_draft_product(self, title: str, description: str, image_url: str, 
                             price: float) -> Optional[dict]:
         """Create a draft product in Shopify"""
-        self.logger.info(f"Creating Shopify draft product: {title}")
+        self.logger.info("Creating Shopify draft product: %s", title)
         
         if not self.access_token:
             self.logger.warning("Shopify access token not configured")
@@ -87,8 +88,9 @@ class ShopifyClient:
                 }
             }
             
-            self.logger.info(f"Draft product created in Shopify: {product_data}")
+            self.logger.info("Draft product created in Shopify: %s (%s variants)",
+                             title, len(product_data["product"]["variants"]))
             return product_data
         except Exception as e:
-            self.logger.error(f"Error creating Shopify draft product: {str(e)}")
+            self.logger.error("Error creating Shopify draft product: %s", e)
             return None
@@ -0,0 +1,195 @@
+from typing import List, Dict, Any, Optional, Callable
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+from app.models import Design, PublishJob
+from app.integrations.printful_shopify import PrintfulClient, ShopifyClient
+from app.config import get_settings
+from app.utils.logger import logger
+from app.utils.metrics import span
+from app.utils.events import publish_events, design_event
+
+settings = get_settings()
+
+DEFAULT_RETAIL_PRICE = 24.99
+
+
+class PublishError(Exception):
+    """Raised when an external store rejects or cannot receive a design"""
+
+
+def enqueue_publish_jobs(db: Session, design: Design) -> List[PublishJob]:
+    """Add missing outbox rows for a design; the caller owns the transaction"""
+    existing = {job.target for job in design.publish_jobs}
+    jobs = []
+
+    for target in settings.publish_targets:
+        if target in existing:
+            continue
+        job = PublishJob(design_id=design.id, target=target, status="pending")
+        db.add(job)
+        jobs.append(job)
+
+    return jobs
+
+
+def enqueue_ready_designs(db: Session, batch_size: Optional[int] = None) -> int:
+    """Create outbox rows for ready designs that do not have any yet"""
+    batch_size = batch_size or settings.publish_batch_size
+
+    # SKIP LOCKED lets parallel publishers sweep disjoint batches
+    designs = (
+        db.query(Design)
+        .filter(Design.status == "ready", ~Design.publish_jobs.any())
+        .order_by(Design.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True, of=Design)
+        .all()
+    )
+
+    count = 0
+    for design in designs:
+        count += len(enqueue_publish_jobs(db, design))
+    db.commit()
+
+    return count
+
+
+def requeue_failed_jobs(design: Design) -> List[PublishJob]:
+    """Give a design's failed jobs a fresh set of attempts; the caller owns the transaction"""
+    jobs = [job for job in design.publish_jobs if job.status == "failed"]
+    for job in jobs:
+        # external_id is kept: a store that already accepted the design is not called again
+        job.status = "pending"
+        job.attempts = 0
+        job.locked_at = None
+    return jobs
+
+
+def fail_abandoned_jobs(db: Session, stale_before: datetime) -> int:
+    """Fail jobs whose worker died during their last attempt; claim_jobs would never pick them up again"""
+    return (
+        db.query(PublishJob)
+        .filter(
+            PublishJob.status == "in_progress",
+            PublishJob.locked_at < stale_before,
+            PublishJob.attempts >= settings.publish_max_attempts,
+        )
+        .update(
+            {PublishJob.status: "failed", PublishJob.locked_at: None,
+             PublishJob.last_error: "Lease expired during the last attempt"},
+            synchronize_session=False,
+        )
+    )
+
+
+def claim_jobs(db: Session, batch_size: Optional[int] = None) -> List[int]:
+    """Lease a batch of pending (or abandoned) jobs for this worker"""
+    batch_size = batch_size or settings.publish_batch_size
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=settings.publish_lease_seconds)
+
+    failed = fail_abandoned_jobs(db, stale_before)
+    if failed:
+        logger.warning("Failed %s publish jobs abandoned during their last attempt", failed)
+
+    jobs = (
+        db.query(PublishJob)
+        .filter(
+            or_(
+                PublishJob.status == "pending",
+                and_(PublishJob.status == "in_progress", PublishJob.locked_at < stale_before),
+            ),
+            PublishJob.attempts < settings.publish_max_attempts,
+        )
+        .order_by(PublishJob.created_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    for job in jobs:
+        job.status = "in_progress"
+        job.locked_at = now
+        job.attempts = (job.attempts or 0) + 1
+    db.commit()
+
+    return [job.id for job in jobs]
+
+
+def _publish_to_printful(design: Design) -> str:
+    result = PrintfulClient().create_product(design.id, design.title, design.description)
+    if not result:
+        raise PublishError("Printful did not accept the product")
+    return str(result.get("id") or result["external_id"])
+
+
+def _publish_to_shopify(design: Design) -> str:
+    price = design.trend.avg_price if design.trend and design.trend.avg_price else DEFAULT_RETAIL_PRICE
+    result = ShopifyClient().create_draft_product(design.title, design.description, design.image_url, round(price, 2))
+    if not result:
+        raise PublishError("Shopify did not accept the draft product")
+    product = result.get("product", result)
+    return str(product.get("id") or product["variants"][0]["sku"])
+
+
+PUBLISHERS: Dict[str, Callable[[Design], str]] = {
+    "printful": _publish_to_printful,
+    "shopify": _publish_to_shopify,
+}
+
+
+def process_job(db: Session, job_id: int) -> str:
+    """Publish one claimed job and return its resulting status"""
+    job = db.query(PublishJob).filter(PublishJob.id == job_id).first()
+    if not job or job.status != "in_progress":
+        return job.status if job else "missing"
+
+    design = job.design
+    try:
+        # A previous attempt already reached the store; only bookkeeping is left
+        if not job.external_id:
+            publisher = PUBLISHERS.get(job.target)
+            if not publisher:
+                raise PublishError(f"Unknown publish target: {job.target}")
+            with span(f"publish_{job.target}") as stage:
+                job.external_id = publisher(design)
+                stage.add_rows(1)
+            db.commit()
+
+        if job.target == "printful":
+            design.printful_template_id = job.external_id
+        job.status = "succeeded"
+        job.last_error = None
+        job.locked_at = None
+        job.completed_at = datetime.utcnow()
+
+        published = all(j.status == "succeeded" for j in design.publish_jobs)
+        if published:
+            design.status = "published"
+        db.commit()
+        if published:
+            publish_events([design_event(design, "status")])
+    except Exception as e:
+        db.rollback()
+        logger.error("Error publishing design %s to %s: %s", job.design_id, job.target, e)
+        job.last_error = str(e)[:1000]
+        job.locked_at = None
+        job.status = "failed" if job.attempts >= settings.publish_max_attempts else "pending"
+        db.commit()
+
+    return job.status
+
+
+def publish_batch(db: Session, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """Sweep ready designs into the outbox and work through one claimed batch"""
+    enqueued = enqueue_ready_designs(db, batch_size)
+    job_ids = claim_jobs(db, batch_size)
+
+    results = {"enqueued": enqueued, "claimed": len(job_ids), "succeeded": 0, "pending": 0, "failed": 0}
+    for job_id in job_ids:
+        status = process_job(db, job_id)
+        if status in results:
+            results[status] += 1
+
+    return results
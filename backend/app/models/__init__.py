@@ -2,5 +2,17 @@ from app.models.product import Product
 from app.models.trend import Trend
 from app.models.design import Design
 from app.models.marketplace import Marketplace
+from app.models.publish_job import PublishJob
+from app.models.product_signature import ProductSignature, ProductLshBucket
+from app.models.niche import Niche, NicheModel
+from app.models.product_tag import ProductTag
+from app.models.product_snapshot import ProductSnapshot
+from app.models.leaderboard import TrendLeaderboardEntry
+from app.models.product_aggregate import ProductAggregate
+from app.models.product_archive import ArchivedProduct
 
-__all__ = ["Product", "Trend", "Design", "Marketplace"]
+__all__ = [
+    "Product", "Trend", "Design", "Marketplace", "PublishJob",
+    "ProductSignature", "ProductLshBucket", "Niche", "NicheModel", "ProductTag",
+    "ProductSnapshot", "TrendLeaderboardEntry", "ProductAggregate", "ArchivedProduct",
+]
@@ -34,3 +34,4 @@ class Design(Base):
     
     # Relationships
     trend = relationship("Trend", back_populates="designs")
+    publish_jobs = relationship("PublishJob", back_populates="design")
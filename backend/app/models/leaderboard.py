@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class TrendLeaderboardEntry(Base):
+    """Materialized top-K trends per scope, rebuilt at the end of each analysis run"""
+    __tablename__ = "trend_leaderboard"
+
+    scope = Column(String(20), primary_key=True)  # overall, category or marketplace
+    scope_value = Column(String(200), primary_key=True)  # "" for overall
+    rank = Column(Integer, primary_key=True)
+    trend_id = Column(Integer)
+    overall_score = Column(Float)
+
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, JSON
 from datetime import datetime
 from app.database import Base
 
@@ -13,5 +13,10 @@ class Marketplace(Base):
     status = Column(String(50), default="active")  # active, paused, error
     error_message = Column(String(500), nullable=True)
     
+    # Adaptive scheduling
+    scrape_interval_minutes = Column(Integer, nullable=True)  # current cadence, adapted to change rate
+    consecutive_failures = Column(Integer, default=0)
+    category_schedule = Column(JSON)  # {category: {interval_minutes, change_rate, next_scrape}}
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, LargeBinary
+from datetime import datetime
+from app.database import Base
+
+
+class NicheModel(Base):
+    """One fitted niche clustering pipeline (vectorizer, SVD, k-means)"""
+    __tablename__ = "niche_models"
+
+    id = Column(Integer, primary_key=True, index=True)  # the latest id is the active model
+    state = Column(LargeBinary)  # pickled pipeline, see app.analysis.niches
+    product_count = Column(Integer)
+    niche_count = Column(Integer)
+    fit_seconds = Column(Integer)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Niche(Base):
+    """A discovered niche: one k-means cluster of the active model"""
+    __tablename__ = "niches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    model_id = Column(Integer, index=True)
+    cluster = Column(Integer)  # k-means label within the model
+    label = Column(String(200), index=True)  # top terms, e.g. "retro cat mug"
+    top_terms = Column(JSON)
+    product_count = Column(Integer)  # at fit time; new products are assigned incrementally
+
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Index, event
+from sqlalchemy.orm import relationship, Session
 from datetime import datetime
+from typing import Any, Dict, Optional
 from app.database import Base
 
 
@@ -23,18 +24,52 @@ class Product(Base):
     # Metadata
     tags = Column(JSON)  # ["tag1", "tag2", ...]
     keywords = Column(JSON)
-    raw_data = Column(JSON)  # Store original scrape data
+    raw_data_ref = Column(String(64), nullable=True)  # blob-store key of the original scrape data
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    last_scraped = Column(DateTime, nullable=True)
+    last_scraped = Column(DateTime, nullable=True, index=True)
     
     # Relationships
     trend_id = Column(Integer, ForeignKey("trends.id"), nullable=True)
     trend = relationship("Trend", back_populates="products")
+    niche_id = Column(Integer, nullable=True, index=True)  # niches.id; no FK so refits can swap niches
     
     __table_args__ = (
         Index("idx_marketplace_category", "marketplace", "category"),
         Index("idx_created_at", "created_at"),
     )
+    
+    @property
+    def raw_data(self) -> Optional[Dict[str, Any]]:
+        """Original scrape data, read from the blob store on first access"""
+        cached = self.__dict__.get("_raw_data")
+        if cached is None or cached[0] != self.raw_data_ref:
+            from app.utils.blobstore import get_document
+            value = get_document(self.raw_data_ref) if self.raw_data_ref else None
+            cached = self.__dict__["_raw_data"] = (self.raw_data_ref, value)
+        return cached[1]
+    
+    @raw_data.setter
+    def raw_data(self, value: Optional[Dict[str, Any]]):
+        from app.utils.blobstore import document_key
+        key, data = document_key(value) if value is not None else (None, None)
+        if key != self.raw_data_ref:
+            self.raw_data_ref = key
+            if data is not None:
+                self.__dict__["_raw_data_pending"] = (key, data)
+        self.__dict__["_raw_data"] = (key, value)
+
+
+@event.listens_for(Session, "before_flush")
+def _store_raw_data(session, flush_context, instances):
+    """Write the blobs of new and changed products before the rows that reference them"""
+    documents = {}
+    for obj in list(session.new) + list(session.dirty):
+        pending = obj.__dict__.pop("_raw_data_pending", None) if isinstance(obj, Product) else None
+        if pending is not None:
+            documents[pending[0]] = pending[1]
+    if documents:
+        from app.utils.blobstore import put_documents
+        put_documents(documents)
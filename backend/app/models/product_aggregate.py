@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Boolean, JSON
+from datetime import datetime
+from app.database import Base
+
+
+class ProductAggregate(Base):
+    """Sufficient statistics of the products of one category or niche, maintained on every product write"""
+    __tablename__ = "product_aggregates"
+
+    grouping = Column(String(20), primary_key=True)  # category or niche
+    key = Column(String(200), primary_key=True)  # the category, or the niche id as text
+
+    product_count = Column(Integer, default=0)
+    total_reviews = Column(Integer, default=0)
+    price_sum = Column(Float, default=0)
+    priced_count = Column(Integer, default=0)  # products with a non-zero price
+    price_min = Column(Float, nullable=True)
+    price_max = Column(Float, nullable=True)
+    rating_sum = Column(Float, default=0)
+    rating_count = Column(Integer, default=0)
+    marketplace_counts = Column(JSON)  # {"amazon": 12, ...}
+    category_counts = Column(JSON)
+    sample = Column(JSON)  # [[product_id, category, price], ...] of the lowest ids
+
+    # XOR of per-product digests: changes whenever any member is added, removed or edited
+    content_hash = Column(BigInteger, default=0)
+    # Set when a delta cannot be applied exactly (e.g. the min price left); rebuilt on next read
+    stale = Column(Boolean, default=False)
+    scored_hash = Column(BigInteger, nullable=True)  # scoring_fingerprint the current trend was scored from
+    scored_at = Column(DateTime, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON
+from datetime import datetime
+from app.database import Base
+
+
+class ArchivedProduct(Base):
+    """A product that went unscraped past the archive cutoff, moved out of the hot products table"""
+    __tablename__ = "products_archive"
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, index=True)  # its id in products; ids may be reused there
+    marketplace = Column(String(50))
+    external_id = Column(String(255), index=True)
+    title = Column(String(500))
+    description = Column(Text)
+    category = Column(String(200))
+    price = Column(Float)
+    rating = Column(Float, nullable=True)
+    reviews_count = Column(Integer)
+    sales_count = Column(Integer, nullable=True)
+    image_url = Column(String(500))
+    product_url = Column(String(500))
+    tags = Column(JSON)
+    keywords = Column(JSON)
+    raw_data_ref = Column(String(64), nullable=True)  # the blob is kept
+    niche_id = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime)
+    last_scraped = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, LargeBinary, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.database import Base
+
+
+class ProductSignature(Base):
+    """MinHash signature and near-duplicate cluster of a product"""
+    __tablename__ = "product_signatures"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(LargeBinary)  # num_perm little-endian uint32 MinHash values
+    image_hash = Column(BigInteger, nullable=True)  # 64-bit dHash of the product image
+    cluster_id = Column(Integer, index=True)  # smallest product id in the cluster at creation
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ProductLshBucket(Base):
+    """LSH band bucket -> product, for sublinear candidate lookup"""
+    __tablename__ = "product_lsh_buckets"
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("idx_lsh_product", "product_id"),
+    )
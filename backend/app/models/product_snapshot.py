@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from datetime import datetime
+from app.database import Base
+
+
+class ProductSnapshot(Base):
+    """Append-only metrics of a product, written when a scrape sees them change"""
+    __tablename__ = "product_snapshots"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    captured_at = Column(DateTime, default=datetime.utcnow, primary_key=True)
+
+    reviews_count = Column(Integer)
+    rating = Column(Float, nullable=True)
+    price = Column(Float)
+    sales_count = Column(Integer, nullable=True)
+
+    # Change since the previous snapshot, so windowed sums never need the prior row
+    reviews_delta = Column(Integer, default=0)
+    price_delta = Column(Float, default=0)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.database import Base
+
+
+class ProductTag(Base):
+    """Normalized tag/keyword -> product: the inverted index behind tag filters"""
+    __tablename__ = "product_tags"
+
+    tag = Column(String(100), primary_key=True)  # lowercase, punctuation collapsed, see app.analysis.tags
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("idx_product_tags_product", "product_id", "tag"),  # covers co-occurrence self-joins
+    )
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+
+
+class PublishJob(Base):
+    """Outbox row describing one design-to-store publish step"""
+    __tablename__ = "publish_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    design_id = Column(Integer, ForeignKey("designs.id"), nullable=False)
+    target = Column(String(50), nullable=False)  # printful, shopify
+
+    # Status
+    status = Column(String(50), default="pending")  # pending, in_progress, succeeded, failed
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+
+    # Result of the external call, set once so retries never publish twice
+    external_id = Column(String(100), nullable=True)
+
+    # Lease held by the worker currently processing the job
+    locked_at = Column(DateTime, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    design = relationship("Design", back_populates="publish_jobs")
+
+    __table_args__ = (
+        UniqueConstraint("design_id", "target", name="uq_publish_job_design_target"),
+        Index("idx_publish_job_status_created", "status", "created_at"),
+    )
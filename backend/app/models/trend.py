@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, Index
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -8,7 +8,7 @@ class Trend(Base):
     __tablename__ = "trends"
 
     id = Column(Integer, primary_key=True, index=True)
-    niche = Column(String(200), index=True)
+    niche = Column(String(200), unique=True, index=True)  # one trend per niche, see save_trends
     category = Column(String(200), index=True)
     
     # Trend scoring
@@ -35,6 +35,10 @@ class Trend(Base):
     summary = Column(Text)
     insights = Column(JSON)  # Key insights about this trend
     
+    # Lifecycle; NULL reads as the default, see retire_trends
+    active = Column(Boolean, default=True, index=True)  # False once the analysis stops producing this niche
+    manual = Column(Boolean, default=False)  # created through the API, never retired by the analysis
+    
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
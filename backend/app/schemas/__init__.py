@@ -1,12 +1,17 @@
-from app.schemas.product import ProductResponse, ProductCreate
+from app.schemas.product import ProductResponse, ProductDetail, ProductCreate
 from app.schemas.trend import TrendResponse, TrendCreate
 from app.schemas.design import DesignResponse, DesignCreate
+from app.schemas.publish_job import PublishJobResponse
+from app.schemas.tag import TagCount
 
 __all__ = [
     "ProductResponse",
+    "ProductDetail",
     "ProductCreate",
     "TrendResponse",
     "TrendCreate",
     "DesignResponse",
     "DesignCreate",
+    "PublishJobResponse",
+    "TagCount",
 ]
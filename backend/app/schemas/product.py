@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any
 
 
-class ProductCreate(BaseModel):
+class ProductBase(BaseModel):
     marketplace: str
     external_id: str
     title: str
@@ -17,10 +17,13 @@ class ProductCreate(BaseModel):
     product_url: str
     tags: Optional[List[str]] = None
     keywords: Optional[List[str]] = None
+
+
+class ProductCreate(ProductBase):
     raw_data: Optional[Dict[str, Any]] = None
 
 
-class ProductResponse(ProductCreate):
+class ProductResponse(ProductBase):
     id: int
     created_at: datetime
     updated_at: datetime
@@ -29,3 +32,7 @@ class ProductResponse(ProductCreate):
 
     class Config:
         from_attributes = True
+
+
+class ProductDetail(ProductResponse):
+    raw_data: Optional[Dict[str, Any]] = None  # read from the blob store; list responses leave it out
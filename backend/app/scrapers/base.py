@@ -1,15 +1,113 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
-from app.utils.logger import logger
-import httpx
+from typing import List, Dict, Any, Optional
+from urllib.parse import quote_plus
+from app.config import get_settings
+from app.scrapers.parsing import Field, Selectors
+import logging
+
+settings = get_settings()
+
+logger_scrapers = logging.getLogger("pod_trends.scrapers")
 
 
 class BaseScraper(ABC):
     """Base class for marketplace scrapers"""
     
+    # Text present in a listing page only once its products are in the HTML. Scrapers of
+    # marketplaces that render listings client-side set it; pages fetched over plain HTTP
+    # without it are re-fetched through the shared browser pool.
+    ready_marker: Optional[str] = None
+    # CSS selector the browser waits for before taking the rendered HTML
+    render_wait_selector: Optional[str] = None
+    # One element per product on a listing page, and the raw-data fields read from it;
+    # the keys are the ones parse_product consumes
+    listing_selector: Optional[str] = None
+    listing_fields: Selectors = {}
+    
     def __init__(self):
         self.name = self.__class__.__name__
-        self.logger = logger
+        self.logger = logger_scrapers
+        self._http = None
+        self._render_first = False  # plain fetches already came back without the data
+    
+    @property
+    def http(self):
+        """HTTP client reused across the pages of a scrape"""
+        if self._http is None:
+            import httpx
+            self._http = httpx.Client(
+                timeout=settings.scrape_request_timeout_seconds,
+                headers={"User-Agent": settings.scrape_user_agent},
+                follow_redirects=True,
+            )
+        return self._http
+    
+    def close(self):
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+    
+    def has_data(self, html: Optional[str]) -> bool:
+        """Whether a fetched page already contains the listing data"""
+        return bool(html) and (self.ready_marker is None or self.ready_marker in html)
+    
+    def fetch(self, url: str) -> Optional[str]:
+        """Plain HTTP fetch; None on a network error or an error status"""
+        try:
+            response = self.http.get(url)
+            response.raise_for_status()
+            return response.text
+        except Exception as e:
+            self.logger.warning("%s: fetching %s failed: %s", self.name, url, e)
+            return None
+    
+    def fetch_rendered(self, urls: List[str]) -> List[Optional[str]]:
+        """Fetch through the process-wide headless browser pool, several pages at a time"""
+        from app.scrapers.browser import get_browser_pool
+        return get_browser_pool().render_many(urls, self.render_wait_selector)
+    
+    def fetch_pages(self, urls: List[str]) -> List[Optional[str]]:
+        """HTML of each URL: plain HTTP first, the browser only for pages that lack the data
+        
+        Once a plain fetch comes back without the data, later calls on this scraper
+        go straight to the browser instead of paying for both fetches.
+        """
+        pages: Dict[str, Optional[str]] = {}
+        if not self._render_first:
+            for url in urls:
+                html = self.fetch(url)
+                if self.has_data(html):
+                    pages[url] = html
+                elif html is not None:
+                    self._render_first = True
+        missing = [url for url in urls if url not in pages]
+        if missing:
+            self.logger.debug("%s: rendering %s of %s pages", self.name, len(missing), len(urls))
+            pages.update(zip(missing, self.fetch_rendered(missing)))
+        return [pages.get(url) for url in urls]
+    
+    def listing_url(self, category: str, page: int) -> Optional[str]:
+        """URL of one listing page; None for scrapers that do not read listing pages"""
+        return None
+    
+    def parse_listings(self, urls: List[str], pages: List[Optional[str]], category: str) -> List[Dict[str, Any]]:
+        """Raw product dicts from fetched listing pages, parsed in the shared parse pool"""
+        from app.scrapers.parsing import parse_pages
+        
+        products = []
+        for items in parse_pages(list(zip(urls, pages)), self.listing_selector, self.listing_fields):
+            for item in items:
+                item["category"] = category
+                products.append(item)
+        return products
+    
+    def scrape_listings(self, category: str, start_page: int, max_pages: int) -> List[Dict[str, Any]]:
+        urls = [self.listing_url(category, page) for page in range(start_page, start_page + max_pages)]
+        urls = [url for url in urls if url]
+        if not urls:
+            self.logger.warning("%s has no listing pages to scrape", self.name)
+            return []
+        return self.parse_listings(urls, self.fetch_pages(urls), category)
     
     @abstractmethod
     def scrape(self, **kwargs) -> List[Dict[str, Any]]:
@@ -20,21 +118,38 @@ class BaseScraper(ABC):
     def parse_product(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """Parse raw scraped data into product model"""
         pass
+    
+    def scrape_pages(self, category: str, start_page: int, end_page: int) -> List[Dict[str, Any]]:
+        """Scrape an inclusive page range of one category (one task chunk)"""
+        return self.scrape(category=category, start_page=start_page, max_pages=end_page - start_page + 1)
 
 
 class AmazonScraper(BaseScraper):
     """Amazon marketplace scraper (basic implementation)"""
     
+    listing_selector = 'div[data-component-type="s-search-result"]'
+    listing_fields = {
+        "asin": Field(attr="data-asin"),
+        "title": Field("h2"),
+        "price": Field(".a-price .a-offscreen", type="float"),
+        "rating": Field(".a-icon-alt", type="float"),
+        "reviews_count": Field("span.s-underline-text", type="int"),
+        "image_url": Field("img.s-image", attr="src"),
+        "url": Field("h2 a", attr="href", type="url"),
+    }
+    
     def __init__(self):
         super().__init__()
         self.base_url = "https://www.amazon.com"
     
-    def scrape(self, category: str = "print-on-demand", max_pages: int = 5) -> List[Dict[str, Any]]:
+    def listing_url(self, category: str, page: int) -> str:
+        return f"{self.base_url}/s?k={quote_plus(category)}&page={page}"
+    
+    def scrape(self, category: str = "print-on-demand", max_pages: int = 5,
+               start_page: int = 1) -> List[Dict[str, Any]]:
         """Scrape Amazon products"""
-        self.logger.info(f"Scraping Amazon for category: {category}")
-        products = []
-        # Implementation would go here
-        return products
+        self.logger.info("Scraping Amazon for category: %s (pages %s-%s)", category, start_page, start_page + max_pages - 1)
+        return self.scrape_listings(category, start_page, max_pages)
     
     def parse_product(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         return {
@@ -55,16 +170,29 @@ class AmazonScraper(BaseScraper):
 class EtsyScraper(BaseScraper):
     """Etsy marketplace scraper (basic implementation)"""
     
+    listing_selector = "div.v2-listing-card[data-listing-id]"
+    listing_fields = {
+        "listing_id": Field(attr="data-listing-id"),
+        "title": Field("h3"),
+        "price": Field(".currency-value", type="float"),
+        "rating": Field('input[name="rating"]', attr="value", type="float"),
+        "reviews_count": Field(".wt-text-body-smaller", type="int"),
+        "image_url": Field("img", attr="src"),
+        "url": Field("a.listing-link", attr="href", type="url"),
+    }
+    
     def __init__(self):
         super().__init__()
         self.base_url = "https://www.etsy.com"
     
-    def scrape(self, category: str = "print-on-demand", max_pages: int = 5) -> List[Dict[str, Any]]:
+    def listing_url(self, category: str, page: int) -> str:
+        return f"{self.base_url}/search?q={quote_plus(category)}&page={page}"
+    
+    def scrape(self, category: str = "print-on-demand", max_pages: int = 5,
+               start_page: int = 1) -> List[Dict[str, Any]]:
         """Scrape Etsy products"""
-        self.logger.info(f"Scraping Etsy for category: {category}")
-        products = []
-        # Implementation would go here
-        return products
+        self.logger.info("Scraping Etsy for category: %s (pages %s-%s)", category, start_page, start_page + max_pages - 1)
+        return self.scrape_listings(category, start_page, max_pages)
     
     def parse_product(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         return {
@@ -89,14 +217,21 @@ class ShopifyScraper(BaseScraper):
         super().__init__()
         self.store_name = store_name
         self.base_url = f"https://{store_name}.myshopify.com"
+        self.products_per_page = 250
     
-    def scrape(self, collection: str = None, max_products: int = 100) -> List[Dict[str, Any]]:
+    def scrape(self, collection: str = None, max_products: int = 100,
+               start_page: int = 1) -> List[Dict[str, Any]]:
         """Scrape Shopify store products"""
-        self.logger.info(f"Scraping Shopify store: {self.store_name}")
+        self.logger.info("Scraping Shopify store: %s", self.store_name)
         products = []
         # Implementation would go here
         return products
     
+    def scrape_pages(self, category: str, start_page: int, end_page: int) -> List[Dict[str, Any]]:
+        """Scrape a page range of a collection, one products.json page per page"""
+        pages = end_page - start_page + 1
+        return self.scrape(collection=category, max_products=pages * self.products_per_page, start_page=start_page)
+    
     def parse_product(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "marketplace": "shopify",
@@ -0,0 +1,204 @@
+from typing import List, Dict, Optional
+from functools import lru_cache
+from urllib.parse import urlsplit
+from app.config import get_settings
+import asyncio
+import atexit
+import logging
+import threading
+
+settings = get_settings()
+
+logger_scrapers = logging.getLogger("pod_trends.scrapers")
+
+
+class _Slot:
+    """One browser context with its reusable page; a slot renders one URL at a time"""
+
+    def __init__(self):
+        self.context = None
+        self.page = None
+        self.uses = 0
+        self.generation = -1  # browser launch the context belongs to
+
+
+class BrowserPool:
+    """Long-lived headless Chromium shared by all scrapers of a worker process
+
+    Playwright runs on a private event-loop thread, so synchronous scrapers can
+    render many pages concurrently. The pool holds `size` contexts, each with one
+    reused page; a context is recycled after `context_max_pages` renders or on any
+    error. Images, fonts, media and analytics hosts are aborted before download.
+    """
+
+    def __init__(self, size: Optional[int] = None, context_max_pages: Optional[int] = None):
+        self.size = size or settings.browser_pool_size
+        self.context_max_pages = context_max_pages or settings.browser_context_max_pages
+        self.blocked_types = set(settings.browser_blocked_resource_types)
+        self.blocked_hosts = tuple(settings.browser_blocked_hosts)
+        self.stats: Dict[str, int] = {"rendered": 0, "failed": 0, "blocked": 0, "contexts": 0, "launches": 0}
+        self._start_lock = threading.Lock()
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._playwright = None
+        self._browser = None
+        self._generation = 0
+        self._idle: Optional[asyncio.Queue] = None
+        self._slots: List[_Slot] = []
+
+    def start(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True).start()
+            self._launch_lock = asyncio.Lock()
+            try:
+                asyncio.run_coroutine_threadsafe(self._ensure_browser(), loop).result()
+            except Exception:
+                loop.call_soon_threadsafe(loop.stop)
+                raise
+            self._loop = loop
+
+    def _browser_alive(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _ensure_browser(self):
+        """(Re)launch Chromium unless it is running; slots that find it dead at once share one launch"""
+        async with self._launch_lock:
+            if not self._browser_alive():
+                await self._launch()
+
+    async def _launch(self):
+        from playwright.async_api import async_playwright
+
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        if self._browser is not None:
+            try:
+                await self._browser.close()  # reap the crashed or disconnected process
+            except Exception:
+                pass
+            self._browser = None
+        self._browser = await self._playwright.chromium.launch(
+            headless=True, args=["--disable-dev-shm-usage", "--disable-gpu", "--no-first-run"],
+        )
+        self._generation += 1
+        self.stats["launches"] += 1
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            self._slots = [_Slot() for _ in range(self.size)]
+            for slot in self._slots:
+                self._idle.put_nowait(slot)
+        logger_scrapers.info("Browser pool launched Chromium with %s contexts", self.size)
+
+    def _blocked_host(self, host: str) -> bool:
+        return any(host == blocked or host.endswith("." + blocked) for blocked in self.blocked_hosts)
+
+    async def _intercept(self, route):
+        request = route.request
+        host = urlsplit(request.url).hostname or ""
+        if request.resource_type in self.blocked_types or self._blocked_host(host):
+            self.stats["blocked"] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _close_slot(self, slot: _Slot):
+        context, slot.context, slot.page = slot.context, None, None
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass  # the browser it belonged to is already gone
+
+    async def _open_slot(self, slot: _Slot):
+        await self._close_slot(slot)
+        if not self._browser_alive():
+            await self._ensure_browser()
+        context = await self._browser.new_context(
+            user_agent=settings.scrape_user_agent,
+            viewport={"width": 1280, "height": 800},
+            service_workers="block",
+        )
+        context.set_default_timeout(settings.browser_navigation_timeout_seconds * 1000)
+        await context.route("**/*", self._intercept)
+        slot.context, slot.page = context, await context.new_page()
+        slot.uses, slot.generation = 0, self._generation
+        self.stats["contexts"] += 1
+
+    async def _render(self, url: str, wait_for: Optional[str]) -> str:
+        slot = await self._idle.get()
+        try:
+            if (slot.context is None or slot.generation != self._generation or not self._browser_alive()
+                    or slot.uses >= self.context_max_pages):
+                await self._open_slot(slot)
+            slot.uses += 1
+            await slot.page.goto(url, wait_until="domcontentloaded")
+            if wait_for:
+                await slot.page.wait_for_selector(wait_for, state="attached")
+            else:
+                await slot.page.wait_for_load_state("load")
+            html = await slot.page.content()
+            self.stats["rendered"] += 1
+            return html
+        except Exception:
+            self.stats["failed"] += 1
+            await self._close_slot(slot)  # never reuse a context left in an unknown state
+            raise
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def _render_many(self, urls: List[str], wait_for: Optional[str]) -> List[Optional[str]]:
+        results = await asyncio.gather(*(self._render(url, wait_for) for url in urls), return_exceptions=True)
+        pages = []
+        for url, result in zip(urls, results):
+            if isinstance(result, BaseException):
+                logger_scrapers.warning("Rendering %s failed: %s", url, result)
+                pages.append(None)
+            else:
+                pages.append(result)
+        return pages
+
+    def render_many(self, urls: List[str], wait_for: Optional[str] = None) -> List[Optional[str]]:
+        """Rendered HTML of each URL (None where it failed), at most `size` pages at a time
+
+        wait_for is a CSS selector that appears once the page's data has rendered.
+        """
+        if not urls:
+            return []
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._render_many(urls, wait_for), self._loop).result()
+
+    def render(self, url: str, wait_for: Optional[str] = None) -> Optional[str]:
+        return self.render_many([url], wait_for)[0]
+
+    async def _shutdown(self):
+        for slot in self._slots:
+            await self._close_slot(slot)
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = self._playwright = None
+
+    def close(self):
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+            if loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=30)
+            except Exception as e:
+                logger_scrapers.warning("Error closing browser pool: %s", e)
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                self._idle, self._slots = None, []
+
+
+@lru_cache()
+def get_browser_pool() -> BrowserPool:
+    """Per-process browser pool, launched on the first rendered fetch"""
+    pool = BrowserPool()
+    atexit.register(pool.close)
+    return pool
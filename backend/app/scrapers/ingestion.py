@@ -0,0 +1,289 @@
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+from app.models import (
+    Product, ProductSnapshot, ProductTag, ProductSignature, ProductLshBucket, ArchivedProduct,
+)
+from app.analysis.aggregates import product_state, update_aggregates
+from app.config import get_settings
+import json
+import logging
+
+settings = get_settings()
+
+logger_ingestion = logging.getLogger("pod_trends.ingestion")
+
+# Fields compared to decide whether a re-scraped product actually changed
+TRACKED_FIELDS = (
+    "title", "description", "category", "price", "rating", "reviews_count",
+    "sales_count", "image_url", "product_url", "tags", "keywords",
+)
+
+# Fields recorded in product_snapshots whenever they change
+METRIC_FIELDS = ("reviews_count", "rating", "price", "sales_count")
+
+# Columns copied to products_archive
+ARCHIVED_FIELDS = (
+    "marketplace", "external_id", "title", "description", "category", "price", "rating",
+    "reviews_count", "sales_count", "image_url", "product_url", "tags", "keywords",
+    "raw_data_ref", "niche_id", "created_at", "last_scraped",
+)
+
+
+def _insert_statement(db: Session):
+    """Dialect-specific INSERT supporting ON CONFLICT, or None if unsupported"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(Product)
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(Product)
+    return None
+
+
+def _insert_new(db: Session, rows: List[Dict[str, Any]]) -> Optional[List[Product]]:
+    """Insert products unless their external_id exists; returns those inserted, None if unsupported
+
+    Parallel scrape chunks may insert the same product at once. ON CONFLICT DO
+    NOTHING lets the first writer win instead of failing the other chunk.
+    """
+    stmt = _insert_statement(db)
+    if stmt is None:
+        return None
+    from app.utils.blobstore import document_key, put_documents
+
+    # A bulk INSERT bypasses Product.raw_data, so the payloads are stored here
+    documents = {}
+    for row in rows:
+        raw_data = row.pop("raw_data", None)
+        if raw_data is not None:
+            key, data = document_key(raw_data)
+            documents[key] = data
+            row["raw_data_ref"] = key
+    put_documents(documents)
+
+    stmt = stmt.on_conflict_do_nothing(index_elements=["external_id"]).returning(Product.id)
+    ids = [product_id for (product_id,) in db.execute(stmt, rows)]
+    return db.query(Product).filter(Product.id.in_(ids)).all() if ids else []
+
+
+def upsert_products(db: Session, items: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Insert or update parsed products keyed on external_id in one transaction
+
+    Products a concurrent writer inserted first are updated instead.
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+
+    items_by_id = {}
+    for item in items:
+        external_id = item.get("external_id")
+        if not external_id:
+            stats["skipped"] += 1
+            continue
+        items_by_id[str(external_id)] = item
+
+    if not items_by_id:
+        return stats
+
+    existing = {
+        product.external_id: product
+        for product in db.query(Product).filter(Product.external_id.in_(list(items_by_id)))
+    }
+    now = datetime.utcnow()
+    touched = []
+    snapshots = []  # (product, reviews_delta, price_delta)
+    previous = {}  # product -> aggregate state before this upsert, None for new products
+
+    new_rows = [
+        {**_values(external_id, item), "last_scraped": now}
+        for external_id, item in items_by_id.items() if external_id not in existing
+    ]
+    inserted = _insert_new(db, new_rows) if new_rows else []
+    if inserted is not None:
+        for product in inserted:
+            touched.append(product)
+            previous[product] = None
+            snapshots.append((product, 0, 0.0))
+            stats["inserted"] += 1
+        inserted_ids = {product.external_id for product in inserted}
+        lost = [row["external_id"] for row in new_rows if row["external_id"] not in inserted_ids]
+        if lost:
+            existing.update(
+                (product.external_id, product)
+                for product in db.query(Product).filter(Product.external_id.in_(lost))
+            )
+
+    for external_id, item in items_by_id.items():
+        values = _values(external_id, item)
+        product = existing.get(external_id)
+
+        if product is None and inserted is not None:
+            continue  # inserted above
+        if product is None:
+            product = Product(**values, last_scraped=now)
+            db.add(product)
+            touched.append(product)
+            previous[product] = None
+            snapshots.append((product, 0, 0.0))
+            stats["inserted"] += 1
+            continue
+
+        changed = any(
+            getattr(product, field) != values[field]
+            for field in TRACKED_FIELDS
+            if field in values
+        )
+        if any(getattr(product, field) != values[field] for field in METRIC_FIELDS if field in values):
+            snapshots.append((
+                product,
+                (values.get("reviews_count", product.reviews_count) or 0) - (product.reviews_count or 0),
+                (values.get("price", product.price) or 0) - (product.price or 0),
+            ))
+        if changed:
+            previous[product] = product_state(product)
+        for key, value in values.items():
+            setattr(product, key, value)
+        product.last_scraped = now
+        stats["updated" if changed else "unchanged"] += 1
+        if changed:
+            touched.append(product)
+
+    if snapshots or previous:
+        db.flush()  # assigns ids to new products
+    if snapshots:
+        _append_snapshots(db, snapshots, now)
+    if previous:
+        # Category and niche aggregates move with the products, in the same transaction
+        update_aggregates(db, [(state, product_state(product)) for product, state in previous.items()])
+    # Before the commit, which would expire every touched product and reload each one
+    if touched:
+        from app.analysis.tags import sync_product_tags
+        sync_product_tags(db, touched)
+    if settings.dedup_enabled and touched:
+        from app.analysis.dedup import index_products
+        index_products(db, touched)
+    if settings.niche_clustering_enabled and touched:
+        from app.analysis.niches import assign_niches
+        assign_niches(db, touched)
+    db.commit()
+    logger_ingestion.debug("Upserted products: %s", stats)
+    return stats
+
+
+def _values(external_id: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    values = {key: value for key, value in item.items() if hasattr(Product, key)}
+    values["external_id"] = external_id
+    return values
+
+
+def _append_snapshots(db: Session, snapshots: List[tuple], now: datetime):
+    """Queue metric snapshot rows in the ingestion transaction"""
+    db.bulk_insert_mappings(ProductSnapshot, [
+        {
+            "product_id": product.id,
+            "captured_at": now,
+            "reviews_count": product.reviews_count,
+            "rating": product.rating,
+            "price": product.price,
+            "sales_count": product.sales_count,
+            "reviews_delta": reviews_delta,
+            "price_delta": price_delta,
+        }
+        for product, reviews_delta, price_delta in snapshots
+    ])
+
+def archive_stale_products(db: Session, days: Optional[float] = None,
+                           batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Move products not scraped for `days` to products_archive, one batch per transaction
+
+    Raw data stays in the blob store under the same reference. Tag, dedup and
+    snapshot rows go with the product, and the category and niche aggregates
+    drop it in the same transaction. A product scraped again later comes back
+    as a new row.
+    """
+    days = settings.product_archive_after_days if days is None else days
+    batch_size = batch_size or settings.product_archive_batch_size
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    stale = or_(
+        Product.last_scraped < cutoff,
+        and_(Product.last_scraped == None, Product.created_at < cutoff),
+    )
+
+    totals = {"archived": 0}
+    while True:
+        products = db.query(Product).filter(stale).order_by(Product.id).limit(batch_size).all()
+        if not products:
+            break
+        ids = [product.id for product in products]
+        now = datetime.utcnow()
+        db.bulk_insert_mappings(ArchivedProduct, [
+            {"product_id": product.id, "archived_at": now,
+             **{field: getattr(product, field) for field in ARCHIVED_FIELDS}}
+            for product in products
+        ])
+        for model in (ProductTag, ProductSnapshot, ProductLshBucket, ProductSignature):
+            db.query(model).filter(model.product_id.in_(ids)).delete(synchronize_session=False)
+        update_aggregates(db, [(product_state(product), None) for product in products])
+        db.query(Product).filter(Product.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        db.expunge_all()
+        totals["archived"] += len(products)
+        logger_ingestion.info("Archived %s stale products", totals["archived"])
+    return totals
+
+
+def backfill_raw_data(db: Session, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Move payloads left in the legacy products.raw_data column into the blob store
+
+    Databases created before raw data moved out of the table still hold it in
+    that column, which the model no longer maps. Adds raw_data_ref if missing,
+    then stores each payload and sets its reference, one batch per transaction.
+    Safe to re-run; the column can be dropped once it reports nothing left.
+    """
+    from sqlalchemy import inspect, text
+    from app.utils.blobstore import document_key, put_documents
+
+    batch_size = batch_size or settings.product_archive_batch_size
+    columns = {column["name"] for column in inspect(db.get_bind()).get_columns("products")}
+    if "raw_data" not in columns:
+        return {"moved": 0, "remaining": 0}
+    if "raw_data_ref" not in columns:
+        db.execute(text("ALTER TABLE products ADD COLUMN raw_data_ref VARCHAR(64)"))
+        db.commit()
+
+    select = text(
+        "SELECT id, raw_data FROM products"
+        " WHERE id > :last_id AND raw_data IS NOT NULL AND raw_data_ref IS NULL"
+        " ORDER BY id LIMIT :limit"
+    )
+    update = text("UPDATE products SET raw_data_ref = :ref WHERE id = :id")
+    totals = {"moved": 0}
+    last_id = 0
+    while True:
+        rows = db.execute(select, {"last_id": last_id, "limit": batch_size}).all()
+        if not rows:
+            break
+        documents = {}
+        refs = []
+        for product_id, raw_data in rows:
+            if isinstance(raw_data, (str, bytes)):  # drivers without native JSON return the text
+                raw_data = json.loads(raw_data)
+            if raw_data is None:
+                continue
+            key, data = document_key(raw_data)
+            documents[key] = data
+            refs.append({"id": product_id, "ref": key})
+        put_documents(documents)  # before the references, like Product.raw_data
+        if refs:
+            db.execute(update, refs)
+        db.commit()
+        last_id = rows[-1][0]
+        totals["moved"] += len(refs)
+        logger_ingestion.info("Moved raw data of %s products to the blob store", totals["moved"])
+
+    totals["remaining"] = db.execute(
+        text("SELECT COUNT(*) FROM products WHERE raw_data IS NOT NULL AND raw_data_ref IS NULL")
+    ).scalar()
+    return totals
@@ -0,0 +1,171 @@
+from typing import List, Dict, Any, Optional, NamedTuple, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from urllib.parse import urljoin
+from app.config import get_settings
+import atexit
+import logging
+import multiprocessing
+import os
+import re
+
+settings = get_settings()
+
+logger_scrapers = logging.getLogger("pod_trends.scrapers")
+
+BACKENDS = ("selectolax", "lxml", "html.parser")
+NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+class Field(NamedTuple):
+    """Where one raw-data field is read from, relative to a listing item
+
+    css is empty for the item element itself; attr None reads the element's text.
+    type is text, float, int or url (resolved against the page URL).
+    """
+    css: str = ""
+    attr: Optional[str] = None
+    type: str = "text"
+
+
+Selectors = Dict[str, Field]
+
+
+@lru_cache()
+def resolve_backend(name: str = "auto") -> str:
+    """The parser to use: the configured one, or the fastest installed"""
+    if name != "auto":
+        return name
+    try:
+        import selectolax.parser  # noqa: F401
+        return "selectolax"
+    except ImportError:
+        pass
+    try:
+        import lxml  # noqa: F401
+        return "lxml"  # BeautifulSoup on the lxml tree builder
+    except ImportError:
+        return "html.parser"
+
+
+def _number(text: Optional[str]) -> Optional[str]:
+    match = NUMBER.search(text or "")
+    return match.group().replace(",", "") if match else None
+
+
+def _convert(value: Optional[str], kind: str, page_url: str) -> Any:
+    if value is None:
+        return None
+    if kind == "float":
+        number = _number(value)
+        return float(number) if number else None
+    if kind == "int":
+        number = _number(value)
+        return int(float(number)) if number else None
+    value = " ".join(value.split())
+    if kind == "url":
+        return urljoin(page_url, value) if value else None
+    return value or None
+
+
+def parse_listing(html: str, item_selector: str, fields: Selectors, page_url: str = "",
+                  backend: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Raw product dicts of one listing page; only the declared fields are read"""
+    backend = resolve_backend(backend or settings.parse_backend)
+    if backend == "selectolax":
+        from selectolax.parser import HTMLParser
+
+        items = HTMLParser(html).css(item_selector)
+        select = lambda node, css: node.css_first(css) if css else node
+        attribute = lambda node, name: node.attributes.get(name)
+        text = lambda node: node.text(deep=True, separator=" ", strip=True)
+    else:
+        from bs4 import BeautifulSoup
+
+        items = BeautifulSoup(html, backend).select(item_selector)
+        select = lambda node, css: node.select_one(css) if css else node
+        attribute = lambda node, name: node.get(name)
+        text = lambda node: node.get_text(" ", strip=True)
+
+    products = []
+    for item in items:
+        product = {}
+        for key, field in fields.items():
+            node = select(item, field.css)
+            value = None
+            if node is not None:
+                value = text(node) if field.attr is None else attribute(node, field.attr)
+                if isinstance(value, list):  # BeautifulSoup returns multi-valued attributes as lists
+                    value = " ".join(value)
+            product[key] = _convert(value, field.type, page_url)
+        products.append(product)
+    return products
+
+
+def _parse_batch(pages: List[Tuple[str, str]], item_selector: str, fields: Selectors,
+                 backend: Optional[str]) -> List[List[Dict[str, Any]]]:
+    results = []
+    for page_url, html in pages:
+        try:
+            results.append(parse_listing(html, item_selector, fields, page_url, backend))
+        except Exception as e:
+            logger_scrapers.warning("Parsing %s failed: %s", page_url or "page", e)
+            results.append([])
+    return results
+
+
+def parse_workers() -> int:
+    if multiprocessing.current_process().daemon:
+        return 1  # Celery prefork children are daemons, which may not start processes
+    return settings.parse_workers or os.cpu_count() or 1
+
+
+@lru_cache()
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Per-process pool of parser processes, started on the first batch
+
+    forkserver keeps the children clear of the threads (browser pool, HTTP
+    clients, Celery) of the process that owns the pool.
+    """
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    pool = ProcessPoolExecutor(max_workers=parse_workers(), mp_context=context)
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+
+def parse_pages(pages: List[Tuple[str, Optional[str]]], item_selector: str, fields: Selectors,
+                backend: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+    """Products of each (url, html) page, in order; pages without HTML yield none
+
+    Pages are shipped to the parse pool `parse_batch_pages` at a time. A single
+    batch, or parse_workers=1, is parsed in the calling process since the pool
+    would only add pickling overhead. So are all pages in a daemon process (a
+    Celery prefork child), which cannot have children of its own.
+    """
+    present = [(url, html) for url, html in pages if html]
+    size = max(settings.parse_batch_pages, 1)
+    batches = [present[i:i + size] for i in range(0, len(present), size)]
+
+    parsed: List[List[Dict[str, Any]]] = []
+    if len(batches) > 1 and parse_workers() > 1:
+        pool = None
+        try:
+            pool = get_parse_pool()
+            futures = [pool.submit(_parse_batch, batch, item_selector, fields, backend) for batch in batches]
+            for future in futures:
+                parsed.extend(future.result())
+        except Exception as e:  # a broken pool or one that could not start its processes
+            logger_scrapers.warning("Parse pool unavailable, parsing inline: %s", e)
+            if pool is not None:
+                # Reap its processes and queues; the next batch starts a fresh pool
+                pool.shutdown(wait=False, cancel_futures=True)
+                atexit.unregister(pool.shutdown)
+            get_parse_pool.cache_clear()
+            parsed = []
+    if not parsed:
+        for batch in batches:
+            parsed.extend(_parse_batch(batch, item_selector, fields, backend))
+
+    results = iter(parsed)
+    return [next(results) if html else [] for _, html in pages]
@@ -0,0 +1,121 @@
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+from app.models import Marketplace
+from app.config import get_settings
+import random
+
+settings = get_settings()
+
+
+def jittered_minutes(minutes: float) -> float:
+    """Spread a delay by +/- scrape_jitter_fraction to avoid synchronized starts"""
+    spread = settings.scrape_jitter_fraction
+    return minutes * random.uniform(1 - spread, 1 + spread)
+
+
+def backoff_minutes(failures: int) -> float:
+    """Exponential backoff after consecutive failures, capped"""
+    exponent = max(0, failures - 1)
+    return min(settings.scrape_backoff_max_minutes, settings.scrape_backoff_base_minutes * (2 ** exponent))
+
+
+def smooth_change_rate(previous: Optional[float], observed: float) -> float:
+    """Exponentially weighted moving average of the observed change rate"""
+    if previous is None:
+        return observed
+    alpha = settings.scrape_change_rate_smoothing
+    return alpha * observed + (1 - alpha) * previous
+
+
+def adapt_interval(interval: float, change_rate: float) -> float:
+    """Scale the cadence so roughly scrape_target_change_rate of products change per scrape"""
+    # Fast-changing categories get scraped more often, stable ones less often,
+    # but never more than halve/double the interval in one step
+    factor = settings.scrape_target_change_rate / max(change_rate, 0.01)
+    factor = min(2.0, max(0.5, factor))
+    return min(settings.scrape_max_interval_minutes, max(settings.scrape_min_interval_minutes, interval * factor))
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _category_entry(marketplace: Marketplace, category: str) -> Dict[str, Any]:
+    schedule = marketplace.category_schedule or {}
+    return dict(schedule.get(category) or {
+        "interval_minutes": settings.scrape_default_interval_minutes,
+        "change_rate": None,
+        "next_scrape": None,
+    })
+
+
+def due_categories(marketplace: Marketplace, now: datetime) -> List[str]:
+    """Configured categories whose next scrape time has passed"""
+    due = []
+    for category in settings.scrape_categories:
+        next_scrape = _parse_time(_category_entry(marketplace, category)["next_scrape"])
+        if next_scrape is None or next_scrape <= now:
+            due.append(category)
+    return due
+
+
+def _refresh_next_scrape(marketplace: Marketplace, schedule: Dict[str, Dict[str, Any]]):
+    """Assign a new schedule and roll it up to the marketplace row"""
+    marketplace.category_schedule = schedule
+    next_times = [_parse_time(entry["next_scrape"]) for entry in schedule.values() if entry.get("next_scrape")]
+    intervals = [entry["interval_minutes"] for entry in schedule.values()]
+    marketplace.next_scrape = min(next_times) if next_times else None
+    marketplace.scrape_interval_minutes = int(min(intervals)) if intervals else None
+
+
+def record_scrape_result(marketplace: Marketplace, category_stats: Dict[str, Dict[str, int]], now: datetime):
+    """Adapt each scraped category's cadence from how many of its products changed"""
+    schedule = dict(marketplace.category_schedule or {})
+
+    for category, stats in category_stats.items():
+        entry = _category_entry(marketplace, category)
+        total = stats.get("count", 0)
+
+        if stats.get("failed"):
+            # Keep the learned cadence but retry this category soon
+            entry["next_scrape"] = (now + timedelta(minutes=jittered_minutes(backoff_minutes(1)))).isoformat()
+        else:
+            if total:
+                observed = stats.get("changed", 0) / total
+                entry["change_rate"] = round(smooth_change_rate(entry["change_rate"], observed), 4)
+                entry["interval_minutes"] = round(adapt_interval(entry["interval_minutes"], entry["change_rate"]), 1)
+            entry["next_scrape"] = (now + timedelta(minutes=jittered_minutes(entry["interval_minutes"]))).isoformat()
+        schedule[category] = entry
+
+    marketplace.last_scraped = now
+    marketplace.status = "active"
+    marketplace.error_message = None
+    marketplace.consecutive_failures = 0
+    _refresh_next_scrape(marketplace, schedule)
+
+
+def record_scrape_failure(marketplace: Marketplace, categories: List[str], message: str, now: datetime):
+    """Put a marketplace in error status and hold it back until the backoff expires"""
+    marketplace.consecutive_failures = (marketplace.consecutive_failures or 0) + 1
+    marketplace.status = "error"
+    marketplace.error_message = (message or "")[:500]
+    retry_at = now + timedelta(minutes=jittered_minutes(backoff_minutes(marketplace.consecutive_failures)))
+
+    schedule = dict(marketplace.category_schedule or {})
+    for category in categories:
+        entry = _category_entry(marketplace, category)
+        entry["next_scrape"] = retry_at.isoformat()
+        schedule[category] = entry
+    marketplace.category_schedule = schedule
+    # The whole marketplace waits for the backoff, not just the failed categories
+    marketplace.next_scrape = retry_at
+
+
+def record_dispatch(marketplace: Marketplace, categories: List[str], now: datetime):
+    """Push dispatched categories out by their interval so the next beat tick skips them"""
+    schedule = dict(marketplace.category_schedule or {})
+    for category in categories:
+        entry = _category_entry(marketplace, category)
+        entry["next_scrape"] = (now + timedelta(minutes=entry["interval_minutes"])).isoformat()
+        schedule[category] = entry
+    _refresh_next_scrape(marketplace, schedule)
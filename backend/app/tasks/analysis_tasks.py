@@ -0,0 +1,182 @@
+from typing import List, Dict, Any
+from contextlib import nullcontext
+from celery import shared_task, group, chord
+from app.database import SessionLocal
+from app.config import get_settings
+from app.utils.locks import RedisLock, KEY_PREFIX, enqueue_unique, clear_pending
+from app.utils.redis_client import get_redis
+import logging
+
+logger_task = logging.getLogger("pod_trends.tasks")
+
+settings = get_settings()
+
+ANALYSIS_LOCK_NAME = "analyze_trends"
+ANALYSIS_RERUN_KEY = f"{KEY_PREFIX}:rerun:analyze_trends"
+
+# Shard result when the run's lease expired; finalize_trends then saves nothing
+LEASE_LOST = {"status": "lease_lost"}
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    """Split a list into consecutive shards of at most `size` items"""
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+@shared_task
+def fit_niches_task():
+    """Re-cluster all products into niches; holds the analysis lock so shards never see a half-swapped model"""
+    lock = RedisLock(ANALYSIS_LOCK_NAME, settings.analysis_lock_ttl_seconds)
+    token = lock.acquire()
+    if not token:
+        logger_task.info("Trend analysis running; niche refit skipped until the next schedule")
+        return {"status": "skipped"}
+
+    logger_task.info("Fitting niches")
+    db = SessionLocal()
+    try:
+        from app.analysis.niches import fit_niches
+        with lock.keep_alive(token):
+            stats = fit_niches(db)
+        logger_task.info("Niche fit finished: %s", stats)
+        return {"status": "success", **stats}
+    except Exception as e:
+        db.rollback()
+        logger_task.error("Error fitting niches: %s", e)
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+        lock.release(token)
+
+
+@shared_task
+def rebuild_aggregates_task():
+    """Recompute every category and niche aggregate, e.g. after products were edited outside ingestion"""
+    logger_task.info("Rebuilding product aggregates")
+    db = SessionLocal()
+    try:
+        from app.analysis.aggregates import GROUPING_COLUMNS, rebuild_aggregates
+        stats = {grouping: rebuild_aggregates(db, grouping) for grouping in GROUPING_COLUMNS}
+        logger_task.info("Aggregate rebuild finished: %s", stats)
+        return {"status": "success", **stats}
+    except Exception as e:
+        db.rollback()
+        logger_task.error("Error rebuilding aggregates: %s", e)
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+
+
+@shared_task
+def analyze_trends_task():
+    """Fan trend analysis out into niche (or category) shards, one run at a time"""
+    clear_pending(analyze_trends_task.name)
+    lock = RedisLock(ANALYSIS_LOCK_NAME, settings.analysis_lock_ttl_seconds)
+    token = lock.acquire()
+    if not token:
+        # Coalesce: the running analysis picks this trigger up when it finishes
+        get_redis().set(ANALYSIS_RERUN_KEY, 1, ex=settings.analysis_lock_ttl_seconds * 6)
+        logger_task.info("Trend analysis already running; trigger coalesced")
+        return {"status": "coalesced"}
+
+    logger_task.info("Starting trend analysis")
+    db = SessionLocal()
+    try:
+        from app.analysis.trends import GROUPINGS, trend_grouping
+        grouping = trend_grouping(db)
+        if grouping == "niche":
+            # A scrape that committed after the last refit may still point at its old niches
+            from app.analysis.niches import assign_orphaned_products
+            assign_orphaned_products(db)
+        list_groups, _ = GROUPINGS[grouping]
+        shards = chunked(list_groups(db), settings.analysis_shard_size)
+        if not shards:
+            _end_run(lock, token)
+            logger_task.info("No %s groups to analyze", grouping)
+            return {"status": "success", "trend_count": 0}
+        if not lock.renew(token):
+            logger_task.warning("Analysis lease lost before dispatch; run abandoned")
+            return {"status": "lease_lost"}
+        callback = finalize_trends.s(token, grouping).on_error(release_analysis_lock.si(token))
+        chord(group(analyze_trend_shard.s(shard, token, grouping) for shard in shards))(callback)
+        logger_task.info("Dispatched %s analysis shards by %s", len(shards), grouping)
+        return {"status": "dispatched", "shards": len(shards)}
+    except Exception as e:
+        _end_run(lock, token)
+        logger_task.error("Error analyzing trends: %s", e)
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+
+
+@shared_task
+def analyze_trend_shard(keys: List[Any], lock_token: str = None, grouping: str = "category"):
+    """Score one shard of niches or categories; writes are left to the chord callback"""
+    lock = RedisLock(ANALYSIS_LOCK_NAME, settings.analysis_lock_ttl_seconds)
+    if lock_token and not lock.renew(lock_token):
+        logger_task.warning("Analysis lease lost; skipping %s shard %s", grouping, keys)
+        return LEASE_LOST
+
+    from app.analysis.trends import GROUPINGS
+    _, build_trends = GROUPINGS[grouping]
+    db = SessionLocal()
+    try:
+        if not lock_token:
+            return build_trends(db, keys)
+        with lock.keep_alive(lock_token) as lease:
+            rows = build_trends(db, keys)
+        if lease.lost:
+            logger_task.warning("Analysis lease lost while scoring %s shard %s", grouping, keys)
+            return LEASE_LOST
+        return rows
+    except Exception as e:
+        logger_task.error("Error analyzing %s shard %s: %s", grouping, keys, e)
+        return []
+    finally:
+        db.close()
+
+
+@shared_task
+def finalize_trends(shard_results: List[List[Dict[str, Any]]], lock_token: str = None, grouping: str = None):
+    """Chord callback upserting all shard results, retiring vanished niches, then releasing the run lock"""
+    lock = RedisLock(ANALYSIS_LOCK_NAME, settings.analysis_lock_ttl_seconds)
+    # A shard that found the lease gone means another run may have started: save nothing
+    if any(shard == LEASE_LOST for shard in shard_results) or (lock_token and not lock.renew(lock_token)):
+        logger_task.warning("Analysis lease lost; results of this run discarded")
+        _end_run(lock, lock_token)
+        return {"status": "lease_lost"}
+
+    db = SessionLocal()
+    try:
+        from app.analysis.trends import save_trends, retire_trends
+        from app.analysis.leaderboard import refresh_leaderboard
+        with lock.keep_alive(lock_token) if lock_token else nullcontext():
+            trends = save_trends(db, [row for shard in shard_results for row in shard])
+            if grouping:
+                retire_trends(db, grouping)
+            refresh_leaderboard(db)
+        logger_task.info("Analyzed %s trends", len(trends))
+        return {"status": "success", "trend_count": len(trends)}
+    except Exception as e:
+        db.rollback()
+        logger_task.error("Error saving trends: %s", e)
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+        _end_run(lock, lock_token)
+
+
+@shared_task
+def release_analysis_lock(lock_token: str):
+    """Errback of the analysis chord: a failed shard or callback must not hold the lock until its TTL"""
+    logger_task.warning("Trend analysis run failed; releasing the analysis lock")
+    _end_run(RedisLock(ANALYSIS_LOCK_NAME, settings.analysis_lock_ttl_seconds), lock_token)
+    return {"status": "released"}
+
+
+def _end_run(lock: RedisLock, lock_token: str = None):
+    if lock_token and lock.release(lock_token):
+        # Triggers that arrived during this run collapse into a single follow-up run
+        if get_redis().delete(ANALYSIS_RERUN_KEY):
+            enqueue_unique(analyze_trends_task)
@@ -0,0 +1,23 @@
+from celery import shared_task
+from app.database import SessionLocal
+import logging
+
+logger_task = logging.getLogger("pod_trends.tasks")
+
+
+@shared_task
+def generate_designs_task(trend_id: int):
+    """Generate designs for a specific trend"""
+    logger_task.info("Generating designs for trend %s", trend_id)
+    db = SessionLocal()
+    try:
+        from app.ai.design_generator import DesignGenerator
+        generator = DesignGenerator()
+        designs = generator.generate_for_trend(trend_id, db)
+        logger_task.info("Generated %s designs for trend %s", len(designs), trend_id)
+        return {"status": "success", "design_count": len(designs)}
+    except Exception as e:
+        logger_task.error("Error generating designs: %s", e)
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
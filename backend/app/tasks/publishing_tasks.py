@@ -0,0 +1,22 @@
+from celery import shared_task
+from app.database import SessionLocal
+from app.integrations.publisher import publish_batch
+import logging
+
+logger_task = logging.getLogger("pod_trends.tasks")
+
+
+@shared_task
+def publish_designs_task(batch_size: int = None):
+    """Publish ready designs to the configured stores through the outbox"""
+    logger_task.info("Starting design publishing")
+    db = SessionLocal()
+    try:
+        results = publish_batch(db, batch_size)
+        logger_task.info("Publishing batch finished: %s", results)
+        return {"status": "success", **results}
+    except Exception as e:
+        logger_task.error("Error publishing designs: %s", e)
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
@@ -1,56 +1,254 @@
-from celery import shared_task
+from typing import List, Dict, Any
+from datetime import datetime
+from celery import shared_task, group, chord
+from sqlalchemy import or_
 from app.utils.logger import logger
 from app.database import SessionLocal
-from app.analysis.trends import analyze_trends
+from app.config import get_settings
+from app.models import Marketplace
+from app.utils.locks import enqueue_unique, clear_pending
+from app.utils.metrics import span
 import logging
+import random
 
 logger_task = logging.getLogger("pod_trends.tasks")
 
+settings = get_settings()
+
+def page_ranges(max_pages: int, pages_per_chunk: int) -> List[tuple]:
+    """Split pages 1..max_pages into inclusive (start, end) ranges"""
+    pages_per_chunk = max(1, pages_per_chunk)
+    return [
+        (start, min(start + pages_per_chunk - 1, max_pages))
+        for start in range(1, max_pages + 1, pages_per_chunk)
+    ]
+
 
 @shared_task
-def scrape_marketplace(marketplace: str):
-    """Scrape a marketplace for products"""
-    logger_task.info(f"Starting scrape for {marketplace}")
+def scrape_marketplace(marketplace: str, categories: List[str] = None):
+    """Fan a marketplace scrape out into (category, page range) chunks"""
+    clear_pending(scrape_marketplace.name, (marketplace, categories))
+    categories = categories or settings.scrape_categories
+    logger_task.info("Starting scrape for %s: %s categories", marketplace, len(categories))
     try:
-        from app.scrapers import scrapers
-        scraper = scrapers.get_scraper(marketplace)
-        products = scraper.scrape()
-        logger_task.info(f"Scraped {len(products)} products from {marketplace}")
-        return {"status": "success", "count": len(products)}
+        chunks = [
+            scrape_chunk.s(marketplace, category, start_page, end_page)
+            for category in categories
+            for start_page, end_page in page_ranges(settings.scrape_max_pages, settings.scrape_pages_per_chunk)
+        ]
+        chord(group(chunks))(finalize_scrape.s(marketplace))
+        logger_task.info("Dispatched %s scrape chunks for %s", len(chunks), marketplace)
+        return {"status": "dispatched", "chunks": len(chunks)}
     except Exception as e:
-        logger_task.error(f"Error scraping {marketplace}: {str(e)}")
+        logger_task.error("Error scraping %s: %s", marketplace, e)
+        _record_marketplace_failure(marketplace, categories, str(e))
         return {"status": "error", "message": str(e)}
 
 
 @shared_task
-def analyze_trends_task():
-    """Analyze trends from collected products"""
-    logger_task.info("Starting trend analysis")
+def scrape_chunk(marketplace: str, category: str, start_page: int, end_page: int):
+    """Scrape and store one page range of one marketplace category"""
+    chunk = {"marketplace": marketplace, "category": category, "pages": [start_page, end_page]}
+    db = SessionLocal()
+    scraper = None
+    try:
+        from app.scrapers.base import get_scraper
+        from app.scrapers.ingestion import upsert_products
+        kwargs = {"store_name": settings.shopify_store_name} if marketplace.lower() == "shopify" else {}
+        scraper = get_scraper(marketplace, **kwargs)
+        with span("fetch") as stage:
+            raw_products = scraper.scrape_pages(category, start_page, end_page)
+            stage.add_rows(len(raw_products))
+        with span("parse") as stage:
+            parsed = [scraper.parse_product(raw) for raw in raw_products]
+            stage.add_rows(len(parsed))
+        with span("write") as stage:
+            stats = upsert_products(db, parsed)
+            stage.add_rows(len(parsed))
+        logger_task.info("Scraped %s products from %s/%s pages %s-%s", len(raw_products), marketplace, category, start_page, end_page)
+        return {**chunk, "status": "success", "count": len(raw_products), **stats}
+    except Exception as e:
+        db.rollback()
+        logger_task.error("Error scraping %s/%s pages %s-%s: %s", marketplace, category, start_page, end_page, e)
+        return {**chunk, "status": "error", "message": str(e)}
+    finally:
+        if scraper is not None:
+            scraper.close()
+        db.close()
+
+
+@shared_task
+def finalize_scrape(results: List[Dict[str, Any]], marketplace: str):
+    """Chord callback summarising all chunks of a marketplace scrape"""
+    errors = [r for r in results if r.get("status") != "success"]
+    summary = {
+        "status": "success" if not errors else "partial" if len(errors) < len(results) else "error",
+        "chunks": len(results),
+        "failed_chunks": len(errors),
+    }
+    for key in ("count", "inserted", "updated", "unchanged", "skipped"):
+        summary[key] = sum(r.get(key, 0) for r in results)
+
+    category_stats = {}
+    for r in results:
+        stats = category_stats.setdefault(r["category"], {"count": 0, "changed": 0, "failed": False})
+        if r.get("status") == "success":
+            stats["count"] += r.get("count", 0)
+            stats["changed"] += r.get("inserted", 0) + r.get("updated", 0)
+        else:
+            stats["failed"] = True
+
+    if summary["status"] == "error":
+        _record_marketplace_failure(marketplace, list(category_stats), errors[0].get("message", "all chunks failed"))
+    else:
+        db = SessionLocal()
+        try:
+            from app.scrapers.scheduling import record_scrape_result
+            record_scrape_result(_get_or_create_marketplace(db, marketplace), category_stats, datetime.utcnow())
+            db.commit()
+        finally:
+            db.close()
+
+    logger_task.info("Finished scrape for %s: %s", marketplace, summary)
+    return summary
+
+
+def _get_or_create_marketplace(db, name: str) -> Marketplace:
+    marketplace = db.query(Marketplace).filter(Marketplace.name == name).first()
+    if not marketplace:
+        marketplace = Marketplace(name=name, status="active", consecutive_failures=0)
+        db.add(marketplace)
+        db.flush()
+    return marketplace
+
+
+def _record_marketplace_failure(name: str, categories: List[str], message: str):
+    db = SessionLocal()
+    try:
+        from app.scrapers.scheduling import record_scrape_failure
+        record_scrape_failure(_get_or_create_marketplace(db, name), categories, message, datetime.utcnow())
+        db.commit()
+    except Exception as e:
+        logger_task.error("Error recording scrape failure for %s: %s", name, e)
+    finally:
+        db.close()
+
+
+@shared_task
+def dispatch_due_scrapes():
+    """Beat entry point: start scrapes for marketplaces whose next_scrape has passed"""
+    from app.scrapers.scheduling import due_categories, record_dispatch
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        for name in settings.scrape_marketplaces:
+            _get_or_create_marketplace(db, name)
+        db.commit()
+
+        marketplaces = (
+            db.query(Marketplace)
+            .filter(
+                Marketplace.name.in_(settings.scrape_marketplaces),
+                Marketplace.status != "paused",
+                or_(Marketplace.next_scrape == None, Marketplace.next_scrape <= now),
+            )
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        due = []
+        for marketplace in marketplaces:
+            categories = due_categories(marketplace, now)
+            record_dispatch(marketplace, categories, now)
+            if categories:
+                due.append((marketplace.name, categories))
+        # Commit the pushed-out schedule before any scrape can report back
+        db.commit()
+
+        dispatched = []
+        for name, categories in due:
+            # Random start offset keeps marketplaces that became due together from starting together
+            countdown = random.uniform(0, settings.scrape_dispatch_jitter_seconds)
+            if enqueue_unique(scrape_marketplace, (name, categories), countdown=countdown):
+                dispatched.append(name)
+
+        if dispatched:
+            logger_task.info("Dispatched scrapes for %s", dispatched)
+        return {"status": "success", "dispatched": dispatched}
+    except Exception as e:
+        db.rollback()
+        logger_task.error("Error dispatching scrapes: %s", e)
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+
+
+@shared_task
+def index_products_task(batch_size: int = 1000):
+    """Backfill near-duplicate signatures for products ingested before dedup existed"""
+    logger_task.info("Starting dedup backfill")
+    db = SessionLocal()
+    try:
+        from app.analysis.dedup import index_unsigned_products
+        stats = index_unsigned_products(db, batch_size)
+        logger_task.info("Dedup backfill finished: %s", stats)
+        return {"status": "success", **stats}
+    except Exception as e:
+        db.rollback()
+        logger_task.error("Error indexing products: %s", e)
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+
+
+@shared_task
+def index_product_tags_task(batch_size: int = 1000):
+    """Rebuild the product_tags index for products ingested before it existed"""
+    logger_task.info("Starting tag index backfill")
+    db = SessionLocal()
+    try:
+        from app.analysis.tags import backfill_product_tags
+        stats = backfill_product_tags(db, batch_size)
+        logger_task.info("Tag index backfill finished: %s", stats)
+        return {"status": "success", **stats}
+    except Exception as e:
+        db.rollback()
+        logger_task.error("Error indexing tags: %s", e)
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+
+@shared_task
+def archive_stale_products_task(days: float = None):
+    """Move products that have not been scraped for a while out of the products table"""
+    logger_task.info("Starting stale product archival")
     db = SessionLocal()
     try:
-        trends = analyze_trends(db)
-        logger_task.info(f"Analyzed {len(trends)} trends")
-        return {"status": "success", "trend_count": len(trends)}
+        from app.scrapers.ingestion import archive_stale_products
+        stats = archive_stale_products(db, days)
+        logger_task.info("Stale product archival finished: %s", stats)
+        return {"status": "success", **stats}
     except Exception as e:
-        logger_task.error(f"Error analyzing trends: {str(e)}")
+        db.rollback()
+        logger_task.error("Error archiving products: %s", e)
         return {"status": "error", "message": str(e)}
     finally:
         db.close()
 
 
 @shared_task
-def generate_designs_task(trend_id: int):
-    """Generate designs for a specific trend"""
-    logger_task.info(f"Generating designs for trend {trend_id}")
+def backfill_raw_data_task():
+    """One-off: move raw data still in the legacy products.raw_data column to the blob store"""
+    logger_task.info("Starting raw data backfill")
     db = SessionLocal()
     try:
-        from app.ai.design_generator import DesignGenerator
-        generator = DesignGenerator()
-        designs = generator.generate_for_trend(trend_id, db)
-        logger_task.info(f"Generated {len(designs)} designs for trend {trend_id}")
-        return {"status": "success", "design_count": len(designs)}
+        from app.scrapers.ingestion import backfill_raw_data
+        stats = backfill_raw_data(db)
+        logger_task.info("Raw data backfill finished: %s", stats)
+        return {"status": "success", **stats}
     except Exception as e:
-        logger_task.error(f"Error generating designs: {str(e)}")
+        db.rollback()
+        logger_task.error("Error backfilling raw data: %s", e)
         return {"status": "error", "message": str(e)}
     finally:
         db.close()
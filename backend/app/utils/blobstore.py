@@ -0,0 +1,108 @@
+from typing import Any, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from app.config import get_settings
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+settings = get_settings()
+
+_codec = threading.local()  # zstd contexts are not thread-safe
+
+
+def _compressor():
+    if not hasattr(_codec, "compressor"):
+        import zstandard
+        _codec.compressor = zstandard.ZstdCompressor(level=settings.blob_compression_level)
+        _codec.decompressor = zstandard.ZstdDecompressor()
+    return _codec.compressor
+
+
+def document_key(document: Any) -> Tuple[str, bytes]:
+    """Content address (sha256 hex) and canonical JSON bytes of a document"""
+    data = json.dumps(document, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.sha256(data).hexdigest(), data
+
+
+def compress(data: bytes) -> bytes:
+    return _compressor().compress(data)
+
+
+def decompress(blob: bytes) -> bytes:
+    _compressor()
+    return _codec.decompressor.decompress(blob)
+
+
+class LocalBlobStore:
+    """Blobs as files under root, fanned out by the first bytes of the key"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    def put_many(self, blobs: Dict[str, bytes]):
+        for key, blob in blobs.items():
+            path = self.path(key)
+            if path.exists():
+                continue  # same key, same content
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+
+class S3BlobStore:
+    """Blobs as objects in an S3 (or S3-compatible) bucket"""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None):
+        import boto3
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def put_many(self, blobs: Dict[str, bytes]):
+        def put(item):
+            key, blob = item
+            self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=blob)
+
+        with ThreadPoolExecutor(max_workers=min(len(blobs), 16) or 1) as pool:
+            list(pool.map(put, blobs.items()))
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+
+@lru_cache()
+def get_blob_store():
+    """Configured store for raw scrape payloads"""
+    if settings.blob_store_backend == "s3":
+        return S3BlobStore(settings.blob_store_bucket, settings.blob_store_prefix, settings.blob_store_endpoint_url)
+    return LocalBlobStore(settings.blob_store_path)
+
+
+def put_documents(documents: Dict[str, bytes]):
+    """Store canonical JSON documents by key, compressed; existing keys are not rewritten"""
+    if documents:
+        get_blob_store().put_many({key: compress(data) for key, data in documents.items()})
+
+
+def get_document(key: str) -> Optional[Any]:
+    blob = get_blob_store().get(key)
+    return json.loads(decompress(blob)) if blob is not None else None
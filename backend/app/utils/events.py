@@ -0,0 +1,168 @@
+from typing import List, Dict, Any, Optional, Set
+from app.config import get_settings
+from app.utils.locks import KEY_PREFIX
+from app.utils.redis_client import get_redis
+import asyncio
+import json
+import logging
+
+settings = get_settings()
+
+logger_events = logging.getLogger("pod_trends.events")
+
+EVENTS_CHANNEL = f"{KEY_PREFIX}:events"
+TOPICS = ("trend", "design")
+
+
+def trend_event(trend, change: str = "updated") -> Dict[str, Any]:
+    return {
+        "topic": "trend",
+        "type": change,
+        "id": trend.id,
+        "niche": trend.niche,
+        "category": trend.category,
+        "overall_score": trend.overall_score,
+        "season_trend": trend.season_trend,
+    }
+
+
+def design_event(design, change: str = "updated", category: Optional[str] = None) -> Dict[str, Any]:
+    # Subscribers filter designs by their trend's category
+    if category is None and design.trend is not None:
+        category = design.trend.category
+    return {
+        "topic": "design",
+        "type": change,
+        "id": design.id,
+        "trend_id": design.trend_id,
+        "category": category,
+        "status": design.status,
+        "title": design.title,
+    }
+
+
+def publish_events(events: List[Dict[str, Any]]) -> int:
+    """Publish change events to Redis in one round trip; never fails the caller"""
+    if not events or not settings.events_enabled:
+        return 0
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for event in events:
+            pipe.publish(EVENTS_CHANNEL, json.dumps(event, default=str))
+        pipe.execute()
+        return len(events)
+    except Exception as e:
+        logger_events.warning("Could not publish %s events: %s", len(events), e)
+        return 0
+
+
+class EventFilter:
+    """Per-subscriber topic filter: trend_id, category and design status"""
+
+    def __init__(self, topics: Optional[List[str]] = None, trend_id: Optional[int] = None,
+                 category: Optional[str] = None, design_status: Optional[str] = None):
+        self.topics = set(topics or TOPICS)
+        self.trend_id = trend_id
+        self.category = category
+        self.design_status = design_status
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        topic = event.get("topic")
+        if topic not in self.topics:
+            return False
+        if self.trend_id is not None:
+            owner = event.get("id") if topic == "trend" else event.get("trend_id")
+            if owner != self.trend_id:
+                return False
+        if self.category and event.get("category") != self.category:
+            return False
+        if self.design_status and topic == "design" and event.get("status") != self.design_status:
+            return False
+        return True
+
+
+class Subscription:
+    """Pending events of one client, coalesced to the latest state per (topic, id)"""
+
+    def __init__(self, event_filter: EventFilter):
+        self.filter = event_filter
+        self.pending: Dict[tuple, Dict[str, Any]] = {}
+        self.overflowed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, event: Dict[str, Any]):
+        if not self.filter.matches(event):
+            return
+        key = (event["topic"], event.get("id"))
+        if key not in self.pending and len(self.pending) >= settings.events_max_pending:
+            # A client this far behind is told to refetch instead of buffering without bound
+            self.pending.clear()
+            self.overflowed = True
+        self.pending[key] = event
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> Optional[List[Dict[str, Any]]]:
+        """Wait for events, let a burst settle, then return it; None on timeout"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        await asyncio.sleep(settings.events_coalesce_ms / 1000)
+        batch, self.pending = list(self.pending.values()), {}
+        self._ready.clear()
+        if self.overflowed:
+            self.overflowed = False
+            return [{"topic": "resync", "type": "resync"}]
+        return batch
+
+
+class EventBroker:
+    """One Redis subscription per API process, fanned out to every connected client"""
+
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, event_filter: EventFilter) -> Subscription:
+        subscription = Subscription(event_filter)
+        self.subscribers.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def dispatch(self, event: Dict[str, Any]):
+        for subscription in list(self.subscribers):
+            subscription.offer(event)
+
+    async def _listen(self):
+        from app.utils.redis_client import get_async_redis
+
+        delay = 1.0
+        while self.subscribers:
+            pubsub = None
+            try:
+                pubsub = get_async_redis().pubsub()
+                await pubsub.subscribe(EVENTS_CHANNEL)
+                delay = 1.0
+                while self.subscribers:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message["type"] == "message":
+                        self.dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger_events.warning("Event subscription failed, retrying in %.0fs: %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+
+broker = EventBroker()
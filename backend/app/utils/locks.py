@@ -0,0 +1,106 @@
+from typing import Optional, Dict, Any, Tuple
+from app.utils.redis_client import get_redis
+import hashlib
+import json
+import threading
+import uuid
+
+KEY_PREFIX = "pod_trends"
+
+# Only the holder of the token may extend or delete the lock
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLock:
+    """Lease-based distributed lock; a crashed holder's lease simply expires"""
+
+    def __init__(self, name: str, ttl_seconds: int, client=None):
+        self.key = f"{KEY_PREFIX}:lock:{name}"
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.client = client or get_redis()
+
+    def acquire(self, token: Optional[str] = None) -> Optional[str]:
+        """Take the lock and return its token, or None if someone else holds it"""
+        token = token or uuid.uuid4().hex
+        if self.client.set(self.key, token, nx=True, px=self.ttl_ms):
+            return token
+        return None
+
+    def renew(self, token: str) -> bool:
+        """Extend the lease; False means the lease was lost"""
+        return bool(self.client.eval(_RENEW_SCRIPT, 1, self.key, token, self.ttl_ms))
+
+    def release(self, token: str) -> bool:
+        return bool(self.client.eval(_RELEASE_SCRIPT, 1, self.key, token))
+
+    def keep_alive(self, token: str) -> "LeaseRenewer":
+        """Context manager renewing the lease in the background while work runs"""
+        return LeaseRenewer(self, token)
+
+
+class LeaseRenewer:
+    """Background thread renewing a RedisLock lease every third of its TTL"""
+
+    def __init__(self, lock: RedisLock, token: str):
+        self.lock = lock
+        self.token = token
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        interval = self.lock.ttl_ms / 3000
+        while not self._stop.wait(interval):
+            try:
+                if not self.lock.renew(self.token):
+                    self.lost = True
+                    return
+            except Exception:
+                # Transient Redis errors: the next tick retries before the lease runs out
+                continue
+
+    def __enter__(self) -> "LeaseRenewer":
+        self.lock.renew(self.token)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def _pending_key(task_name: str, args: Tuple, kwargs: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(json.dumps([list(args), kwargs], sort_keys=True, default=str).encode()).hexdigest()
+    return f"{KEY_PREFIX}:pending:{task_name}:{digest}"
+
+
+def enqueue_unique(task, args: Tuple = (), kwargs: Dict[str, Any] = None, ttl_seconds: int = 60 * 60, **options) -> bool:
+    """Send a task unless an identical one is already waiting in the queue"""
+    kwargs = kwargs or {}
+    key = _pending_key(task.name, args, kwargs)
+    if not get_redis().set(key, 1, nx=True, ex=ttl_seconds):
+        return False
+    try:
+        task.apply_async(args, kwargs, **options)
+    except Exception:
+        get_redis().delete(key)
+        raise
+    return True
+
+
+def clear_pending(task_name: str, args: Tuple = (), kwargs: Dict[str, Any] = None):
+    """Called when a task starts so the next identical trigger can be queued"""
+    get_redis().delete(_pending_key(task_name, args, kwargs or {}))
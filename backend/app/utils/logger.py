@@ -1,19 +1,159 @@
+from typing import Optional
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from app.config import get_settings
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
-from app.config import get_settings
 
 settings = get_settings()
 
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a share of the DEBUG and INFO records of chosen loggers and their children
+
+    Warnings and errors always pass. A kept record carries its sample_rate, so
+    counts can be scaled back up downstream.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates)
+
+    def rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        if rate >= 1.0:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class NonBlockingHandler(QueueHandler):
+    """Hands records to the writer thread; never formats them, and waits on a full queue only for warnings
+
+    Messages are %-formatted by the writer, so pass values rather than objects
+    the caller mutates afterwards. DEBUG and INFO records that do not fit in
+    the queue are dropped and counted. Warnings and errors wait up to
+    block_timeout for room, then are written synchronously through overflow.
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow: Optional[logging.Handler] = None,
+                 block_timeout: float = 0.1):
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:  # render the traceback now instead of keeping its frames alive
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.put(record, timeout=self.block_timeout)
+                return
+            except queue.Full:
+                if self.overflow is not None:
+                    self.overflow.handle(record)  # serialized with the writer thread by the handler lock
+                    return
+        self.dropped += 1
+        from app.utils.metrics import LOG_RECORDS_DROPPED
+        LOG_RECORDS_DROPPED.labels(record.name).inc()
+
+
+def _writer() -> logging.Handler:
+    stream = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "text":
+        stream.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    else:
+        stream.setFormatter(JsonFormatter())
+    return stream
+
+
+def _start_listener():
+    global listener
+    listener = QueueListener(handler.queue, writer, respect_handler_level=True)
+    listener.start()
+
+
+def _after_fork():
+    # The child has no writer thread, and the inherited queue's lock may be held
+    handler.queue = queue.Queue(maxsize=settings.log_queue_size)
+    _start_listener()
+
+
+def flush():
+    """Block until every queued record has been written"""
+    handler.queue.join()
+
+
+def _stop_listener():
+    try:
+        listener.stop()  # writes what is still queued
+    except queue.Full:
+        pass  # no room for the stop sentinel; the daemon thread dies with the process
+
+
 # Create logger
 logger = logging.getLogger("pod_trends")
-logger.setLevel(logging.DEBUG if settings.debug else logging.INFO)
-
-# Console handler
-handler = logging.StreamHandler(sys.stdout)
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-handler.setFormatter(formatter)
+logger.setLevel(settings.log_level.upper() or (logging.DEBUG if settings.debug else logging.INFO))
+logger.propagate = False  # a root handler (Celery's) would write synchronously again
+
+writer = _writer()
+handler = NonBlockingHandler(queue.Queue(maxsize=settings.log_queue_size), overflow=writer)
+handler.addFilter(SamplingFilter(settings.log_sample_rates))
 logger.addHandler(handler)
+listener: QueueListener
+_start_listener()
+atexit.register(_stop_listener)
+os.register_at_fork(after_in_child=_after_fork)  # Celery prefork children
 
 export = logger
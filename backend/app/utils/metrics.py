@@ -0,0 +1,240 @@
+from typing import Optional, Dict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from app.config import get_settings
+import logging
+import os
+import time
+
+settings = get_settings()
+
+logger_metrics = logging.getLogger("pod_trends.metrics")
+
+# prometheus_client picks its value store at import, so the directory must be in the environment first
+if settings.prometheus_multiproc_dir:
+    os.makedirs(settings.prometheus_multiproc_dir, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = settings.prometheus_multiproc_dir
+
+try:
+    import prometheus_client
+except ImportError:  # metrics become no-ops without the optional dependency
+    prometheus_client = None
+
+
+@dataclass
+class WorkStats:
+    """SQL and row accounting for the task or request running in this context"""
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    sql_seconds: float = 0.0
+    stage_rows: Dict[str, int] = field(default_factory=dict)
+    statements: Dict[str, int] = field(default_factory=dict)
+    statement_seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+current_stats: ContextVar[Optional[WorkStats]] = ContextVar("current_stats", default=None)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, *args, **kwargs):
+        pass
+
+    def inc(self, *args, **kwargs):
+        pass
+
+    def set(self, *args, **kwargs):
+        pass
+
+
+def _metric(kind: str, name: str, documentation: str, labels, **kwargs):
+    if prometheus_client is None or not settings.metrics_enabled:
+        return _NoopMetric()
+    return getattr(prometheus_client, kind)(name, documentation, labels, **kwargs)
+
+
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+TASK_DURATION = _metric("Histogram", "pod_trends_task_duration_seconds", "Celery task wall time", ["task", "state"])
+TASK_QUERIES = _metric("Histogram", "pod_trends_task_sql_queries", "SQL statements per Celery task", ["task"],
+                       buckets=QUERY_COUNT_BUCKETS)
+STAGE_DURATION = _metric("Histogram", "pod_trends_stage_duration_seconds", "Pipeline stage wall time", ["stage"])
+STAGE_THROUGHPUT = _metric("Gauge", "pod_trends_stage_rows_per_second", "Rows per second of the last stage run", ["stage"])
+ROWS_PROCESSED = _metric("Counter", "pod_trends_rows_processed_total", "Rows processed per pipeline stage", ["stage"])
+REQUEST_DURATION = _metric("Histogram", "pod_trends_request_duration_seconds", "HTTP request latency per route",
+                           ["route", "method", "status"])
+REQUEST_QUERIES = _metric("Histogram", "pod_trends_request_sql_queries", "SQL statements per HTTP request", ["route"],
+                          buckets=QUERY_COUNT_BUCKETS)
+LOG_RECORDS_DROPPED = _metric("Counter", "pod_trends_log_records_dropped_total",
+                              "Log records dropped because the log queue was full", ["logger"])
+SQL_DURATION = _metric("Histogram", "pod_trends_sql_duration_seconds", "SQL statement duration", ["operation"],
+                       buckets=SQL_BUCKETS)
+
+_tracer = None
+
+
+def _multiprocess_registry():
+    """Registry merging every process's files when PROMETHEUS_MULTIPROC_DIR is set, else None"""
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return None
+    from prometheus_client import CollectorRegistry, multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def setup_tracing(service_name: str):
+    """Export spans over OTLP when an endpoint is configured and OpenTelemetry is installed"""
+    global _tracer
+    if not settings.otel_exporter_endpoint or _tracer is not None:
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        logger_metrics.warning("OTEL_EXPORTER_ENDPOINT is set but OpenTelemetry is not installed")
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.otel_exporter_endpoint, insecure=True)))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("pod_trends")
+
+
+class Span:
+    """Handle yielded by `span()` to report rows handled by the stage"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def add_rows(self, count: int):
+        self.rows += count
+
+
+@contextmanager
+def span(stage: str):
+    """Time a pipeline stage (fetch, parse, write, score, ...)"""
+    handle = Span()
+    otel_span = _tracer.start_as_current_span(stage) if _tracer else None
+    if otel_span:
+        otel_span.__enter__()
+    started = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.labels(stage).observe(elapsed)
+        if handle.rows:
+            ROWS_PROCESSED.labels(stage).inc(handle.rows)
+            STAGE_THROUGHPUT.labels(stage).set(handle.rows / elapsed if elapsed else 0)
+            stats = current_stats.get()
+            if stats:
+                stats.stage_rows[stage] = stats.stage_rows.get(stage, 0) + handle.rows
+        if otel_span:
+            otel_span.__exit__(None, None, None)
+
+
+def _operation(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+
+
+def instrument_engine(engine):
+    """Count and time every SQL statement executed through the engine"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        SQL_DURATION.labels(_operation(statement)).observe(elapsed)
+        if elapsed * 1000 >= settings.sql_slow_query_ms:
+            logger_metrics.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement[:500])
+        stats = current_stats.get()
+        if stats:
+            stats.queries += 1
+            stats.sql_seconds += elapsed
+            stats.statements[statement] = stats.statements.get(statement, 0) + 1
+            stats.statement_seconds[statement] = stats.statement_seconds.get(statement, 0.0) + elapsed
+
+
+def setup_celery_instrumentation():
+    """Record per-task wall time, SQL counts and throughput via Celery signals"""
+    from celery import signals
+
+    tokens = {}
+
+    @signals.task_prerun.connect(weak=False)
+    def _task_prerun(task_id=None, task=None, **kwargs):
+        tokens[task_id] = current_stats.set(WorkStats())
+
+    @signals.task_postrun.connect(weak=False)
+    def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+        stats = current_stats.get()
+        token = tokens.pop(task_id, None)
+        if token is not None:
+            current_stats.reset(token)
+        if not stats:
+            return
+
+        elapsed = stats.elapsed
+        TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(elapsed)
+        TASK_QUERIES.labels(task.name).observe(stats.queries)
+        if not logger_metrics.isEnabledFor(logging.INFO):
+            return
+        rows = ", ".join(
+            f"{stage}={count} ({count / elapsed:.1f}/s)" for stage, count in stats.stage_rows.items()
+        ) if elapsed else ""
+        logger_metrics.info(
+            "%s %s in %.3fs: %s queries (%.3fs SQL)%s", task.name, state, elapsed, stats.queries,
+            stats.sql_seconds, f", rows {rows}" if rows else "",
+        )
+
+    @signals.worker_init.connect(weak=False)
+    def _start_exporter(sender=None, **kwargs):
+        setup_tracing("pod-trends-worker")
+        if prometheus_client is None or not settings.metrics_port:
+            return
+        directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+        if directory:
+            # Prefork children each write their own files; the parent serves the merged view.
+            # Files left by a previous run would be merged in too, so start from an empty directory.
+            for name in os.listdir(directory):
+                if name.endswith(".db"):
+                    os.remove(os.path.join(directory, name))
+            prometheus_client.start_http_server(settings.metrics_port, registry=_multiprocess_registry())
+            return
+        pool = str(getattr(sender, "pool_cls", ""))
+        if "prefork" in pool or pool == "processes":
+            logger_metrics.warning(
+                "METRICS_PORT is set on a prefork worker without PROMETHEUS_MULTIPROC_DIR; "
+                "task metrics recorded in the pool processes will not be exported"
+            )
+        prometheus_client.start_http_server(settings.metrics_port)
+
+    @signals.worker_process_shutdown.connect(weak=False)
+    def _mark_dead(pid=None, **kwargs):
+        if prometheus_client is not None and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def render_metrics():
+    """Return (body, content type) for a Prometheus scrape"""
+    if prometheus_client is None:
+        return b"", "text/plain"
+    registry = _multiprocess_registry() or prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
@@ -0,0 +1,277 @@
+from typing import Dict, Any, List, Optional
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.config import get_settings
+from app.utils.metrics import WorkStats, current_stats, REQUEST_DURATION, REQUEST_QUERIES
+import asyncio
+import functools
+import io
+import itertools
+import logging
+import random
+import threading
+import time
+
+settings = get_settings()
+
+logger_perf = logging.getLogger("pod_trends.perf")
+
+MAX_TRACKED_QUERIES = 500
+LATENCY_SAMPLES = 512
+
+
+class RouteStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.n_plus_one = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "avg_ms": round(self.total_seconds / self.count * 1000, 2) if self.count else 0,
+            "p95_ms": round(p95 * 1000, 2),
+            "max_ms": round(self.max_seconds * 1000, 2),
+            "avg_queries": round(self.queries / self.count, 2) if self.count else 0,
+            "avg_sql_ms": round(self.sql_seconds / self.count * 1000, 2) if self.count else 0,
+            "n_plus_one_requests": self.n_plus_one,
+        }
+
+
+class PerfStats:
+    """In-process aggregates behind /debug/perf"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes: Dict[str, RouteStats] = {}
+        self.queries: Dict[str, List[float]] = {}  # statement -> [count, seconds, max_per_request]
+        self.profiles = deque(maxlen=20)
+        self._profile_ids = itertools.count(1)
+
+    def record(self, route: str, elapsed: float, stats: WorkStats, repeated: Dict[str, int]):
+        with self._lock:
+            route_stats = self.routes.setdefault(route, RouteStats())
+            route_stats.count += 1
+            route_stats.total_seconds += elapsed
+            route_stats.max_seconds = max(route_stats.max_seconds, elapsed)
+            route_stats.queries += stats.queries
+            route_stats.sql_seconds += stats.sql_seconds
+            route_stats.latencies.append(elapsed)
+            if repeated:
+                route_stats.n_plus_one += 1
+
+            for statement, count in stats.statements.items():
+                entry = self.queries.get(statement)
+                if entry is None:
+                    if len(self.queries) >= MAX_TRACKED_QUERIES:
+                        # Evict the cheapest statement so the table stays bounded
+                        del self.queries[min(self.queries, key=lambda s: self.queries[s][1])]
+                    entry = self.queries[statement] = [0, 0.0, 0]
+                entry[0] += count
+                entry[1] += stats.statement_seconds.get(statement, 0.0)
+                entry[2] = max(entry[2], count)
+
+    def add_profile(self, route: str, elapsed: float, report: str) -> int:
+        with self._lock:
+            profile_id = next(self._profile_ids)
+            self.profiles.append({"id": profile_id, "route": route, "duration_ms": round(elapsed * 1000, 2), "report": report})
+        return profile_id
+
+    def get_profile(self, profile_id: int) -> Optional[Dict[str, Any]]:
+        return next((p for p in list(self.profiles) if p["id"] == profile_id), None)
+
+    def summary(self, limit: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            routes = sorted(self.routes.items(), key=lambda item: item[1].total_seconds, reverse=True)[:limit]
+            queries = sorted(self.queries.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+            return {
+                "routes": [{"route": route, **stats.summary()} for route, stats in routes],
+                "queries": [
+                    {
+                        "statement": statement,
+                        "count": int(count),
+                        "total_ms": round(seconds * 1000, 1),
+                        "avg_ms": round(seconds / count * 1000, 3) if count else 0,
+                        "max_per_request": int(max_per_request),
+                    }
+                    for statement, (count, seconds, max_per_request) in queries
+                ],
+                "profiles": [
+                    {key: value for key, value in profile.items() if key != "report"}
+                    for profile in self.profiles
+                ],
+            }
+
+
+perf_stats = PerfStats()
+
+# Set by the middleware for a sampled request; the endpoint wrapper fills in the report
+current_profile: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_profile", default=None)
+
+# Concurrent profiler sessions clobber each other, so only one request is profiled at a time
+_profile_slot = threading.Lock()
+
+
+class _Profiler:
+    """pyinstrument when installed, cProfile otherwise"""
+
+    def __init__(self, async_mode: bool = False):
+        try:
+            from pyinstrument import Profiler
+            self._profiler = Profiler(async_mode="enabled" if async_mode else "disabled")
+            self._kind = "pyinstrument"
+        except ImportError:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._kind = "cprofile"
+
+    def start(self):
+        self._profiler.enable() if self._kind == "cprofile" else self._profiler.start()
+
+    def stop(self) -> str:
+        if self._kind == "pyinstrument":
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True, color=False)
+
+        import pstats
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
+
+
+@contextmanager
+def _profiling(async_mode: bool = False):
+    capture = current_profile.get()
+    profiler = None
+    if capture is not None and capture["report"] is None:
+        try:
+            profiler = _Profiler(async_mode)
+            profiler.start()
+        except Exception as e:
+            logger_perf.warning("Could not start the profiler: %s", e)
+            profiler = None
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if profiler:
+            capture["report"] = profiler.stop()
+            capture["seconds"] = time.perf_counter() - started
+
+
+def _profiled(call):
+    """Wrap an endpoint so a sampled request is profiled in the thread that runs it"""
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def run_async(*args, **kwargs):
+            with _profiling(async_mode=True):
+                return await call(*args, **kwargs)
+        run_async.profiled = True
+        return run_async
+
+    @functools.wraps(call)
+    def run(*args, **kwargs):
+        with _profiling():
+            return call(*args, **kwargs)
+    run.profiled = True
+    return run
+
+
+def profile_endpoints(routes):
+    """Make sampled profiles cover the endpoints themselves
+
+    Sync endpoints run in the threadpool, so a profiler started in the middleware
+    on the event loop thread only ever sees the await on the worker thread.
+    """
+    from fastapi.routing import APIRoute
+
+    for route in routes:
+        if isinstance(route, APIRoute) and not getattr(route.dependant.call, "profiled", False):
+            route.dependant.call = _profiled(route.dependant.call)
+
+
+class PerfMiddleware:
+    """Pure ASGI middleware: per-route latency, SQL per request, N+1 detection and sampled profiling"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Optional[Dict[Any, str]] = None
+
+    def _route_name(self, scope) -> str:
+        if self._route_paths is None:
+            fastapi_app = scope.get("app")
+            routes = getattr(fastapi_app, "routes", []) if fastapi_app else []
+            self._route_paths = {route.endpoint: route.path for route in routes if hasattr(route, "endpoint")}
+        endpoint = scope.get("endpoint")
+        return self._route_paths.get(endpoint, "unmatched")
+
+    def _wants_profile(self, scope) -> bool:
+        if settings.perf_profile_sample_rate and random.random() < settings.perf_profile_sample_rate:
+            return True
+        if not settings.perf_debug_enabled:
+            return False
+        header = settings.perf_profile_header.lower().encode()
+        return any(name == header for name, _ in scope.get("headers", []))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = WorkStats()
+        token = current_stats.set(stats)
+        capture = None
+        if self._wants_profile(scope) and _profile_slot.acquire(blocking=False):
+            capture = {"report": None, "seconds": 0.0}
+        profile_token = current_profile.set(capture)
+        status = {"code": 500}
+        profile_id = {"value": None}
+
+        def save_profile():
+            if capture and capture["report"] is not None and profile_id["value"] is None:
+                profile_id["value"] = perf_stats.add_profile(self._route_name(scope), capture["seconds"], capture["report"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                save_profile()
+                if profile_id["value"] is not None:
+                    message.setdefault("headers", []).append((b"x-profile-id", str(profile_id["value"]).encode()))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_stats.reset(token)
+            current_profile.reset(profile_token)
+            if capture:
+                save_profile()  # a streamed response starts before its endpoint returns
+                _profile_slot.release()
+            self._record(scope, elapsed, stats, status["code"])
+
+    def _record(self, scope, elapsed: float, stats: WorkStats, status_code: int):
+        route = self._route_name(scope)
+        REQUEST_DURATION.labels(route, scope["method"], str(status_code)).observe(elapsed)
+        REQUEST_QUERIES.labels(route).observe(stats.queries)
+
+        repeated = {
+            statement: count for statement, count in stats.statements.items()
+            if count >= settings.perf_n_plus_one_threshold
+        }
+        if repeated:
+            worst, count = max(repeated.items(), key=lambda item: item[1])
+            logger_perf.warning(
+                "Possible N+1 on %s %s: statement ran %s times: %s", scope["method"], route, count, worst[:200]
+            )
+        perf_stats.record(route, elapsed, stats, repeated)
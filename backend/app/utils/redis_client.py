@@ -0,0 +1,16 @@
+from functools import lru_cache
+from app.config import get_settings
+
+
+@lru_cache()
+def get_redis():
+    """Shared Redis client for locks, deduplication keys and pub/sub"""
+    import redis
+    return redis.Redis.from_url(get_settings().redis_url)
+
+
+@lru_cache()
+def get_async_redis():
+    """asyncio Redis client for the API's event subscription"""
+    import redis.asyncio
+    return redis.asyncio.Redis.from_url(get_settings().redis_url)
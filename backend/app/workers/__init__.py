@@ -0,0 +1 @@
+"""Per-role Celery entry points: `celery -A app.workers.<role> worker`"""
@@ -0,0 +1,4 @@
+"""Design generation worker: celery -A app.workers.ai worker"""
+from app.celery_app import configure_worker
+
+celery_app = configure_worker(["ai"])
@@ -0,0 +1,4 @@
+"""Trend analysis and niche clustering worker: celery -A app.workers.analysis worker"""
+from app.celery_app import configure_worker
+
+celery_app = configure_worker(["analysis"])
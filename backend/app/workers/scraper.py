@@ -0,0 +1,4 @@
+"""Scraping and publishing worker: celery -A app.workers.scraper worker"""
+from app.celery_app import configure_worker, DEFAULT_QUEUE
+
+celery_app = configure_worker(["scraping", DEFAULT_QUEUE])
@@ -0,0 +1,184 @@
+"""Rendered-fetch benchmark against local fixture pages
+
+    python -m benchmarks.browser                          # pool sizes 1, 2 and 4, 100 pages each
+    python -m benchmarks.browser --pages 300 --pool-sizes 4 8
+    python -m benchmarks.browser --no-blocking            # compare bytes per page without interception
+
+The fixtures in benchmarks/fixtures are served from a local HTTP server: a
+listing whose products are fetched and rendered by JavaScript, and the same
+listing rendered server-side for the plain HTTP baseline. Images and fonts are
+served with realistic sizes, so the byte counts show what interception saves.
+Memory is the RSS of the whole browser process tree (Linux only).
+"""
+from typing import Dict, List, Any, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PRODUCTS_PER_PAGE = 48
+ASSET_SIZES = {"/img/": 60_000, "/fonts/": 40_000}  # bytes per image and font response
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    bytes_served = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/api/listing":
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            rng = random.Random(page)
+            body = json.dumps([
+                {"id": page * 1000 + i, "title": f"Fixture design {page}-{i}", "price": rng.uniform(5, 40),
+                 "rating": round(rng.uniform(3, 5), 1), "reviews": rng.randint(0, 2000)}
+                for i in range(PRODUCTS_PER_PAGE)
+            ]).encode()
+            self._send(body, "application/json")
+            return
+        for prefix, size in ASSET_SIZES.items():
+            if url.path.startswith(prefix):
+                self._send(b"\0" * size, "application/octet-stream")
+                return
+        path = FIXTURES / url.path.lstrip("/")
+        if path.is_file() and path.parent == FIXTURES:
+            self._send(path.read_bytes(), "text/html; charset=utf-8")
+        else:
+            self.send_error(404)
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with FixtureHandler.lock:
+            FixtureHandler.bytes_served += len(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_fixtures() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def process_tree_rss(root: int) -> Optional[int]:
+    """Resident memory in bytes of a process and all its descendants; None off Linux"""
+    if not os.path.isdir("/proc"):
+        return None
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+def bench_plain(base_url: str, pages: int) -> Dict[str, Any]:
+    from app.scrapers.base import AmazonScraper
+
+    scraper = AmazonScraper()
+    scraper.ready_marker = 'data-product-id="'
+    urls = [f"{base_url}/listing_static.html?page={i}" for i in range(pages)]
+    started = time.perf_counter()
+    html = scraper.fetch_pages(urls)
+    elapsed = time.perf_counter() - started
+    scraper.close()
+    assert all(page and "data-product-id" in page for page in html)
+    return {"pages_per_sec": round(pages / elapsed, 1)}
+
+
+def bench_pool(base_url: str, pages: int, size: int, blocking: bool) -> Dict[str, Any]:
+    from app.scrapers.browser import BrowserPool
+
+    pool = BrowserPool(size=size)
+    if not blocking:
+        pool.blocked_types, pool.blocked_hosts = set(), ()
+    try:
+        pool.start()
+        rss_browser = process_tree_rss(os.getpid())
+        urls = [f"{base_url}/listing_rendered.html?page={i}" for i in range(1, pages + 1)]
+        pool.render_many(urls[:size], "[data-product-id]")  # opens every context
+        rss_contexts = process_tree_rss(os.getpid())
+
+        FixtureHandler.bytes_served = 0
+        blocked = pool.stats["blocked"]
+        started = time.perf_counter()
+        html = pool.render_many(urls, "[data-product-id]")
+        elapsed = time.perf_counter() - started
+        rendered = sum(1 for page in html if page and page.count("data-product-id=") >= PRODUCTS_PER_PAGE)
+        return {
+            "pool_size": size,
+            "pages": pages,
+            "rendered": rendered,
+            "pages_per_sec": round(pages / elapsed, 1),
+            "kb_per_page": round(FixtureHandler.bytes_served / pages / 1024, 1),
+            "blocked_per_page": round((pool.stats["blocked"] - blocked) / pages, 1),
+            "mb_browser": round(rss_browser / 2 ** 20, 1) if rss_browser else None,
+            "mb_per_context": round((rss_contexts - rss_browser) / size / 2 ** 20, 1) if rss_browser else None,
+        }
+    finally:
+        pool.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rendered-fetch benchmark")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--no-blocking", action="store_true", help="Let images, fonts and analytics load")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    server = serve_fixtures()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    report: Dict[str, Any] = {"plain_http": bench_plain(base_url, args.pages), "rendered": []}
+    try:
+        for size in args.pool_sizes:
+            report["rendered"].append(bench_pool(base_url, args.pages, size, not args.no_blocking))
+    except Exception as e:
+        print(f"Rendered fetches unavailable ({str(e).splitlines()[0]}); "
+              f"run `python -m playwright install chromium`", file=sys.stderr)
+        return 2
+    finally:
+        server.shutdown()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"plain HTTP: {report['plain_http']['pages_per_sec']} pages/s")
+        for row in report["rendered"]:
+            print(f"pool={row['pool_size']}: {row['pages_per_sec']} pages/s, {row['rendered']}/{row['pages']} rendered, "
+                  f"{row['kb_per_page']} KB/page, {row['blocked_per_page']} blocked/page, "
+                  f"browser {row['mb_browser']} MB + {row['mb_per_context']} MB/context")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Compare two benchmark result files
+
+    python -m benchmarks.compare base.json head.json --threshold 0.10
+
+Exits non-zero when any case's median got slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(base: dict, head: dict, threshold: float):
+    rows = []
+    regressions = []
+    for case, head_result in head["results"].items():
+        base_result = base["results"].get(case)
+        if case.startswith("_") or not base_result or "median_ms" not in head_result:
+            continue
+        before, after = base_result["median_ms"], head_result["median_ms"]
+        change = (after - before) / before if before else 0.0
+        rows.append((case, before, after, change, base_result.get("queries"), head_result.get("queries")))
+        if change > threshold:
+            regressions.append(case)
+    return rows, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare benchmark results")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed median slowdown (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    base, head = load(args.base), load(args.head)
+    rows, regressions = compare(base, head, args.threshold)
+
+    print(f"base {base['meta']['commit']} vs head {head['meta']['commit']} ({head['meta']['database']})")
+    width = max([len(row[0]) for row in rows] + [4])
+    print(f"{'case':<{width}}  {'base ms':>10}  {'head ms':>10}  {'change':>8}  queries")
+    for case, before, after, change, base_queries, head_queries in rows:
+        flag = "  <-- slower" if case in regressions else ""
+        print(f"{case:<{width}}  {before:>10.3f}  {after:>10.3f}  {change:>+7.1%}  {base_queries}->{head_queries}{flag}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Import-time (cold start) report for the process entry points
+
+    python -m benchmarks.importtime                      # API and every worker entry point
+    python -m benchmarks.importtime main --top 20
+    python -m benchmarks.importtime --budget-ms 1500     # exit 1 if any entry point is slower
+
+Each target is imported in a fresh interpreter with `python -X importtime`;
+the fastest of --repeat runs is reported, so bytecode compilation and a cold
+page cache do not skew the result.
+"""
+from typing import Dict, List, Any
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ENTRY_POINTS = ["main", "app.workers.scraper", "app.workers.analysis", "app.workers.ai"]
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of `-X importtime` output: module, depth, self and cumulative microseconds"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2  # nesting is indented two spaces per level
+        rows.append({"module": name.strip(), "depth": depth, "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return rows
+
+
+def measure_target(target: str) -> List[Dict[str, Any]]:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")  # app.database builds its engine at import time
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def summarize(rows: List[Dict[str, Any]], target: str, top: int) -> Dict[str, Any]:
+    total = next((row["cumulative_us"] for row in rows if row["module"] == target and row["depth"] == 0), 0)
+    packages: Dict[str, int] = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + row["self_us"]
+    return {
+        "total_ms": round(total / 1000, 1),
+        "modules": len(rows),
+        "top_packages": [
+            {"package": name, "ms": round(us / 1000, 1)}
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        "top_modules": [
+            {"module": row["module"], "cumulative_ms": round(row["cumulative_us"] / 1000, 1)}
+            for row in sorted(rows, key=lambda row: row["cumulative_us"], reverse=True)
+            if row["module"].startswith(("app", "main"))
+        ][:top],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time report")
+    parser.add_argument("targets", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when an entry point exceeds this")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for target in args.targets:
+        runs = [summarize(measure_target(target), target, args.top) for _ in range(args.repeat)]
+        report[target] = min(runs, key=lambda run: run["total_ms"])
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for target, summary in report.items():
+            print(f"{target}: {summary['total_ms']} ms, {summary['modules']} modules")
+            print("  heaviest packages (self time): " + ", ".join(
+                f"{p['package']} {p['ms']}" for p in summary["top_packages"]))
+            for module in summary["top_modules"]:
+                print(f"    {module['cumulative_ms']:>8.1f} ms  {module['module']}")
+
+    over = [t for t, s in report.items() if args.budget_ms is not None and s["total_ms"] > args.budget_ms]
+    for target in over:
+        print(f"{target} exceeds the {args.budget_ms} ms cold-start budget", file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Log-call overhead under concurrent load
+
+    python -m benchmarks.logs                              # 8 threads x 5000 calls, 50 us per write
+    python -m benchmarks.logs --threads 32 --sink-latency-us 200
+    python -m benchmarks.logs --sink-latency-us 0          # a fast sink: pure formatting cost
+
+Every case logs the same scrape-sized payload from --threads threads and
+reports the time the calling thread spends per log call (mean and p99), which
+is what a scraper or task loses to logging. The sink stands in for stdout
+and sleeps per write, as a pipe to a slow log collector blocks. The
+synchronous cases are the previous setup (StreamHandler with eager f-strings).
+The queue cases use app.utils.logger: lazy %-formatting, JSON on the writer
+thread, and optional sampling. Queue cases also report records dropped
+because the queue was full.
+"""
+from typing import Dict, List, Any, Callable
+from logging.handlers import QueueListener
+import argparse
+import json
+import logging
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+
+PAYLOAD = {
+    "external_id": "design_1234",
+    "name": "Retro Cat Mom T-Shirt",
+    "sync_product": {
+        "name": "Retro Cat Mom T-Shirt",
+        "description": "Vintage sunset cat design for cat moms. " * 4,
+        "variants": [{"name": f"T-Shirt - {color}", "sku": f"design_1234_tshirt_{color}", "price": 14.99}
+                     for color in ("white", "black", "navy", "sand", "heather")],
+    },
+}
+
+
+class SlowStream:
+    """A stdout stand-in whose writes block like a backed-up pipe"""
+
+    def __init__(self, latency_us: float):
+        self.latency = latency_us / 1_000_000
+        self.writes = 0
+
+    def write(self, text: str):
+        self.writes += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def flush(self):
+        pass
+
+
+def _logger(name: str, handler: logging.Handler, level: int = logging.DEBUG) -> logging.Logger:
+    log = logging.getLogger(f"bench.{name}")
+    log.handlers = [handler]
+    log.setLevel(level)
+    log.propagate = False
+    return log
+
+
+def _run(threads: int, calls: int, emit: Callable[[int], None]) -> Dict[str, Any]:
+    timings: List[List[float]] = [[] for _ in range(threads)]
+
+    def worker(index: int):
+        own = timings[index]
+        for i in range(calls):
+            started = time.perf_counter()
+            emit(i)
+            own.append(time.perf_counter() - started)
+
+    pool = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    flat = sorted(t for own in timings for t in own)
+    return {
+        "calls_per_sec": round(len(flat) / elapsed),
+        "mean_us": round(statistics.mean(flat) * 1e6, 2),
+        "p99_us": round(flat[int(len(flat) * 0.99) - 1] * 1e6, 2),
+    }
+
+
+def bench(threads: int, calls: int, latency_us: float, queue_size: int) -> Dict[str, Dict[str, Any]]:
+    from app.utils.logger import JsonFormatter, NonBlockingHandler, SamplingFilter
+
+    results = {}
+
+    def sync_case(name: str, emit_factory, level=logging.DEBUG):
+        stream = logging.StreamHandler(SlowStream(latency_us))
+        stream.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        log = _logger(name, stream, level)
+        results[name] = _run(threads, calls, emit_factory(log))
+
+    def queue_case(name: str, emit_factory, sample_rate: float = 1.0):
+        sink = logging.StreamHandler(SlowStream(latency_us))
+        sink.setFormatter(JsonFormatter())
+        handler = NonBlockingHandler(queue.Queue(maxsize=queue_size))
+        if sample_rate < 1.0:
+            handler.addFilter(SamplingFilter({f"bench.{name}": sample_rate}))
+        listener = QueueListener(handler.queue, sink, respect_handler_level=True)
+        listener.start()
+        log = _logger(name, handler)
+        row = _run(threads, calls, emit_factory(log))
+        drain_started = time.perf_counter()
+        listener.stop()
+        row["drain_ms"] = round((time.perf_counter() - drain_started) * 1000, 1)
+        row["dropped"] = handler.dropped
+        results[name] = row
+
+    eager = lambda log: lambda i: log.info(f"Product created in Printful: {PAYLOAD} ({i})")
+    lazy = lambda log: lambda i: log.info("Product created in Printful: %s (%s variants, %s)",
+                                          PAYLOAD["external_id"], len(PAYLOAD["sync_product"]["variants"]), i)
+    eager_debug = lambda log: lambda i: log.debug(f"Upserted products: {PAYLOAD} ({i})")
+    lazy_debug = lambda log: lambda i: log.debug("Upserted products: %s (%s)", PAYLOAD, i)
+
+    sync_case("sync f-string payload", eager)
+    sync_case("sync lazy summary", lazy)
+    queue_case("queue lazy summary", lazy)
+    queue_case("queue lazy summary sampled 10%", lazy, sample_rate=0.1)
+    sync_case("disabled debug f-string payload", eager_debug, level=logging.INFO)
+    sync_case("disabled debug lazy payload", lazy_debug, level=logging.INFO)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Log-call overhead benchmark")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=5000, help="Log calls per thread")
+    parser.add_argument("--sink-latency-us", type=float, default=50, help="Time each write to the sink blocks")
+    parser.add_argument("--queue-size", type=int, default=None, help="Default: LOG_QUEUE_SIZE")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")  # app.config is imported through app.utils.logger
+    from app.config import get_settings
+    queue_size = args.queue_size or get_settings().log_queue_size
+    report = bench(args.threads, args.calls, args.sink_latency_us, queue_size)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{args.threads} threads x {args.calls} calls, sink {args.sink_latency_us} us/write, queue {queue_size}")
+        for name, row in report.items():
+            extra = f", drained in {row['drain_ms']} ms, {row['dropped']} dropped" if "dropped" in row else ""
+            print(f"{name:<34} {row['mean_us']:>9.2f} us/call mean {row['p99_us']:>10.2f} us p99 "
+                  f"{row['calls_per_sec']:>9} calls/s{extra}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
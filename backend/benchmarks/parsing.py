@@ -0,0 +1,141 @@
+"""Listing-page parsing benchmark on the recorded fixtures
+
+    python -m benchmarks.parsing                          # every installed backend, 200 pages
+    python -m benchmarks.parsing --pages 500 --workers 1 2 4 8
+    python -m benchmarks.parsing --backends selectolax html.parser
+
+benchmarks/fixtures holds an Amazon and an Etsy search page with the markup the
+scrapers' declared selectors read. Each backend first parses the pages in this
+process (pages/s on one core), then the selectolax-or-configured backend goes
+through the parse pool with each worker count; per-core throughput divides by
+the cores actually available. Every backend must extract the same products as
+BeautifulSoup on html.parser, the reference.
+"""
+from typing import Dict, List, Any, Tuple
+from pathlib import Path
+import argparse
+import json
+import os
+import sys
+import time
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PAGES = {"amazon": "amazon_search.html", "etsy": "etsy_search.html"}
+
+
+def available_backends() -> List[str]:
+    backends = []
+    for backend, module in (("selectolax", "selectolax.parser"), ("lxml", "lxml"), ("html.parser", "html.parser")):
+        try:
+            __import__(module)
+            backends.append(backend)
+        except ImportError:
+            pass
+    return backends
+
+
+def load_pages() -> List[Tuple[Any, str, str]]:
+    """(scraper, page URL, html) per recorded fixture"""
+    from app.scrapers.base import get_scraper
+
+    pages = []
+    for marketplace, name in PAGES.items():
+        scraper = get_scraper(marketplace)
+        pages.append((scraper, scraper.listing_url("print on demand", 1), (FIXTURES / name).read_text()))
+    return pages
+
+
+def bench_inline(fixtures, backend: str, pages: int) -> Dict[str, Any]:
+    from app.scrapers.parsing import parse_listing
+
+    products = 0
+    started = time.perf_counter()
+    for i in range(pages):
+        scraper, url, html = fixtures[i % len(fixtures)]
+        products += len(parse_listing(html, scraper.listing_selector, scraper.listing_fields, url, backend))
+    elapsed = time.perf_counter() - started
+    return {"backend": backend, "pages_per_sec": round(pages / elapsed, 1), "products_per_page": round(products / pages, 1)}
+
+
+def bench_pool(fixtures, backend: str, pages: int, workers: int) -> Dict[str, Any]:
+    from app.scrapers import parsing
+
+    parsing.settings.parse_workers = workers
+    parsing.get_parse_pool.cache_clear()
+    per_scraper = pages // len(fixtures)
+    try:
+        for scraper, url, html in fixtures:  # start the pool processes outside the timing
+            parsing.parse_pages([(url, html)] * (parsing.settings.parse_batch_pages * workers + 1),
+                                scraper.listing_selector, scraper.listing_fields, backend)
+        products = 0
+        started = time.perf_counter()
+        for scraper, url, html in fixtures:
+            for items in parsing.parse_pages([(url, html)] * per_scraper,
+                                             scraper.listing_selector, scraper.listing_fields, backend):
+                products += len(items)
+        elapsed = time.perf_counter() - started
+    finally:
+        if workers > 1:
+            parsing.get_parse_pool().shutdown()
+        parsing.get_parse_pool.cache_clear()
+    total = per_scraper * len(fixtures)
+    cores = min(workers, os.cpu_count() or 1)
+    return {
+        "workers": workers,
+        "pages_per_sec": round(total / elapsed, 1),
+        "pages_per_sec_per_core": round(total / elapsed / cores, 1),
+        "products_per_page": round(products / total, 1),
+    }
+
+
+def check_agreement(fixtures, backends: List[str]) -> List[str]:
+    """Backends whose products differ from html.parser's on any fixture"""
+    from app.scrapers.parsing import parse_listing
+
+    differing = []
+    for backend in backends:
+        for scraper, url, html in fixtures:
+            expected = parse_listing(html, scraper.listing_selector, scraper.listing_fields, url, "html.parser")
+            if parse_listing(html, scraper.listing_selector, scraper.listing_fields, url, backend) != expected:
+                differing.append(backend)
+                break
+    return differing
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Listing-page parsing benchmark")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--backends", nargs="+", default=None, help="Default: every installed backend")
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="Default: 1, 2 and every core")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    backends = args.backends or available_backends()
+    workers = args.workers or sorted({1, 2, os.cpu_count() or 1})
+    fixtures = load_pages()
+    differing = check_agreement(fixtures, backends)
+    report: Dict[str, Any] = {
+        "cores": os.cpu_count(),
+        "page_kb": round(sum(len(html) for _, _, html in fixtures) / len(fixtures) / 1024, 1),
+        "inline": [bench_inline(fixtures, backend, args.pages) for backend in backends],
+        "pool_backend": backends[0],
+        "pool": [bench_pool(fixtures, backends[0], args.pages, count) for count in workers],
+        "differing": differing,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['cores']} cores, {report['page_kb']} KB per page")
+        for row in report["inline"]:
+            print(f"inline {row['backend']}: {row['pages_per_sec']} pages/s, {row['products_per_page']} products/page")
+        for row in report["pool"]:
+            print(f"pool {report['pool_backend']} x{row['workers']}: {row['pages_per_sec']} pages/s, "
+                  f"{row['pages_per_sec_per_core']} pages/s per core")
+    for backend in differing:
+        print(f"{backend} extracts different products than html.parser", file=sys.stderr)
+    return 1 if differing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
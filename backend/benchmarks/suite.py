@@ -0,0 +1,234 @@
+"""Benchmark registry and the core pipeline benchmarks
+
+Imported by benchmarks.run after DATABASE_URL is set, because app.database
+creates its engine at import time.
+"""
+from typing import Callable, Dict, Iterator, Tuple, Any, List
+from dataclasses import dataclass, field
+import statistics
+import time
+
+from app.database import Base, SessionLocal, engine
+from app.utils.metrics import WorkStats, current_stats
+from benchmarks.synthetic import generate_products, seed_products
+
+Case = Tuple[str, Callable[[], Any]]
+
+BENCHMARKS: Dict[str, Callable[["Context"], Iterator[Case]]] = {}
+
+
+def benchmark(name: str):
+    """Register a generator of (case name, callable) pairs"""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+@dataclass
+class Context:
+    products: int
+    categories: int
+    seed: int
+    repeat: int
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def client(self):
+        if "client" not in self.extra:
+            from fastapi.testclient import TestClient
+            import main
+            self.extra["client"] = TestClient(main.app)
+        return self.extra["client"]
+
+
+def reset_database(ctx: Context) -> int:
+    """Recreate all tables and seed the synthetic catalogue"""
+    import app.models  # noqa: F401  (register every table on Base.metadata)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        from app.analysis.tags import backfill_product_tags
+        seeded = seed_products(db, ctx.products, ctx.categories, seed=ctx.seed)
+        backfill_product_tags(db)
+        return seeded
+    finally:
+        db.close()
+
+
+def measure(func: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    """Time a callable; also reports the SQL statements issued by one run"""
+    for _ in range(warmup):
+        func()
+
+    timings: List[float] = []
+    stats = WorkStats()
+    for _ in range(repeat):
+        stats = WorkStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            func()
+        finally:
+            timings.append(time.perf_counter() - started)
+            current_stats.reset(token)
+
+    return {
+        "repeat": repeat,
+        "min_ms": round(min(timings) * 1000, 3),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        "max_ms": round(max(timings) * 1000, 3),
+        "queries": stats.queries,
+    }
+
+
+@benchmark("calculate_trend_scores")
+def bench_calculate_trend_scores(ctx: Context) -> Iterator[Case]:
+    from app.analysis.trends import calculate_trend_scores
+    from app.models import Product
+
+    for size in (100, 1000, 10000):
+        products = [Product(**item) for item in generate_products(size, 1, seed=ctx.seed)]
+        yield f"products={size}", lambda products=products: calculate_trend_scores(products)
+
+
+@benchmark("analyze_trends")
+def bench_analyze_trends(ctx: Context) -> Iterator[Case]:
+    from app.analysis.trends import analyze_trends
+    from app.models import ProductAggregate
+
+    def run(rescore: bool):
+        db = SessionLocal()
+        try:
+            if rescore:  # forget the scored content hashes so every niche is scored again
+                db.query(ProductAggregate).update({ProductAggregate.scored_hash: None})
+                db.commit()
+            analyze_trends(db)
+        finally:
+            db.close()
+
+    yield f"products={ctx.products}", lambda: run(True)
+    yield f"products={ctx.products} unchanged", lambda: run(False)
+
+
+@benchmark("niche_clustering")
+def bench_niche_clustering(ctx: Context) -> Iterator[Case]:
+    from app.analysis.niches import fit_pipeline
+
+    documents = [(item["title"], item["tags"], item["keywords"])
+                 for item in generate_products(ctx.products, ctx.categories, seed=ctx.seed)]
+    pipeline, _ = fit_pipeline(documents)
+    yield f"fit products={ctx.products}", lambda: fit_pipeline(documents)
+    yield "assign batch=500", lambda: pipeline.predict(documents[:500])
+
+
+@benchmark("list_endpoints")
+def bench_list_endpoints(ctx: Context) -> Iterator[Case]:
+    from app.models import Trend
+
+    client = ctx.client
+    category = "retro-cat"
+    db = SessionLocal()
+    top_category = db.query(Trend.category).order_by(Trend.overall_score.desc()).limit(1).scalar() or category
+    db.close()
+
+    def get(url):
+        def run():
+            response = client.get(url)
+            assert response.status_code == 200, response.text
+        return run
+
+    for offset in (0, 1000, 10000):
+        if offset < ctx.products:
+            yield f"products offset={offset}", get(f"/api/v1/products?skip={offset}&limit=50")
+    yield "products marketplace=etsy", get("/api/v1/products?marketplace=etsy&limit=50")
+    yield "products category ilike", get(f"/api/v1/products?category={category}&limit=50")
+    yield "products min_rating=4.5", get("/api/v1/products?min_rating=4.5&limit=50")
+    yield "trends top", get("/api/v1/trends?limit=50")
+    yield "trends min_score=50", get("/api/v1/trends?min_score=50&limit=50")
+    yield "trends category ilike", get(f"/api/v1/trends?category={category}&limit=50")
+    yield "trends top leaderboard", get("/api/v1/trends/top?limit=50")
+    yield "trends top min_score=50", get("/api/v1/trends/top?min_score=50&limit=50")
+    yield "trends top category", get(f"/api/v1/trends/top?category={top_category}&limit=50")
+    yield "trends top marketplace=etsy", get("/api/v1/trends/top?marketplace=etsy&limit=50")
+    yield "designs", get("/api/v1/designs?limit=50")
+    yield "products tag=cat", get("/api/v1/products?tag=cat&limit=50")
+    yield "tags top", get("/api/v1/tags?limit=50")
+    yield "tags cooccurring", get("/api/v1/tags/cat/cooccurring?limit=50")
+
+
+class _FakeImageClient:
+    """Stands in for the OpenAI/Anthropic client so no network calls are made"""
+
+
+@benchmark("design_generation")
+def bench_design_generation(ctx: Context) -> Iterator[Case]:
+    from app.ai.design_generator import DesignGenerator
+    from app.models import Trend
+
+    db = SessionLocal()
+    trend_id = db.query(Trend.id).order_by(Trend.overall_score.desc()).limit(1).scalar()
+    db.close()
+    if trend_id is None:
+        return
+
+    generator = DesignGenerator()
+    generator.client = _FakeImageClient()
+
+    def run():
+        db = SessionLocal()
+        try:
+            for design in generator.generate_for_trend(trend_id, db):
+                generator.generate_image(design.design_prompt)
+        finally:
+            db.close()
+
+    yield "designs_per_trend=3", run
+
+
+@benchmark("bulk_ingestion")
+def bench_bulk_ingestion(ctx: Context) -> Iterator[Case]:
+    from app.scrapers.ingestion import upsert_products
+
+    batch_size = 500
+    counter = {"run": 0}
+
+    def insert_batch():
+        counter["run"] += 1
+        items = list(generate_products(batch_size, ctx.categories, seed=ctx.seed + counter["run"],
+                                       prefix=f"ingest{counter['run']}"))
+        db = SessionLocal()
+        try:
+            upsert_products(db, items)
+        finally:
+            db.close()
+
+    existing = list(generate_products(batch_size, ctx.categories, seed=ctx.seed))
+
+    def update_batch():
+        db = SessionLocal()
+        try:
+            upsert_products(db, existing)
+        finally:
+            db.close()
+
+    yield f"insert batch={batch_size}", insert_batch
+    yield f"re-upsert batch={batch_size}", update_batch
+
+
+def run_suite(ctx: Context, only: List[str] = None) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    setup_started = time.perf_counter()
+    seeded = reset_database(ctx)
+    results["_setup"] = {"seeded_products": seeded, "seconds": round(time.perf_counter() - setup_started, 2)}
+
+    for name, factory in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        for case, func in factory(ctx):
+            results[f"{name}[{case}]"] = measure(func, ctx.repeat)
+            print(f"{name}[{case}]: {results[f'{name}[{case}]']['median_ms']} ms", flush=True)
+
+    return results
@@ -0,0 +1,140 @@
+"""Seeded synthetic marketplace data for benchmarks"""
+from typing import List, Dict, Any, Iterator
+import math
+import random
+
+MARKETPLACES = ["amazon", "etsy", "shopify"]
+
+ADJECTIVES = [
+    "vintage", "retro", "minimalist", "funny", "cute", "boho", "aesthetic", "personalized",
+    "custom", "floral", "witchy", "kawaii", "rustic", "modern", "sarcastic", "cozy",
+]
+SUBJECTS = [
+    "cat", "dog", "mom", "dad", "teacher", "nurse", "coffee", "plant", "mushroom", "frog",
+    "camping", "fishing", "gamer", "book", "skull", "sunflower", "moon", "bee", "dinosaur", "pizza",
+]
+PRODUCT_TYPES = ["t-shirt", "hoodie", "mug", "poster", "tote bag", "sticker", "phone case", "canvas"]
+OCCASIONS = ["birthday gift", "christmas gift", "mothers day", "fathers day", "halloween", "graduation"]
+
+
+def category_names(count: int) -> List[str]:
+    """Deterministic category names such as 'retro-cat-mug'"""
+    names = []
+    for i in range(count):
+        adjective = ADJECTIVES[i % len(ADJECTIVES)]
+        subject = SUBJECTS[(i // len(ADJECTIVES)) % len(SUBJECTS)]
+        product_type = PRODUCT_TYPES[i % len(PRODUCT_TYPES)].replace(" ", "-")
+        suffix = f"-{i // (len(ADJECTIVES) * len(SUBJECTS))}" if i >= len(ADJECTIVES) * len(SUBJECTS) else ""
+        names.append(f"{adjective}-{subject}-{product_type}{suffix}")
+    return names
+
+
+def _price(rng: random.Random) -> float:
+    # Log-normal around ~$22 with a long premium tail
+    return round(min(250.0, max(4.99, rng.lognormvariate(math.log(22), 0.45))), 2)
+
+
+def _rating(rng: random.Random) -> Any:
+    if rng.random() < 0.12:
+        return None  # unrated listing
+    # Beta skewed towards 4.5 stars, like real marketplaces
+    return round(1 + 4 * rng.betavariate(8, 1.6), 1)
+
+
+def _reviews(rng: random.Random) -> int:
+    # Heavy tail: most listings have a handful of reviews, a few have thousands
+    return int(rng.paretovariate(1.3)) - 1 if rng.random() < 0.85 else int(rng.lognormvariate(5, 1.2))
+
+
+def _raw_payload(rng: random.Random, external_id: str, title: str, product_type: str,
+                 tags: List[str], price: float) -> Dict[str, Any]:
+    """A scrape payload of realistic size (1-4 KB of JSON): variants, images, seller and HTML description"""
+    sizes = ["XS", "S", "M", "L", "XL", "2XL", "3XL"][:rng.randint(1, 7)]
+    colors = rng.sample(["black", "white", "navy", "heather grey", "sand", "maroon", "forest", "pink"], rng.randint(1, 5))
+    return {
+        "id": external_id,
+        "title": title,
+        "source": "synthetic",
+        "product_type": product_type,
+        "description_html": "".join(
+            f"<p>{title}. {rng.choice(OCCASIONS).title()} idea, printed on demand and shipped in "
+            f"{rng.randint(2, 7)} days. Tags: {', '.join(tags)}.</p>" for _ in range(rng.randint(2, 5))
+        ),
+        "images": [f"https://img.example.com/{external_id}/{n}_{rng.getrandbits(32):08x}.jpg"
+                   for n in range(rng.randint(3, 8))],
+        "variants": [
+            {"sku": f"{external_id}-{color[:3]}-{size}", "color": color, "size": size,
+             "price": round(price + (2 if size in ("2XL", "3XL") else 0), 2), "available": rng.random() > 0.1}
+            for color in colors for size in sizes
+        ][:24],
+        "seller": {"id": rng.randint(1, 50000), "name": f"shop{rng.randint(1, 50000)}", "rating": round(rng.uniform(3, 5), 2)},
+        "shipping": {"from": rng.choice(["US", "CA", "GB", "DE"]), "days": [rng.randint(2, 4), rng.randint(5, 10)]},
+    }
+
+
+def generate_products(count: int, categories: int = 50, marketplaces: List[str] = None,
+                      seed: int = 42, prefix: str = "bench") -> Iterator[Dict[str, Any]]:
+    """Yield parsed-product dicts (the shape BaseScraper.parse_product returns)"""
+    rng = random.Random(seed)
+    marketplaces = marketplaces or MARKETPLACES
+    names = category_names(categories)
+    # Zipf-like category popularity so some niches are crowded and others sparse
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(names))]
+
+    for i in range(count):
+        category = rng.choices(names, weights)[0]
+        adjective, subject = category.split("-")[:2]
+        product_type = rng.choice(PRODUCT_TYPES)
+        marketplace = rng.choice(marketplaces)
+        title = f"{adjective.title()} {subject.title()} {product_type.title()} {rng.choice(OCCASIONS).title()}"
+        tags = sorted({adjective, subject, product_type, rng.choice(ADJECTIVES), rng.choice(OCCASIONS)})
+        external_id = f"{prefix}-{marketplace}-{i}"
+        price = _price(rng)
+        yield {
+            "marketplace": marketplace,
+            "external_id": external_id,
+            "title": title,
+            "description": f"{title}. Printed on demand.",
+            "category": category,
+            "price": price,
+            "rating": _rating(rng),
+            "reviews_count": _reviews(rng),
+            "sales_count": None,
+            "image_url": f"https://img.example.com/{external_id}.jpg",
+            "product_url": f"https://{marketplace}.example.com/p/{external_id}",
+            "tags": tags,
+            "keywords": None,
+            # A separate generator, so the payload does not shift the seeded field values
+            "raw_data": _raw_payload(random.Random(seed * 1_000_003 + i), external_id, title, product_type, tags, price),
+        }
+
+
+def _insert(db, batch: List[Dict[str, Any]]):
+    from app.models import Product
+    from app.utils.blobstore import document_key, put_documents
+
+    # Bulk inserts bypass Product.raw_data, so the payloads are stored here
+    documents = {}
+    for item in batch:
+        key, data = document_key(item.pop("raw_data"))
+        item["raw_data_ref"] = key
+        documents[key] = data
+    put_documents(documents)
+    db.bulk_insert_mappings(Product, batch)
+    db.commit()
+
+
+def seed_products(db, count: int, categories: int = 50, seed: int = 42, batch_size: int = 2000) -> int:
+    """Bulk insert synthetic products; returns the number inserted"""
+    batch = []
+    inserted = 0
+    for item in generate_products(count, categories, seed=seed):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            _insert(db, batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        _insert(db, batch)
+        inserted += len(batch)
+    return inserted
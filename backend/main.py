@@ -1,8 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
 from app.api import api_router
+from app.api import debug
 from app.utils.logger import logger
+from app.utils.metrics import render_metrics, setup_tracing
+from app.utils.perf import PerfMiddleware, profile_endpoints
 
 settings = get_settings()
 
@@ -22,17 +25,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, SQL per request and sampled profiling
+app.add_middleware(PerfMiddleware)
+
 # Health check
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "environment": settings.environment}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # Include API routes
 app.include_router(api_router)
+app.include_router(debug.router, prefix="/debug", tags=["debug"], include_in_schema=False)
+profile_endpoints(app.routes)
 
 @app.on_event("startup")
 async def startup_event():
-    logger.info(f"Starting application in {settings.environment} mode")
+    logger.info("Starting application in %s mode", settings.environment)
+    setup_tracing("pod-trends-api")
 
 @app.on_event("shutdown")
 async def shutdown_event():
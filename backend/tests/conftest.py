@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# app.config reads these at import; keep the tests off any real database or broker
+_tmp = tempfile.mkdtemp(prefix="pod_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("BLOB_STORE_PATH", os.path.join(_tmp, "blobs"))
+os.environ.setdefault("EVENTS_ENABLED", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
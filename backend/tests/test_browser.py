@@ -0,0 +1,118 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+from app.scrapers.browser import BrowserPool
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.url = None
+
+    async def goto(self, url, wait_until=None):
+        await asyncio.sleep(0)
+        if not self.browser.connected:
+            raise RuntimeError("Target page, context or browser has been closed")
+        self.url = url
+
+    async def wait_for_selector(self, selector, state=None):
+        pass
+
+    async def wait_for_load_state(self, state=None):
+        pass
+
+    async def content(self):
+        return f"<html>{self.url}</html>"
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def new_page(self):
+        return FakePage(self.browser)
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        return FakeContext(self)
+
+    async def close(self):
+        self.closed = True
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+        self.chromium = types.SimpleNamespace(launch=self.launch)
+
+    async def launch(self, **kwargs):
+        await asyncio.sleep(0.01)  # let every slot that found the browser dead reach the launch
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    fake = FakePlaywright()
+
+    class Starter:
+        async def start(self):
+            return fake
+
+    module = types.ModuleType("playwright.async_api")
+    module.async_playwright = Starter
+    monkeypatch.setitem(sys.modules, "playwright", types.ModuleType("playwright"))
+    monkeypatch.setitem(sys.modules, "playwright.async_api", module)
+    return fake
+
+
+@pytest.fixture
+def pool(playwright):
+    pool = BrowserPool(size=4, context_max_pages=50)
+    yield pool
+    pool.close()
+
+
+def test_render_many_keeps_order(pool, playwright):
+    urls = [f"https://example.com/search?page={page}" for page in range(10)]
+    assert pool.render_many(urls) == [f"<html>{url}</html>" for url in urls]
+    assert pool.stats["launches"] == 1
+    assert pool.stats["contexts"] == 4
+
+
+def test_dead_browser_is_relaunched_once_and_closed(pool, playwright):
+    urls = [f"https://example.com/search?page={page}" for page in range(8)]
+    pool.render_many(urls)
+    crashed = playwright.browsers[0]
+    crashed.connected = False
+
+    assert pool.render_many(urls) == [f"<html>{url}</html>" for url in urls]
+    assert pool.stats["launches"] == 2
+    assert len(playwright.browsers) == 2
+    assert crashed.closed
+    assert not playwright.browsers[1].closed
@@ -0,0 +1,45 @@
+import logging
+import queue
+import threading
+
+from app.utils.logger import NonBlockingHandler
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _record(level: int, message: str) -> logging.LogRecord:
+    return logging.LogRecord("pod_trends.test", level, __file__, 1, message, (), None)
+
+
+def test_full_queue_drops_info_but_writes_warnings_synchronously():
+    overflow = Collect()
+    handler = NonBlockingHandler(queue.Queue(maxsize=1), overflow=overflow, block_timeout=0.01)
+
+    handler.handle(_record(logging.INFO, "fills the queue"))
+    handler.handle(_record(logging.INFO, "dropped"))
+    handler.handle(_record(logging.DEBUG, "dropped too"))
+    handler.handle(_record(logging.WARNING, "kept"))
+    handler.handle(_record(logging.ERROR, "kept too"))
+
+    assert handler.dropped == 2
+    assert [r.getMessage() for r in overflow.records] == ["kept", "kept too"]
+    assert handler.queue.get_nowait().getMessage() == "fills the queue"
+
+
+def test_warning_waits_for_room_in_the_queue():
+    log_queue = queue.Queue(maxsize=1)
+    handler = NonBlockingHandler(log_queue, overflow=Collect(), block_timeout=1)
+    handler.handle(_record(logging.INFO, "fills the queue"))
+
+    threading.Timer(0.05, log_queue.get_nowait).start()
+    handler.handle(_record(logging.WARNING, "queued"))
+
+    assert handler.overflow.records == []
+    assert log_queue.get_nowait().getMessage() == "queued"
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = textwrap.dedent("""
+    import multiprocessing
+    from app.utils.metrics import ROWS_PROCESSED, render_metrics
+
+    def child():
+        ROWS_PROCESSED.labels("parse").inc(5)
+
+    if __name__ == "__main__":
+        context = multiprocessing.get_context("fork")
+        for _ in range(2):
+            process = context.Process(target=child)
+            process.start()
+            process.join()
+        body, _ = render_metrics()
+        print(body.decode())
+""")
+
+
+def test_counters_from_forked_children_are_merged(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path / "prometheus"), PYTHONPATH=BACKEND)
+    result = subprocess.run([sys.executable, "-c", SCRIPT], capture_output=True, text=True, env=env, cwd=BACKEND)
+
+    assert result.returncode == 0, result.stderr
+    assert 'pod_trends_rows_processed_total{stage="parse"} 10.0' in result.stdout
@@ -0,0 +1,61 @@
+import pytest
+
+from app.analysis import niches
+from app.database import Base, SessionLocal, engine
+from app.models import Niche, Product
+from app.scrapers.ingestion import upsert_products
+
+
+def _items(start: int, count: int):
+    themes = ["retro cat mom", "fishing dad", "nurse life", "teacher coffee", "hiking mountains"]
+    return [
+        {"external_id": f"p{i}", "marketplace": "etsy", "category": "shirts", "price": 20,
+         "title": f"{themes[i % 5]} shirt {i}", "tags": themes[i % 5].split()}
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    upsert_products(session, _items(0, niches.MIN_PRODUCTS_FOR_NICHES))
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+    niches._active.clear()
+
+
+def _current_niche_ids(db):
+    return {niche_id for (niche_id,) in db.query(Niche.id)}
+
+
+def test_fit_reassigns_products_written_during_the_fit(db, monkeypatch):
+    fit_pipeline = niches.fit_pipeline
+
+    def fit_while_ingesting(documents):
+        fitted = fit_pipeline(documents)
+        other = SessionLocal()
+        upsert_products(other, _items(1000, 3))  # no model yet: left unassigned
+        # as if assigned with the previous model, whose niches the fit deletes
+        other.query(Product).filter(Product.external_id == "p1000").update({Product.niche_id: -1})
+        other.commit()
+        other.close()
+        return fitted
+
+    monkeypatch.setattr(niches, "fit_pipeline", fit_while_ingesting)
+    stats = niches.fit_niches(db)
+
+    assert stats["reassigned"] == 3
+    current = _current_niche_ids(db)
+    assert {niche_id for (niche_id,) in db.query(Product.niche_id)} <= current
+
+
+def test_orphans_left_by_a_late_commit_are_assigned(db):
+    niches.fit_niches(db)
+    db.query(Product).filter(Product.id <= 5).update({Product.niche_id: -1})
+    db.commit()
+
+    assert niches.assign_orphaned_products(db) == 5
+    assert niches.assign_orphaned_products(db) == 0
+    assert {niche_id for (niche_id,) in db.query(Product.niche_id)} <= _current_niche_ids(db)
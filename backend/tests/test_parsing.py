@@ -0,0 +1,69 @@
+from pathlib import Path
+import multiprocessing
+
+from app.scrapers import parsing
+from app.scrapers.base import EtsyScraper
+
+HTML = Path(__file__).parent.parent / "benchmarks" / "fixtures" / "etsy_search.html"
+SELECTOR = EtsyScraper.listing_selector
+FIELDS = EtsyScraper.listing_fields
+
+
+def _parse_in_child(results):
+    parsing.settings.parse_workers = 2
+    parsing.settings.parse_batch_pages = 1
+    html = HTML.read_text()
+    try:
+        results.put([len(items) for items in parsing.parse_pages([("https://www.etsy.com/", html)] * 3,
+                                                                 SELECTOR, FIELDS)])
+    except BaseException as e:
+        results.put(repr(e))
+
+
+def test_parse_pages_in_daemon_process_parses_inline():
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=_parse_in_child, args=(results,), daemon=True)
+    child.start()
+    outcome = results.get(timeout=60)
+    child.join(timeout=10)
+
+    expected = len(parsing.parse_listing(HTML.read_text(), SELECTOR, FIELDS))
+    assert expected > 0
+    assert outcome == [expected] * 3
+
+
+def test_parse_pages_keeps_page_order_and_skips_empty_pages():
+    html = HTML.read_text()
+    parsed = parsing.parse_pages([("a", html), ("b", None), ("c", html)], SELECTOR, FIELDS)
+    assert [bool(items) for items in parsed] == [True, False, True]
+
+
+def test_broken_pool_is_shut_down_and_replaced(monkeypatch):
+    pools = []
+
+    class BrokenPool:
+        def __init__(self, **kwargs):
+            self.shutdown_calls = []
+            pools.append(self)
+
+        def submit(self, *args):
+            raise RuntimeError("A process in the process pool was terminated abruptly")
+
+        def shutdown(self, **kwargs):
+            self.shutdown_calls.append(kwargs)
+
+    monkeypatch.setattr(parsing, "ProcessPoolExecutor", BrokenPool)
+    monkeypatch.setattr(parsing.settings, "parse_workers", 2)
+    monkeypatch.setattr(parsing.settings, "parse_batch_pages", 1)
+    parsing.get_parse_pool.cache_clear()
+    html = HTML.read_text()
+    try:
+        for _ in range(2):
+            parsed = parsing.parse_pages([("a", html), ("b", html)], SELECTOR, FIELDS)
+            assert all(parsed)
+    finally:
+        parsing.get_parse_pool.cache_clear()
+
+    assert len(pools) == 2
+    assert all(pool.shutdown_calls == [{"wait": False, "cancel_futures": True}] for pool in pools)
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+import pytest
+
+from app.analysis.trends import build_trends_for_categories, save_trends
+from app.database import Base, SessionLocal, engine
+from app.models import ProductSnapshot, ProductTag
+from app.scrapers.ingestion import upsert_products
+
+
+def _items(reviews: int):
+    return [
+        {"external_id": f"p{i}", "marketplace": "etsy", "category": "mugs", "price": 15,
+         "title": f"cat mug {i}", "tags": ["cat"], "reviews_count": reviews + i}
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    upsert_products(session, _items(10))
+    upsert_products(session, _items(40))  # snapshots with review deltas
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+
+def _score(db):
+    rows = build_trends_for_categories(db, ["mugs"])
+    save_trends(db, rows)
+    return rows
+
+
+def test_unchanged_group_is_skipped(db):
+    assert len(_score(db)) == 1
+    assert _score(db) == []
+
+
+def test_group_is_rescored_as_its_snapshots_age(db):
+    first = _score(db)[0]
+    # A day passes without any product changing: the demand decays
+    for snapshot in db.query(ProductSnapshot):
+        snapshot.captured_at -= timedelta(days=1)
+    db.commit()
+
+    rescored = _score(db)
+    assert len(rescored) == 1
+    assert rescored[0]["growth_indicators"]["decayed_reviews"] < first["growth_indicators"]["decayed_reviews"]
+
+
+def test_group_is_rescored_when_its_tags_change(db):
+    _score(db)
+    db.query(ProductTag).update({ProductTag.tag: "dog"})
+    db.commit()
+
+    assert len(_score(db)) == 1
@@ -30,4 +30,21 @@ export const designsApi = {
   create: (data: any) => api.post('/designs', data),
 }
 
+export const eventsApi = {
+  // Server-sent trend/design change events; returns a function that closes the stream
+  subscribe: (
+    onEvent: (event: any) => void,
+    filters?: { topics?: string; trend_id?: number; category?: string; design_status?: string }
+  ) => {
+    const params = new URLSearchParams()
+    Object.entries(filters || {}).forEach(([key, value]) => {
+      if (value !== undefined) params.set(key, String(value))
+    })
+    const source = new EventSource(`${API_URL}/events/stream?${params}`)
+    const handler = (message: MessageEvent) => onEvent(JSON.parse(message.data))
+    ;['trend', 'design', 'resync'].forEach((topic) => source.addEventListener(topic, handler))
+    return () => source.close()
+  },
+}
+
 export default api
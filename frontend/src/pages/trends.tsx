@@ -3,6 +3,7 @@ import Head from 'next/head'
 import DashboardLayout from '@/components/DashboardLayout'
 import { TrendCard, LoadingCard, Button, ScoreCard } from '@/components/Cards'
 import { useTrendStore } from '@/lib/store'
+import { eventsApi } from '@/lib/api'
 import { TrendingUp, BarChart3, Zap, Target } from 'lucide-react'
 
 export default function TrendsPage() {
@@ -10,6 +11,16 @@ export default function TrendsPage() {
 
   useEffect(() => {
     fetchTrends()
+    // Refetch only when the server reports a change; one refetch per burst of events
+    let timer: ReturnType<typeof setTimeout> | undefined
+    const close = eventsApi.subscribe(() => {
+      clearTimeout(timer)
+      timer = setTimeout(fetchTrends, 250)
+    }, { topics: 'trend' })
+    return () => {
+      clearTimeout(timer)
+      close()
+    }
   }, [fetchTrends])
 
   return (